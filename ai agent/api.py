@@ -1,23 +1,39 @@
 from fastapi import FastAPI, HTTPException, Query, Body, UploadFile, File, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List, Dict, Any, Optional
+from fastapi.responses import StreamingResponse
+from typing import Dict, Any, Optional
 from datetime import datetime, timezone
-import random
 import uuid
-import pandas as pd
-from io import BytesIO
 
 # Import logic from xai_agent
 # Note: This implies xai_agent.py is in the same directory
 from xai_agent import (
-    ai_decision, 
     DecisionType, 
     policy_memory, 
+    ai_memory,
     build_override_prompt, 
-    call_ai,
-    extract_json
+    ollama_client,
+    decision_cache,
+    db,
+    job_queue,
+    job_workers,
+    enqueue_decision,
+    requeue_orphaned_applications,
+    ai_scheduler,
+    pack_stats,
+    json_parse_stats,
+    validation_stats,
+    call_ai_checked,
+    check_upload_size,
+    submit_batch,
+    get_batch_or_404,
+    iter_batch_results,
+    decision_sse_response,
+    MAX_BATCH_FILE_MB
 )
-from database import SimpleDB
+from ingest import STREAMED_TYPES, file_kind
+from schemas import OVERRIDE_SCHEMA
+from database import list_page, status_filters, DuplicateId, WriteConflict, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 
 app = FastAPI(title="Explainable AI Decision Engine (Hackathon 2.0)")
 
@@ -28,24 +44,34 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-db = SimpleDB()
+
+# Share xai_agent's pooled Ollama client, DB handle (open_db() hands every
+# module the same one) and job workers for this app's lifetime too
+app.on_event("startup")(ollama_client.open)
+app.on_event("startup")(ai_memory.start)
+app.on_event("startup")(requeue_orphaned_applications)
+app.on_event("startup")(job_workers.start)
+app.on_event("shutdown")(ollama_client.close)
+app.on_event("shutdown")(ai_memory.stop)
+app.on_event("shutdown")(job_workers.stop)
 
 # =====================================================
 # BACKGROUND TASKS
 # =====================================================
-async def process_override_explanation(app_id: str, prompt: str):
+async def process_override_explanation(app_id: str, prompt: str, final_decision: str):
     try:
-        explanation = await call_ai(prompt)
-        
-        # Read-Modify-Write DB
-        # Note: In a real app, use a real DB with row locking
-        all_apps = db._read_db()
-        for i, a in enumerate(all_apps):
-            if a["id"] == app_id:
-                all_apps[i]["override_explanation"] = explanation
-                break
-        db._write_db(all_apps)
+        explanation = await call_ai_checked(prompt, OVERRIDE_SCHEMA, prefix_key="override")
+
+        # Compare-and-set: drop the explanation if the application was
+        # re-reviewed to a different decision while the model was running
+        db.update_application(
+            app_id,
+            {"override_explanation": explanation},
+            expected={"final_decision": final_decision}
+        )
         print(f"DEBUG: Override explanation generated for {app_id}")
+    except WriteConflict:
+        print(f"DEBUG: Discarding stale override explanation for {app_id}")
     except Exception as e:
         print(f"ERROR: Failed to generate override explanation: {e}")
 
@@ -53,68 +79,85 @@ async def process_override_explanation(app_id: str, prompt: str):
 # APPLICATIONS ENDPOINTS
 # =====================================================
 
-@app.post("/applications")
+@app.post("/applications", status_code=202)
 async def create_application(
     decision_type: str = Query(...),
     payload: Dict[str, Any] = Body(...)
 ):
     """
-    Submit a new application for AI review.
+    Submit a new application for AI review. The record is returned at once
+    as pending_ai; a background worker adds the AI result and moves it to
+    pending_human.
     """
     try:
         dtype = DecisionType(decision_type)
     except ValueError:
         raise HTTPException(status_code=400, detail=f"Invalid decision_type. Must be one of {[e.value for e in DecisionType]}")
     
-    # 1. Run AI Decision
     # Add timestamp to payload if not present (helps with ordering)
     if "created_at" not in payload:
         payload["created_at"] = datetime.now(timezone.utc).isoformat()
         
-    # Generate a friendly ID like APP-1234
-    short_id = f"APP-{random.randint(1000, 9999)}"
-    
-    # 2. Call AI
-    result = await ai_decision(dtype, payload)
-    
-    # 3. Construct Application Record
-    application = {
-        "id": short_id,
-        "domain": decision_type,
-        "data": payload,
-        "status": "approved" if result["decision"]["status"].upper() == "APPROVED" else "rejected", 
-        "ai_result": result,
-        "timestamp": datetime.now(timezone.utc).isoformat()
-    }
-    
-    # For user workflow, usually goes to pending human review if not auto-approved
-    # But user wants "Perfect". Let's say: if rejected, it stays rejected unless human overrides. 
-    # If approved, it's approved.
-    # Frontend logic has tabs: "Pending Review" and "History".
-    # Pending usually means "Needs Human Action". 
-    # Let's map ALL to "pending_human" initially so they show up.
-    application["status"] = "pending_human"
-    
-    # Save to DB
-    saved_app = db.save_application(application)
+    # Construct Application Record. It shows under "Pending Review" straight
+    # away; the worker fills in ai_result and moves it to pending_human.
+    while True:
+        # Generate a friendly ID like APP-1A2B3C4D (re-drawn if already taken)
+        short_id = f"APP-{uuid.uuid4().hex[:8].upper()}"
+        application = {
+            "id": short_id,
+            "domain": dtype.value,
+            "data": payload,
+            "status": "pending_ai",
+            "timestamp": datetime.now(timezone.utc).isoformat()
+        }
+        try:
+            # Save to DB, then queue the AI decision
+            saved_app = db.save_application(application)
+            break
+        except DuplicateId:
+            continue
+    enqueue_decision(short_id)
     
     return saved_app
 
+@app.post("/decision/stream")
+async def decision_stream(
+    decision_type: str = Query(...),
+    payload: Dict[str, Any] = Body(...)
+):
+    """
+    Decide one applicant without saving it, as Server-Sent Events:
+    `progress`, `token` and `reasoning` while the model generates, then
+    `decision` with the result (or `error`).
+    """
+    try:
+        dtype = DecisionType(decision_type)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid decision_type. Must be one of {[e.value for e in DecisionType]}")
+    return decision_sse_response(dtype, payload)
+
 @app.get("/applications")
-async def list_applications(status: Optional[str] = None):
-    apps = db._read_db() # Accessing internal method for speed/simplicity
-    if status:
-        # Filter logic
-        if status == "pending":
-            return [a for a in apps if a.get("status") in ["pending_human", "pending_ai"]]
-        elif status == "history":
-             return [a for a in apps if a.get("status") not in ["pending_human", "pending_ai"]]
-        else:
-            return [a for a in apps if a.get("status") == status]
-            
-    # Return all, sorted by timestamp desc
-    apps.sort(key=lambda x: x.get("timestamp", ""), reverse=True)
-    return apps
+async def list_applications(
+    status: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None
+):
+    """
+    List applications, newest first, a page at a time.
+
+    The response is `{"items": [...], "next_cursor": ...}`; pass `next_cursor`
+    back as `cursor` for the next page. `fields` is a comma-separated
+    projection, e.g. `domain,status,data.full_name,ai_result.decision.status`.
+    """
+    # Filtering and newest-first ordering happen inside the DB backend
+    filters = status_filters(status)
+
+    field_list = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+    try:
+        return list_page(db, limit, cursor=cursor, fields=field_list, **filters)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @app.get("/applications/{app_id}")
 async def get_application(app_id: str):
@@ -130,41 +173,25 @@ async def review_application(
     decision: str = Query(..., regex="^(approved|rejected)$"),
     comment: Optional[str] = Query(None)
 ):
-    app_record = db.get_application(app_id)
-    if not app_record:
-        raise HTTPException(status_code=404, detail="Application not found")
-        
-    # Valid decision
-    app_record["status"] = decision # approved or rejected
-    app_record["reviewer_comment"] = comment
-    app_record["reviewed_at"] = datetime.now(timezone.utc).isoformat()
-    app_record["final_decision"] = decision
-    
-    # Save immediate state first
-    all_apps = db._read_db()
-    for i, a in enumerate(all_apps):
-        if a["id"] == app_id:
-            all_apps[i] = app_record
-            break
-    db._write_db(all_apps)
-    
-    # AI Override Explanation Check
-    # If human decision differs from AI decision
-    ai_status = app_record.get("ai_result", {}).get("decision", {}).get("status", "").lower()
-    human_status = decision.lower()
-    
-    if ai_status and ai_status != human_status:
-        # Mark as override immediately
-        app_record["is_override"] = True
-        
-        # Re-save "is_override" flag
-        all_apps = db._read_db()
-        for i, a in enumerate(all_apps):
-            if a["id"] == app_id:
-                all_apps[i] = app_record
-                break
-        db._write_db(all_apps)
+    # Single read-modify-write; the record is persisted once when the block exits
+    with db.transaction(app_id) as app_record:
+        if not app_record:
+            raise HTTPException(status_code=404, detail="Application not found")
+
+        # Valid decision
+        app_record["status"] = decision # approved or rejected
+        app_record["reviewer_comment"] = comment
+        app_record["reviewed_at"] = datetime.now(timezone.utc).isoformat()
+        app_record["final_decision"] = decision
+
+        # AI Override Explanation Check
+        # If human decision differs from AI decision
+        ai_status = (app_record.get("ai_result") or {}).get("decision", {}).get("status", "").lower()
+        human_status = decision.lower()
+        if ai_status and ai_status != human_status:
+            app_record["is_override"] = True
 
+    if ai_status and ai_status != human_status:
         # Generate explanation in background
         try:
             dtype = DecisionType(app_record["domain"])
@@ -176,22 +203,11 @@ async def review_application(
                 comment
             )
             # Add to background tasks
-            background_tasks.add_task(process_override_explanation, app_id, prompt)
+            background_tasks.add_task(process_override_explanation, app_id, prompt, decision)
             
         except Exception as e:
             print(f"Error preparing override explanation task: {e}")
-            
-    # Update DB - effectively we need to replace the record
-    # SimpleDB doesn't have update, so we read-modify-write manually
-    # db.save_application appends... we need an update method.
-    # Let's implement a quick update in this logic
-    all_apps = db._read_db()
-    for i, a in enumerate(all_apps):
-        if a["id"] == app_id:
-            all_apps[i] = app_record
-            break
-    db._write_db(all_apps)
-    
+
     return app_record
 
 @app.put("/applications/{app_id}/explanation")
@@ -199,26 +215,17 @@ async def update_explanation(
     app_id: str,
     payload: Dict[str, str] = Body(...)
 ):
-    app_record = db.get_application(app_id)
-    if not app_record:
-        raise HTTPException(status_code=404, detail="Application not found")
-        
     explanation_text = payload.get("explanation")
     if not explanation_text:
         raise HTTPException(status_code=400, detail="Missing explanation text")
 
     # Update explanation
-    app_record["agent_explanation"] = explanation_text
-    app_record["explanation_edited"] = True
-    
-    # Update DB
-    all_apps = db._read_db()
-    for i, a in enumerate(all_apps):
-        if a["id"] == app_id:
-            all_apps[i] = app_record
-            break
-    db._write_db(all_apps)
-    
+    app_record = db.update_application(app_id, {
+        "agent_explanation": explanation_text,
+        "explanation_edited": True
+    })
+    if not app_record:
+        raise HTTPException(status_code=404, detail="Application not found")
     return app_record
 
 # =====================================================
@@ -230,9 +237,9 @@ async def get_policies(domain: Optional[str] = None):
     return policy_memory.get_policies(domain)
 
 @app.post("/policies")
-async def add_policy(domain: str = Query(...), policy_text: str = Query(...)):
+async def add_policy(domain: str = Query(...), policy_text: str = Query(...), always_include: bool = Query(False)):
     try:
-        return policy_memory.add_policy(domain, policy_text)
+        return policy_memory.add_policy(domain, policy_text, always_include)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -249,61 +256,86 @@ async def delete_policy(domain: str, policy_id: str):
 
 @app.get("/health")
 async def health():
-    return {"status": "ok", "timestamp": datetime.now(timezone.utc).isoformat()}
+    return {
+        "status": "ok",
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "ollama_calls": ollama_client.snapshot(),
+        "decision_cache": decision_cache.snapshot(),
+        "policies": policy_memory.snapshot(),
+        "jobs": job_queue.counts(),
+        "scheduler": ai_scheduler.snapshot(),
+        "packing": pack_stats,
+        "json_parse": json_parse_stats,
+        "validation": validation_stats.snapshot(),
+        "backends": ollama_client.router.snapshot()
+    }
+
+def normalize_upload_row(payload: Dict[str, Any]) -> Dict[str, Any]:
+    # Normailze fields
+    if "full_name" not in payload:
+        for k in ["name", "applicant_name", "customer_name"]:
+            if k in payload:
+                payload["full_name"] = payload[k]
+                break
+    return payload
+
 
-@app.post("/applications/batch_upload")
+@app.post("/applications/batch_upload", status_code=202)
 async def batch_upload(
     decision_type: str = Query(...),
     file: UploadFile = File(...)
 ):
+    """
+    Queue every row of a CSV (or JSON/JSONL) upload as a pending_ai
+    application. The file is parsed in chunks, so large exports such as
+    credit_histories/Extra/train.csv go through as one upload. Track it
+    with GET /batches/{batch_id}.
+    """
     try:
         dtype = DecisionType(decision_type)
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid decision type")
 
-    contents = await file.read()
-    try:
-        # Check if CSV
-        df = pd.read_csv(BytesIO(contents))
-        records = df.to_dict(orient="records")
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Invalid CSV: {str(e)}")
-    
-    processed_count = 0
-    
-    # Process max 10 for demo speed
-    for row in records[:10]:
-        # Filter NaNs
-        payload = {k: v for k, v in row.items() if pd.notna(v)}
-        
-        # Normailze fields
-        if "full_name" not in payload:
-            for k in ["name", "applicant_name", "customer_name"]:
-                if k in payload:
-                    payload["full_name"] = payload[k]
-                    break
-        
-        # Create ID
-        short_id = f"APP-{random.randint(10000, 99999)}"
-        
-        # Run AI (awaiting sequentially for simplicity/stability)
-        try:
-            result = await ai_decision(dtype, payload)
-            status = "pending_human"
-        except Exception as e:
-            print(f"Batch AI Error: {e}")
-            status = "error"
-            result = None
-            
-        app_entry = {
-            "id": short_id,
-            "domain": decision_type,
-            "data": payload,
-            "status": status,
-            "ai_result": result,
-            "timestamp": datetime.now(timezone.utc).isoformat()
-        }
-        db.save_application(app_entry)
-        processed_count += 1
-        
-    return {"message": "Batch processing completed", "count": processed_count}
+    if not file.filename or file_kind(file.filename) not in STREAMED_TYPES:
+        file.filename = "upload.csv"  # The UI uploads CSV
+    check_upload_size(file, MAX_BATCH_FILE_MB)
+    batch_id = await submit_batch(dtype, file, prepare=normalize_upload_row)
+    batch = get_batch_or_404(batch_id)
+
+    return {"message": "Batch queued for AI review", "count": batch["total"], "batch_id": batch_id}
+
+
+@app.post("/batches", status_code=202)
+async def create_batch(
+    decision_type: DecisionType = Query(...),
+    file: UploadFile = File(...)
+):
+    """
+    Queue every record of a CSV, JSON or JSONL file for AI review as one
+    batch and return it (`id`, counts). Poll GET /batches/{id} for progress.
+    """
+    if file_kind(file.filename or "") not in STREAMED_TYPES:
+        raise HTTPException(status_code=400, detail="Unsupported file type. Use .csv, .json or .jsonl")
+    check_upload_size(file, MAX_BATCH_FILE_MB)
+    batch_id = await submit_batch(decision_type, file, prepare=normalize_upload_row)
+    return get_batch_or_404(batch_id)
+
+
+@app.get("/batches/{batch_id}")
+async def get_batch(batch_id: str):
+    """Progress of a batch upload: counts, throughput and ETA."""
+    return get_batch_or_404(batch_id)
+
+
+@app.get("/batches/{batch_id}/results")
+async def get_batch_results(
+    batch_id: str,
+    after: int = Query(0, ge=0),
+    follow: bool = True
+):
+    """Finished items as NDJSON in completion order; resume with `after=<last seq>`."""
+    get_batch_or_404(batch_id)
+    return StreamingResponse(
+        iter_batch_results(batch_id, after, follow),
+        media_type="application/x-ndjson"
+    )
@@ -0,0 +1,137 @@
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Dict, Any, List, Optional
+
+BATCHES_FILE = "../data/batches.sqlite3"
+# Completions used for the throughput estimate behind the ETA
+RATE_WINDOW = 50
+
+
+class BatchStore:
+    """
+    Progress of batch submissions, in SQLite (WAL mode).
+
+    A batch is ``loading`` while its upload is parsed, ``running`` until
+    every item has been recorded as done or failed, then ``done``. Each
+    recorded item gets an increasing ``seq``, so results can be read back
+    in completion order and resumed with ``after=seq``. Recording an item
+    twice (a job re-run after a crash) is a no-op.
+    """
+
+    def __init__(self, db_file: str = BATCHES_FILE):
+        self.db_file = db_file
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_file, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS batches (
+                id TEXT PRIMARY KEY,
+                domain TEXT NOT NULL,
+                source TEXT,
+                status TEXT NOT NULL,
+                total INTEGER NOT NULL DEFAULT 0,
+                completed INTEGER NOT NULL DEFAULT 0,
+                failed INTEGER NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL,
+                finished_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS batch_items (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                batch_id TEXT NOT NULL,
+                app_id TEXT NOT NULL,
+                ok INTEGER NOT NULL,
+                error TEXT,
+                finished_at REAL NOT NULL,
+                UNIQUE (batch_id, app_id)
+            );
+            CREATE INDEX IF NOT EXISTS idx_batch_items ON batch_items(batch_id, seq);
+        """)
+
+    def create(self, domain: str, source: Optional[str] = None) -> str:
+        batch_id = uuid.uuid4().hex[:12]
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO batches (id, domain, source, status, created_at) VALUES (?, ?, ?, 'loading', ?)",
+                (batch_id, domain, source, time.time())
+            )
+        return batch_id
+
+    def add_items(self, batch_id: str, count: int):
+        with self._lock:
+            self._conn.execute("UPDATE batches SET total = total + ? WHERE id = ?", (count, batch_id))
+
+    def seal(self, batch_id: str):
+        """All items are queued; the batch finishes once they are all recorded."""
+        with self._lock:
+            self._conn.execute("UPDATE batches SET status = 'running' WHERE id = ?", (batch_id,))
+            self._finish_if_done(batch_id)
+
+    def record(self, batch_id: str, app_id: str, ok: bool, error: Optional[str] = None):
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO batch_items (batch_id, app_id, ok, error, finished_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (batch_id, app_id, int(ok), error[:1000] if error else None, now)
+                )
+                if cursor.rowcount:
+                    column = "completed" if ok else "failed"
+                    self._conn.execute(f"UPDATE batches SET {column} = {column} + 1 WHERE id = ?", (batch_id,))
+                    self._finish_if_done(batch_id)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _finish_if_done(self, batch_id: str):
+        self._conn.execute(
+            "UPDATE batches SET status = 'done', finished_at = ? "
+            "WHERE id = ? AND status = 'running' AND completed + failed >= total",
+            (time.time(), batch_id)
+        )
+
+    def get(self, batch_id: str) -> Optional[Dict[str, Any]]:
+        """The batch with counts, throughput and an ETA for the remaining items."""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM batches WHERE id = ?", (batch_id,)).fetchone()
+            if row is None:
+                return None
+            recent = [r[0] for r in self._conn.execute(
+                "SELECT finished_at FROM batch_items WHERE batch_id = ? ORDER BY seq DESC LIMIT ?",
+                (batch_id, RATE_WINDOW)
+            )]
+        batch = dict(row)
+        finished = batch["completed"] + batch["failed"]
+        batch["pending"] = batch["total"] - finished
+        end = batch["finished_at"] or time.time()
+        batch["elapsed_seconds"] = round(end - batch["created_at"], 1)
+
+        # Rate over the latest completions, so time spent queued behind
+        # earlier batches does not drag the estimate down
+        rate = None
+        if len(recent) >= 2 and recent[0] > recent[-1]:
+            rate = (len(recent) - 1) / (recent[0] - recent[-1])
+        elif finished and end > batch["created_at"]:
+            rate = finished / (end - batch["created_at"])
+        batch["items_per_minute"] = round(rate * 60, 2) if rate else None
+        if batch["status"] == "done":
+            batch["eta_seconds"] = 0
+        else:
+            batch["eta_seconds"] = round(batch["pending"] / rate, 1) if rate else None
+        return batch
+
+    def items(self, batch_id: str, after: int = 0, limit: int = 200) -> List[Dict[str, Any]]:
+        """Recorded items with ``seq > after``, in completion order."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, app_id, ok, error, finished_at FROM batch_items "
+                "WHERE batch_id = ? AND seq > ? ORDER BY seq LIMIT ?",
+                (batch_id, after, limit)
+            ).fetchall()
+        return [dict(row, ok=bool(row["ok"])) for row in rows]
@@ -0,0 +1,85 @@
+import math
+from typing import Dict, Any, List, Optional, Tuple
+
+# qwen-style BPE averages a little under 4 characters per token on English
+# and key: value text; erring high keeps us inside num_ctx
+CHARS_PER_TOKEN = 3.5
+# Longest single line (one applicant field, one policy) before it is cut
+MAX_LINE_TOKENS = 200
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN) if text else 0
+
+
+def trim_to_tokens(text: str, max_tokens: int, max_line_tokens: int = MAX_LINE_TOKENS) -> str:
+    """
+    Cut ``text`` to roughly ``max_tokens``. Over-long lines are shortened
+    first, then whole lines are dropped from the end with a note saying
+    how many were left out.
+    """
+    if max_tokens <= 0:
+        return ""
+    max_line_chars = int(max_line_tokens * CHARS_PER_TOKEN)
+    lines = [
+        line if len(line) <= max_line_chars else line[:max_line_chars - 3] + "..."
+        for line in text.split("\n")
+    ]
+    kept: List[str] = []
+    used = 0
+    for i, line in enumerate(lines):
+        cost = estimate_tokens(line) + 1
+        if used + cost > max_tokens:
+            omitted = sum(1 for rest in lines[i:] if rest.strip())
+            if omitted:
+                kept.append(f"[{omitted} more lines omitted]")
+            break
+        kept.append(line)
+        used += cost
+    return "\n".join(kept)
+
+
+class TokenBudget:
+    """
+    Per-section token allowances for a prompt.
+
+    ``fit`` trims each section in ``trim_order`` to its allowance, then, if
+    the prompt is still over ``total``, takes the overflow from those
+    sections lowest priority first. Sections not in ``trim_order`` (the
+    fixed instructions) are counted but never cut.
+    """
+
+    def __init__(self, total: int, allowances: Dict[str, int], trim_order: List[str]):
+        self.total = total
+        self.allowances = allowances
+        self.trim_order = trim_order
+
+    def fit(self, sections: Dict[str, str]) -> Tuple[Dict[str, str], Dict[str, Any]]:
+        fitted = dict(sections)
+        trimmed = []
+        for name in self.trim_order:
+            allowance: Optional[int] = self.allowances.get(name)
+            if name in fitted and allowance is not None and estimate_tokens(fitted[name]) > allowance:
+                fitted[name] = trim_to_tokens(fitted[name], allowance)
+                trimmed.append(name)
+
+        overflow = sum(estimate_tokens(text) for text in fitted.values()) - self.total
+        for name in self.trim_order:
+            if overflow <= 0:
+                break
+            if not fitted.get(name):
+                continue
+            before = estimate_tokens(fitted[name])
+            fitted[name] = trim_to_tokens(fitted[name], before - overflow)
+            overflow -= before - estimate_tokens(fitted[name])
+            if name not in trimmed:
+                trimmed.append(name)
+
+        counts = {name: estimate_tokens(text) for name, text in fitted.items()}
+        usage = {
+            "sections": counts,
+            "total": sum(counts.values()),
+            "budget": self.total,
+            "trimmed": trimmed,
+        }
+        return fitted, usage
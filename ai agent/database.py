@@ -1,65 +1,754 @@
+import base64
+import bisect
 import json
 import os
-from typing import Dict, Any, List, Optional
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 from uuid import uuid4
 from datetime import datetime, timezone
 
 DB_FILE = "db.json"
+LOG_SUFFIX = ".log"
+SQLITE_FILE = "db.sqlite3"
+
+# Which SimpleDB implementation open_db() returns: "log" or "sqlite"
+DB_BACKEND = os.environ.get("XAI_DB_BACKEND", "log")
+
+# Compact once at least this fraction of the log is superseded records...
+COMPACT_RATIO = 0.5
+# ...and the dead bytes are worth the rewrite
+COMPACT_MIN_BYTES = 1024 * 1024
+
+
+class WriteConflict(Exception):
+    """A compare-and-set update found the record changed underneath it."""
+
+
+class DuplicateId(Exception):
+    """save_application was given the id of an application that already exists."""
+
+
+def _matches(app: Dict[str, Any], expected: Dict[str, Any]) -> bool:
+    return all(app.get(key) == value for key, value in expected.items())
+
+
+def _prepare_new(application: Dict[str, Any]) -> Dict[str, Any]:
+    """Fill in id, timestamp and status for a record about to be saved."""
+    if "id" not in application:
+        application["id"] = str(uuid4())[:8]  # Short ID for readability
+    # A None timestamp would break the newest-first ordering
+    if not application.get("timestamp"):
+        application["timestamp"] = datetime.now(timezone.utc).isoformat()
+
+    # Ensure status is set
+    if "status" not in application:
+        application["status"] = "pending_ai"
+    return application
+
+
+class AppendLog:
+    """
+    Append-only record log with an in-memory id -> (offset, length) index.
+
+    Each line is ``<id>\\t<json>\\n``. The id prefix lets a restart rebuild the
+    index without parsing any JSON. Updates append a new version of the record
+    and repoint the index; superseded versions are dropped by a background
+    compaction once they make up enough of the file.
+    """
+
+    def __init__(
+        self,
+        log_file: str,
+        compact_ratio: float = COMPACT_RATIO,
+        compact_min_bytes: int = COMPACT_MIN_BYTES,
+        fsync: bool = False
+    ):
+        self.log_file = log_file
+        self.compact_ratio = compact_ratio
+        self.compact_min_bytes = compact_min_bytes
+        self.fsync = fsync
+
+        self._lock = threading.RLock()
+        self._index: Dict[str, Tuple[int, int]] = {}
+        self._size = 0
+        self._dead = 0
+        self._compacting = False
+        # Bumped by replace_all so an in-flight compaction knows its snapshot is stale
+        self._generation = 0
+        self._writer = None
+        self._reader = None
+
+        self._load()
+
+    # -------------------------------------------------
+    # Startup
+    # -------------------------------------------------
+    def _load(self):
+        if not os.path.exists(self.log_file):
+            open(self.log_file, "wb").close()
+
+        index: Dict[str, Tuple[int, int]] = {}
+        dead = 0
+        offset = 0
+        with open(self.log_file, "rb") as f:
+            for line in f:
+                length = len(line)
+                tab = line.find(b"\t")
+                if not line.endswith(b"\n") or tab <= 0:
+                    # Torn write from a crash: drop the tail
+                    break
+                app_id = line[:tab].decode("utf-8")
+                if app_id in index:
+                    dead += index[app_id][1]
+                index[app_id] = (offset, length)
+                offset += length
+
+        if offset < os.path.getsize(self.log_file):
+            print(f"WARNING: Truncating incomplete record at offset {offset} in {self.log_file}")
+            with open(self.log_file, "r+b") as f:
+                f.truncate(offset)
+
+        self._index = index
+        self._size = offset
+        self._dead = dead
+        self._open_handles()
+
+    def _open_handles(self):
+        self._writer = open(self.log_file, "ab")
+        self._reader = open(self.log_file, "rb")
+
+    def _close_handles(self):
+        for handle in (self._writer, self._reader):
+            if handle is not None:
+                handle.close()
+        self._writer = None
+        self._reader = None
+
+    # -------------------------------------------------
+    # Record access
+    # -------------------------------------------------
+    def __contains__(self, app_id: str) -> bool:
+        return app_id in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def _read_at(self, offset: int, length: int) -> Dict[str, Any]:
+        self._reader.seek(offset)
+        line = self._reader.read(length)
+        return json.loads(line[line.index(b"\t") + 1:])
+
+    def get(self, app_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            location = self._index.get(app_id)
+            if location is None:
+                return None
+            return self._read_at(*location)
+
+    def values(self) -> List[Dict[str, Any]]:
+        """All live records, in first-insertion order."""
+        with self._lock:
+            return [self._read_at(*location) for location in self._index.values()]
+
+    def put(self, app_id: str, record: Dict[str, Any], sync: bool = False):
+        line = f"{app_id}\t{json.dumps(record, separators=(',', ':'))}\n".encode("utf-8")
+        with self._lock:
+            self._writer.write(line)
+            self._writer.flush()
+            if sync or self.fsync:
+                os.fsync(self._writer.fileno())
+
+            previous = self._index.get(app_id)
+            if previous is not None:
+                self._dead += previous[1]
+            self._index[app_id] = (self._size, len(line))
+            self._size += len(line)
+
+            if self._should_compact():
+                self._compacting = True
+                threading.Thread(target=self._compact_safely, daemon=True).start()
+
+    def replace_all(self, records: List[Tuple[str, Dict[str, Any]]]):
+        """Rewrite the log so it contains exactly ``records``."""
+        tmp_file = self.log_file + ".tmp"
+        with self._lock:
+            index: Dict[str, Tuple[int, int]] = {}
+            with open(tmp_file, "wb") as dst:
+                for app_id, record in records:
+                    line = f"{app_id}\t{json.dumps(record, separators=(',', ':'))}\n".encode("utf-8")
+                    index[app_id] = (dst.tell(), len(line))
+                    dst.write(line)
+                dst.flush()
+                os.fsync(dst.fileno())
+                size = dst.tell()
+            self._generation += 1
+            self._swap_in(tmp_file, index, size)
+
+    # -------------------------------------------------
+    # Compaction
+    # -------------------------------------------------
+    def _should_compact(self) -> bool:
+        return (
+            not self._compacting
+            and self._dead >= self.compact_min_bytes
+            and self._dead >= self._size * self.compact_ratio
+        )
+
+    def _compact_safely(self):
+        try:
+            self.compact()
+        except Exception as e:
+            print(f"ERROR: Log compaction failed for {self.log_file}: {e}")
+        finally:
+            self._compacting = False
+
+    def compact(self):
+        """
+        Copy live records into a fresh log and swap it in.
+
+        The bulk copy runs without the lock; only records appended while it
+        ran are replayed under the lock before the swap.
+        """
+        with self._lock:
+            snapshot = list(self._index.items())
+            end = self._size
+            generation = self._generation
+
+        tmp_file = self.log_file + ".compact"
+        index: Dict[str, Tuple[int, int]] = {}
+        src = open(self.log_file, "rb")
+        dst = open(tmp_file, "wb")
+        try:
+            for app_id, (offset, length) in snapshot:
+                src.seek(offset)
+                index[app_id] = (dst.tell(), length)
+                dst.write(src.read(length))
+
+            with self._lock:
+                if generation != self._generation:
+                    src.close()
+                    dst.close()
+                    os.remove(tmp_file)
+                    return
+                src.seek(end)
+                for line in src:
+                    app_id = line[:line.index(b"\t")].decode("utf-8")
+                    index[app_id] = (dst.tell(), len(line))
+                    dst.write(line)
+                dst.flush()
+                os.fsync(dst.fileno())
+                size = dst.tell()
+                # Both handles must be closed before the swap on Windows
+                src.close()
+                dst.close()
+                self._swap_in(tmp_file, index, size)
+        finally:
+            src.close()
+            dst.close()
+
+    def _swap_in(self, tmp_file: str, index: Dict[str, Tuple[int, int]], size: int):
+        # Caller holds the lock
+        self._close_handles()
+        os.replace(tmp_file, self.log_file)
+        self._index = index
+        self._size = size
+        self._dead = size - sum(length for _, length in index.values())
+        self._open_handles()
+
+    def close(self):
+        with self._lock:
+            self._close_handles()
+
 
 class SimpleDB:
-    def __init__(self, db_file: str = DB_FILE):
+    def __init__(self, db_file: str = DB_FILE, log_file: Optional[str] = None, **log_options):
         self.db_file = db_file
-        self._ensure_db()
+        self.log_file = log_file or os.path.splitext(db_file)[0] + LOG_SUFFIX
+        migrate = not os.path.exists(self.log_file)
+        self._log = AppendLog(self.log_file, **log_options)
+        # List metadata, built on the first query so restarts stay cheap:
+        # id -> (timestamp, status, domain) and (timestamp, id) keys in sorted order
+        self._lock = threading.RLock()
+        self._meta: Optional[Dict[str, Tuple[str, Optional[str], Optional[str]]]] = None
+        self._keys: List[Tuple[str, str]] = []
+        if migrate:
+            self._migrate_legacy()
 
-    def _ensure_db(self):
+    def _migrate_legacy(self):
+        """One-shot import of a pre-existing db.json array into the log."""
         if not os.path.exists(self.db_file):
-            with open(self.db_file, "w") as f:
-                json.dump([], f)
-
-    def _read_db(self) -> List[Dict[str, Any]]:
+            return
         try:
             with open(self.db_file, "r") as f:
-                return json.load(f)
+                legacy = json.load(f)
         except (json.JSONDecodeError, FileNotFoundError):
-            return []
+            return
+        records = [(app["id"], app) for app in legacy if isinstance(app, dict) and "id" in app]
+        if records:
+            self._log.replace_all(records)
+            print(f"DEBUG: Migrated {len(records)} applications from {self.db_file} to {self.log_file}")
+
+    def _read_db(self) -> List[Dict[str, Any]]:
+        return self._log.values()
 
     def _write_db(self, data: List[Dict[str, Any]]):
-        with open(self.db_file, "w") as f:
-            json.dump(data, f, indent=2)
+        with self._lock:
+            self._log.replace_all([(app["id"], app) for app in data])
+            self._meta = None
+
+    def _ensure_meta(self):
+        if self._meta is not None:
+            return
+        self._meta = {}
+        self._keys = []
+        for app in self._log.values():
+            timestamp = app.get("timestamp") or ""
+            self._meta[app["id"]] = (timestamp, app.get("status"), app.get("domain"))
+            self._keys.append((timestamp, app["id"]))
+        self._keys.sort()
+
+    def _track(self, app: Dict[str, Any]):
+        if self._meta is None:
+            return
+        app_id = app["id"]
+        timestamp = app.get("timestamp") or ""
+        previous = self._meta.get(app_id)
+        if previous is None or previous[0] != timestamp:
+            if previous is not None:
+                del self._keys[bisect.bisect_left(self._keys, (previous[0], app_id))]
+            bisect.insort(self._keys, (timestamp, app_id))
+        self._meta[app_id] = (timestamp, app.get("status"), app.get("domain"))
 
     def save_application(self, application: Dict[str, Any]) -> Dict[str, Any]:
-        data = self._read_db()
-        if "id" not in application:
-            application["id"] = str(uuid4())[:8]  # Short ID for readability
-        if "timestamp" not in application:
-            application["timestamp"] = datetime.now(timezone.utc).isoformat()
-        
-        # Ensure status is set
-        if "status" not in application:
-            application["status"] = "pending_ai"
-            
-        data.append(application)
-        self._write_db(data)
+        """Store a new application. Raises DuplicateId rather than overwrite an existing one."""
+        _prepare_new(application)
+        with self._lock:
+            if application["id"] in self._log:
+                raise DuplicateId(f"Application {application['id']} already exists")
+            self._log.put(application["id"], application)
+            self._track(application)
         return application
 
     def get_application(self, app_id: str) -> Optional[Dict[str, Any]]:
-        data = self._read_db()
-        for app in data:
-            if app.get("id") == app_id:
-                return app
-        return None
+        return self._log.get(app_id)
 
     def get_all_applications(self, status: Optional[str] = None) -> List[Dict[str, Any]]:
-        data = self._read_db()
+        data = self._log.values()
         if status:
             return [app for app in data if app.get("status") == status]
         return data
 
-    def update_application(self, app_id: str, updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        data = self._read_db()
-        for i, app in enumerate(data):
-            if app.get("id") == app_id:
-                data[i].update(updates)
-                self._write_db(data)
-                return data[i]
-        return None
+    def query_applications(
+        self,
+        statuses: Optional[List[str]] = None,
+        exclude_statuses: Optional[List[str]] = None,
+        domain: Optional[str] = None,
+        before: Optional[Tuple[str, str]] = None,
+        limit: Optional[int] = None,
+        fields: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Filtered applications, newest first.
+
+        ``before`` is an exclusive (timestamp, id) keyset cursor. Filtering and
+        ordering run on the in-memory metadata, so only the returned page is
+        read from the log.
+        """
+        with self._lock:
+            self._ensure_meta()
+            end = bisect.bisect_left(self._keys, before) if before else len(self._keys)
+            page_ids: List[str] = []
+            for i in range(end - 1, -1, -1):
+                app_id = self._keys[i][1]
+                _, status, app_domain = self._meta[app_id]
+                if statuses is not None and status not in statuses:
+                    continue
+                if exclude_statuses is not None and status in exclude_statuses:
+                    continue
+                if domain and app_domain != domain:
+                    continue
+                page_ids.append(app_id)
+                if limit is not None and len(page_ids) >= limit:
+                    break
+            apps = [self._log.get(app_id) for app_id in page_ids]
+        if fields:
+            apps = [project_fields(app, fields) for app in apps]
+        return apps
+
+    def update_application(
+        self,
+        app_id: str,
+        updates: Dict[str, Any],
+        expected: Optional[Dict[str, Any]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Merge ``updates`` into the record in one append. With ``expected`` this
+        is a compare-and-set: raises WriteConflict unless every expected field
+        still has that value.
+        """
+        with self._lock:
+            app = self._log.get(app_id)
+            if app is None:
+                return None
+            if expected and not _matches(app, expected):
+                raise WriteConflict(f"Application {app_id} changed concurrently")
+            app.update(updates)
+            self._log.put(app_id, app)
+            self._track(app)
+        return app
+
+    @contextmanager
+    def transaction(self, app_id: str) -> Iterator[Optional[Dict[str, Any]]]:
+        """
+        Read-modify-write one application under the DB lock.
+
+        Yields the current record (or None if missing); mutations are written
+        in a single fsync'd append when the block exits cleanly and discarded
+        if it raises. The block holds a thread lock, so it must not ``await``.
+        """
+        with self._lock:
+            app = self._log.get(app_id)
+            yield app
+            if app is not None:
+                self._log.put(app_id, app, sync=True)
+                self._track(app)
+
+
+class SQLiteDB:
+    """
+    SimpleDB interface on SQLite in WAL mode.
+
+    ``status``, ``domain`` and ``timestamp`` are real indexed columns, so list
+    filters and ordering run as index scans. ``data`` and ``ai_result`` are
+    stored as JSON text; any other top-level fields go to ``extra``.
+    """
+
+    COLUMNS = ("id", "domain", "status", "timestamp")
+    JSON_COLUMNS = ("data", "ai_result")
+
+    def __init__(self, db_file: str = SQLITE_FILE, legacy_file: Optional[str] = DB_FILE):
+        self.db_file = db_file
+        is_new = not os.path.exists(db_file)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_file, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_schema()
+        if is_new and legacy_file:
+            self.migrate_from_json(legacy_file)
+
+    def _create_schema(self):
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS applications (
+                id TEXT PRIMARY KEY,
+                domain TEXT,
+                status TEXT,
+                timestamp TEXT,
+                data TEXT,
+                ai_result TEXT,
+                extra TEXT NOT NULL DEFAULT '{}'
+            );
+            CREATE INDEX IF NOT EXISTS idx_applications_timestamp ON applications(timestamp, id);
+            CREATE INDEX IF NOT EXISTS idx_applications_status ON applications(status, timestamp, id);
+            CREATE INDEX IF NOT EXISTS idx_applications_domain ON applications(domain, timestamp, id);
+        """)
+
+    def migrate_from_json(self, json_file: str) -> int:
+        """
+        One-shot import of existing applications. Reads the append log next to
+        ``json_file`` if one exists, otherwise the legacy JSON array itself.
+        """
+        log_file = os.path.splitext(json_file)[0] + LOG_SUFFIX
+        if os.path.exists(log_file):
+            log = AppendLog(log_file)
+            records = log.values()
+            log.close()
+        elif os.path.exists(json_file):
+            try:
+                with open(json_file, "r") as f:
+                    records = json.load(f)
+            except json.JSONDecodeError:
+                return 0
+        else:
+            return 0
+
+        records = [app for app in records if isinstance(app, dict) and "id" in app]
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                for app in records:
+                    self._upsert(app)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+        print(f"DEBUG: Migrated {len(records)} applications from {json_file} to {self.db_file}")
+        return len(records)
+
+    # -------------------------------------------------
+    # Row <-> record mapping
+    # -------------------------------------------------
+    def _to_row(self, app: Dict[str, Any]) -> Tuple[Any, ...]:
+        extra = {k: v for k, v in app.items() if k not in self.COLUMNS and k not in self.JSON_COLUMNS}
+        return (
+            app["id"],
+            app.get("domain"),
+            app.get("status"),
+            app.get("timestamp"),
+            json.dumps(app["data"]) if "data" in app else None,
+            json.dumps(app["ai_result"]) if "ai_result" in app else None,
+            json.dumps(extra)
+        )
+
+    def _from_row(self, row: sqlite3.Row) -> Dict[str, Any]:
+        # Rows may come from a projected SELECT, so only decode what is there
+        names = row.keys()
+        app: Dict[str, Any] = {}
+        for column in self.COLUMNS:
+            if column in names and row[column] is not None:
+                app[column] = row[column]
+        for column in self.JSON_COLUMNS:
+            if column in names and row[column] is not None:
+                app[column] = json.loads(row[column])
+        if "extra" in names:
+            app.update(json.loads(row["extra"]))
+        return app
+
+    def _columns_for(self, fields: List[str]) -> str:
+        """Smallest column list that can satisfy a field projection."""
+        wanted = {"id", "timestamp"}
+        for field in fields:
+            top = field.split(".", 1)[0]
+            wanted.add(top if top in self.COLUMNS or top in self.JSON_COLUMNS else "extra")
+        return ", ".join(c for c in self.COLUMNS + self.JSON_COLUMNS + ("extra",) if c in wanted)
+
+    def _upsert(self, app: Dict[str, Any]):
+        # ON CONFLICT keeps the original rowid, so insertion order is stable
+        self._conn.execute("""
+            INSERT INTO applications (id, domain, status, timestamp, data, ai_result, extra)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET
+                domain = excluded.domain,
+                status = excluded.status,
+                timestamp = excluded.timestamp,
+                data = excluded.data,
+                ai_result = excluded.ai_result,
+                extra = excluded.extra
+        """, self._to_row(app))
+
+    def _select(
+        self,
+        where: str = "",
+        params: Tuple[Any, ...] = (),
+        order: str = "rowid",
+        columns: str = "*"
+    ) -> List[Dict[str, Any]]:
+        sql = f"SELECT {columns} FROM applications"
+        if where:
+            sql += f" WHERE {where}"
+        sql += f" ORDER BY {order}"
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [self._from_row(row) for row in rows]
+
+    # -------------------------------------------------
+    # SimpleDB interface
+    # -------------------------------------------------
+    def _read_db(self) -> List[Dict[str, Any]]:
+        return self._select()
+
+    def _write_db(self, data: List[Dict[str, Any]]):
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute("DELETE FROM applications")
+                for app in data:
+                    self._upsert(app)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def save_application(self, application: Dict[str, Any]) -> Dict[str, Any]:
+        """Store a new application. Raises DuplicateId rather than overwrite an existing one."""
+        _prepare_new(application)
+        with self._lock:
+            try:
+                self._conn.execute("""
+                    INSERT INTO applications (id, domain, status, timestamp, data, ai_result, extra)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, self._to_row(application))
+            except sqlite3.IntegrityError:
+                raise DuplicateId(f"Application {application['id']} already exists")
+        return application
+
+    def get_application(self, app_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM applications WHERE id = ?", (app_id,)).fetchone()
+        return self._from_row(row) if row else None
+
+    def get_all_applications(self, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        if status:
+            return self._select("status = ?", (status,))
+        return self._select()
+
+    def query_applications(
+        self,
+        statuses: Optional[List[str]] = None,
+        exclude_statuses: Optional[List[str]] = None,
+        domain: Optional[str] = None,
+        before: Optional[Tuple[str, str]] = None,
+        limit: Optional[int] = None,
+        fields: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Filtered applications, newest first, optionally from a (timestamp, id) cursor."""
+        clauses: List[str] = []
+        params: List[Any] = []
+        if statuses is not None:
+            clauses.append(f"status IN ({','.join('?' * len(statuses))})")
+            params.extend(statuses)
+        if exclude_statuses is not None:
+            clauses.append(f"(status IS NULL OR status NOT IN ({','.join('?' * len(exclude_statuses))}))")
+            params.extend(exclude_statuses)
+        if domain:
+            clauses.append("domain = ?")
+            params.append(domain)
+        if before:
+            clauses.append("(timestamp, id) < (?, ?)")
+            params.extend(before)
+        order = "timestamp DESC, id DESC"
+        if limit is not None:
+            order += f" LIMIT {int(limit)}"
+        columns = self._columns_for(fields) if fields else "*"
+        apps = self._select(" AND ".join(clauses), tuple(params), order=order, columns=columns)
+        if fields:
+            apps = [project_fields(app, fields) for app in apps]
+        return apps
+
+    def update_application(
+        self,
+        app_id: str,
+        updates: Dict[str, Any],
+        expected: Optional[Dict[str, Any]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Merge ``updates``; with ``expected``, compare-and-set (see SimpleDB)."""
+        with self.transaction(app_id) as app:
+            if app is None:
+                return None
+            if expected and not _matches(app, expected):
+                raise WriteConflict(f"Application {app_id} changed concurrently")
+            app.update(updates)
+        return app
+
+    @contextmanager
+    def transaction(self, app_id: str) -> Iterator[Optional[Dict[str, Any]]]:
+        """Read-modify-write one application inside BEGIN IMMEDIATE (see SimpleDB)."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                app = self.get_application(app_id)
+                yield app
+                if app is not None:
+                    self._upsert(app)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# =====================================================
+# LIST HELPERS (pagination + projection)
+# =====================================================
+# Statuses behind the "pending" list filter; "history" is everything else
+PENDING_STATUSES = ["pending_human", "pending_ai"]
+# GET /applications page size when the client sends no limit, and the most it may ask for
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def status_filters(status: Optional[str]) -> Dict[str, Any]:
+    """query_applications filters for a list ``status``: "pending", "history" or a single status."""
+    if status == "pending":
+        return {"statuses": PENDING_STATUSES}
+    if status == "history":
+        return {"exclude_statuses": PENDING_STATUSES}
+    if status:
+        return {"statuses": [status]}
+    return {}
+
+def encode_cursor(app: Dict[str, Any]) -> str:
+    raw = json.dumps([app.get("timestamp") or "", app["id"]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    try:
+        timestamp, app_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return str(timestamp), str(app_id)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+
+def project_fields(app: Dict[str, Any], fields: List[str]) -> Dict[str, Any]:
+    """
+    Keep only the requested fields. Dotted paths (``ai_result.decision.status``)
+    select nested values; ``id`` and ``timestamp`` are always kept for cursors.
+    """
+    projected: Dict[str, Any] = {"id": app.get("id"), "timestamp": app.get("timestamp")}
+    for field in fields:
+        parts = field.split(".")
+        value: Any = app
+        for part in parts:
+            if not isinstance(value, dict) or part not in value:
+                break
+            value = value[part]
+        else:
+            target = projected
+            for part in parts[:-1]:
+                target = target.setdefault(part, {})
+            target[parts[-1]] = value
+    return projected
+
+
+def list_page(
+    db,
+    limit: int,
+    cursor: Optional[str] = None,
+    fields: Optional[List[str]] = None,
+    **filters
+) -> Dict[str, Any]:
+    """One page of ``db.query_applications`` plus the cursor for the next one."""
+    before = decode_cursor(cursor) if cursor else None
+    apps = db.query_applications(before=before, limit=limit + 1, fields=fields, **filters)
+    next_cursor = encode_cursor(apps[limit - 1]) if len(apps) > limit else None
+    return {"items": apps[:limit], "next_cursor": next_cursor}
+
+
+_open_dbs: Dict[str, Any] = {}
+_open_dbs_lock = threading.Lock()
+
+
+def open_db(backend: str = DB_BACKEND):
+    """
+    Return the configured SimpleDB implementation, shared process-wide.
+
+    Every module must use this one handle: two AppendLogs on the same file
+    keep separate offset indexes, and a compaction through one invalidates
+    the other's.
+    """
+    with _open_dbs_lock:
+        if backend not in _open_dbs:
+            if backend == "sqlite":
+                _open_dbs[backend] = SQLiteDB()
+            elif backend == "log":
+                _open_dbs[backend] = SimpleDB()
+            else:
+                raise ValueError(f"Unknown database backend: {backend}")
+        return _open_dbs[backend]
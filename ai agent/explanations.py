@@ -0,0 +1,346 @@
+import gzip
+import json
+import os
+import re
+import threading
+import uuid
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timezone
+from typing import Dict, Any, Iterator, List, Optional
+
+EXPLANATIONS_DIR = "../data/explanations"
+LEGACY_FILE = "../data/explanations.json"  # Pre-segment store, imported once
+
+SEGMENT_MAX_BYTES = 16 * 1024 * 1024
+COMPRESS_SEALED = True
+# How many matching entries a query reads from one segment at a time
+READ_BATCH = 500
+
+SEGMENT_PATTERN = re.compile(r"^explanations-(\d{6})\.jsonl(\.gz)?$")
+
+
+def _epoch(timestamp: str) -> float:
+    try:
+        return datetime.fromisoformat(timestamp).timestamp()
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class ExplanationStore:
+    """
+    Append-only explanation log split into numbered JSONL segments.
+
+    Each ``add_explanation`` appends one line to the active segment. Once
+    it grows past ``segment_max_bytes`` the segment is sealed (gzipped in a
+    background thread when ``compress`` is on) together with a sidecar
+    index, and a new one is started. Nothing is ever rewritten or dropped.
+
+    An in-memory columnar index (time, type, status, segment, offset) lets
+    ``query`` find matches without scanning the files; only the matching
+    lines are read back.
+    """
+
+    def __init__(
+        self,
+        directory: str = EXPLANATIONS_DIR,
+        legacy_file: Optional[str] = LEGACY_FILE,
+        segment_max_bytes: int = SEGMENT_MAX_BYTES,
+        compress: bool = COMPRESS_SEALED
+    ):
+        self.directory = directory
+        self.segment_max_bytes = segment_max_bytes
+        self.compress = compress
+
+        # Index columns, one slot per entry in append order
+        self._ts = array("d")
+        self._type = array("B")
+        self._status = array("B")
+        self._segment = array("I")
+        self._offset = array("Q")
+        self._codes: Dict[str, Dict[str, int]] = {"type": {}, "status": {}}
+        self._by_type: Dict[int, array] = {}
+
+        self._lock = threading.Lock()
+        self._active: Optional[int] = None
+        self._handle = None
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._load()
+        if self._active is None:
+            self._active = 1
+            if legacy_file and os.path.exists(legacy_file):
+                self._import_legacy(legacy_file)
+
+    # -------------------------------------------------
+    # Segments
+    # -------------------------------------------------
+    def _path(self, segment: int, sealed: bool = False) -> str:
+        suffix = ".jsonl.gz" if sealed else ".jsonl"
+        return os.path.join(self.directory, f"explanations-{segment:06d}{suffix}")
+
+    def _index_path(self, segment: int) -> str:
+        return os.path.join(self.directory, f"explanations-{segment:06d}.idx.json")
+
+    def _open_segment(self, segment: int):
+        """Readable binary handle for a segment, whichever form it is in."""
+        gz_path = self._path(segment, sealed=True)
+        if os.path.exists(gz_path):
+            return gzip.open(gz_path, "rb")
+        return open(self._path(segment), "rb")
+
+    def _segments_on_disk(self) -> List[int]:
+        found = set()
+        for name in os.listdir(self.directory):
+            match = SEGMENT_PATTERN.match(name)
+            if match:
+                found.add(int(match.group(1)))
+        return sorted(found)
+
+    def _load(self):
+        segments = self._segments_on_disk()
+        for segment in segments:
+            if segment != segments[-1] and self._load_sidecar(segment):
+                continue
+            valid_bytes = self._scan(segment)
+            plain = self._path(segment)
+            if segment == segments[-1] and not os.path.exists(self._path(segment, sealed=True)):
+                # Drop a line torn by a crash so the next append starts cleanly
+                if os.path.getsize(plain) > valid_bytes:
+                    os.truncate(plain, valid_bytes)
+        if segments:
+            last = segments[-1]
+            if os.path.exists(self._path(last, sealed=True)):
+                self._active = last + 1
+            else:
+                self._active = last
+        if not self.compress:
+            return
+        # Finish a compression interrupted by a restart
+        for segment in segments:
+            plain = self._path(segment)
+            if segment == self._active or not os.path.exists(plain):
+                continue
+            if os.path.exists(self._path(segment, sealed=True)):
+                os.remove(plain)
+            else:
+                self._seal(segment)
+
+    def _load_sidecar(self, segment: int) -> bool:
+        try:
+            with open(self._index_path(segment), "r") as f:
+                sidecar = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return False
+        for ts, type_, status, offset in zip(
+            sidecar["ts"], sidecar["type"], sidecar["status"], sidecar["offset"]
+        ):
+            self._index_row(ts, type_, status, segment, offset)
+        return True
+
+    def _scan(self, segment: int) -> int:
+        """Index every complete line; returns the byte length they cover."""
+        offset = 0
+        with self._open_segment(segment) as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    self._index_entry(json.loads(line), segment, offset)
+                except json.JSONDecodeError:
+                    pass
+                offset += len(line)
+        return offset
+
+    def _import_legacy(self, legacy_file: str):
+        try:
+            with open(legacy_file, "r") as f:
+                legacy = json.load(f).get("explanations", [])
+        except (OSError, json.JSONDecodeError):
+            return
+        # The old store kept newest first
+        for entry in reversed(legacy):
+            self._append(entry)
+        if legacy:
+            print(f"DEBUG: Imported {len(legacy)} explanations from {legacy_file}")
+
+    def _seal(self, segment: int):
+        """Write the segment's sidecar index and compress it."""
+        # Segment numbers only grow, so a segment's rows are contiguous
+        rows = range(bisect_left(self._segment, segment), bisect_right(self._segment, segment))
+        type_names = {code: name for name, code in self._codes["type"].items()}
+        status_names = {code: name for name, code in self._codes["status"].items()}
+        sidecar = {
+            "ts": [self._ts[i] for i in rows],
+            "type": [type_names[self._type[i]] for i in rows],
+            "status": [status_names[self._status[i]] for i in rows],
+            "offset": [self._offset[i] for i in rows],
+        }
+        tmp_path = f"{self._index_path(segment)}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(sidecar, f)
+        os.replace(tmp_path, self._index_path(segment))
+
+        if not self.compress:
+            return
+        plain = self._path(segment)
+        gz_path = self._path(segment, sealed=True)
+        with open(plain, "rb") as src, gzip.open(f"{gz_path}.tmp", "wb") as dst:
+            while True:
+                chunk = src.read(1024 * 1024)
+                if not chunk:
+                    break
+                dst.write(chunk)
+        os.replace(f"{gz_path}.tmp", gz_path)
+        try:
+            os.remove(plain)
+        except OSError:
+            # Still open by a reader (Windows); removed on the next seal pass
+            pass
+
+    def _rotate(self):
+        self._handle.close()
+        self._handle = None
+        sealed = self._active
+        self._active += 1
+        threading.Thread(target=self._seal, args=(sealed,), daemon=True).start()
+
+    # -------------------------------------------------
+    # Index
+    # -------------------------------------------------
+    def _code(self, column: str, value: str) -> int:
+        codes = self._codes[column]
+        if value not in codes:
+            codes[value] = len(codes)
+        return codes[value]
+
+    def _index_row(self, ts: float, type_: str, status: str, segment: int, offset: int):
+        type_code = self._code("type", type_)
+        self._ts.append(ts)
+        self._type.append(type_code)
+        self._status.append(self._code("status", status))
+        self._segment.append(segment)
+        self._offset.append(offset)
+        self._by_type.setdefault(type_code, array("Q")).append(len(self._ts) - 1)
+
+    def _index_entry(self, entry: Dict[str, Any], segment: int, offset: int):
+        status = (entry.get("decision") or {}).get("status", "")
+        self._index_row(
+            _epoch(entry.get("timestamp", "")),
+            entry.get("type", ""),
+            str(status).upper(),
+            segment,
+            offset,
+        )
+
+    # -------------------------------------------------
+    # Writes
+    # -------------------------------------------------
+    def _append(self, entry: Dict[str, Any]):
+        line = (json.dumps(entry, default=str) + "\n").encode("utf-8")
+        with self._lock:
+            if self._handle is None:
+                self._handle = open(self._path(self._active), "ab")
+            offset = self._handle.tell()
+            self._handle.write(line)
+            # Readers in other threads must see whole lines
+            self._handle.flush()
+            self._index_entry(entry, self._active, offset)
+            if offset + len(line) >= self.segment_max_bytes:
+                self._rotate()
+
+    def add_explanation(self, decision_type: str, applicant: Dict[str, Any], ai_output: Dict[str, Any]) -> Dict[str, Any]:
+        entry = {
+            "id": str(uuid.uuid4())[:8],
+            "type": decision_type,
+            "applicant": applicant,
+            "decision": ai_output.get("decision", {}),
+            "counterfactuals": ai_output.get("counterfactuals", []),
+            "fairness": ai_output.get("fairness", {}),
+            "key_metrics": ai_output.get("key_metrics", {}),
+            "timestamp": datetime.now(timezone.utc).isoformat()
+        }
+        self._append(entry)
+        return entry
+
+    def close(self):
+        with self._lock:
+            if self._handle is not None:
+                self._handle.close()
+                self._handle = None
+
+    # -------------------------------------------------
+    # Queries
+    # -------------------------------------------------
+    def count(self) -> int:
+        return len(self._ts)
+
+    def _matches(
+        self,
+        decision_type: Optional[str],
+        status: Optional[str],
+        since: Optional[datetime],
+        until: Optional[datetime],
+    ) -> Iterator[int]:
+        """Matching index positions, newest first."""
+        total = len(self._ts)
+        # Entries are appended in time order, so the window is a slice
+        start = bisect_left(self._ts, since.timestamp(), 0, total) if since else 0
+        stop = bisect_right(self._ts, until.timestamp(), 0, total) if until else total
+
+        if decision_type is not None:
+            type_code = self._codes["type"].get(decision_type)
+            positions = self._by_type.get(type_code, array("Q"))
+            lo = bisect_left(positions, start)
+            hi = bisect_left(positions, stop)
+            candidates = (positions[i] for i in range(hi - 1, lo - 1, -1))
+        else:
+            candidates = iter(range(stop - 1, start - 1, -1))
+
+        status_code = None
+        if status is not None:
+            status_code = self._codes["status"].get(status.upper(), -1)
+        for position in candidates:
+            if status_code is None or self._status[position] == status_code:
+                yield position
+
+    def _read(self, positions: List[int]) -> Iterator[Dict[str, Any]]:
+        """Entries at ``positions`` (all in one segment), in the given order."""
+        segment = self._segment[positions[0]]
+        offsets = sorted(self._offset[p] for p in positions)
+        lines: Dict[int, bytes] = {}
+        with self._open_segment(segment) as f:
+            for offset in offsets:
+                f.seek(offset)
+                lines[offset] = f.readline()
+        for p in positions:
+            yield json.loads(lines[self._offset[p]])
+
+    def query(
+        self,
+        decision_type: Optional[str] = None,
+        status: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """Stream matching explanations, newest first."""
+        batch: List[int] = []
+        returned = 0
+        for position in self._matches(decision_type, status, since, until):
+            if limit is not None and returned >= limit:
+                break
+            if batch and (self._segment[position] != self._segment[batch[0]] or len(batch) >= READ_BATCH):
+                yield from self._read(batch)
+                batch = []
+            batch.append(position)
+            returned += 1
+        if batch:
+            yield from self._read(batch)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "entries": self.count(),
+            "active_segment": self._active,
+            "types": {name: len(self._by_type.get(code, ())) for name, code in self._codes["type"].items()},
+        }
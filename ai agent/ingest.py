@@ -0,0 +1,178 @@
+import io
+import json
+import os
+from typing import Dict, Any, BinaryIO, Iterator, List
+
+import pandas as pd
+
+CHUNK_ROWS = 1000  # Records parsed per step
+READ_BLOCK = 1 << 20  # Bytes read per step when scanning JSON arrays
+
+STREAMED_TYPES = ("csv", "jsonl", "ndjson", "json")
+
+
+class IngestError(ValueError):
+    """The upload is not a readable batch of records."""
+
+
+def file_kind(filename: str) -> str:
+    return filename.lower().rsplit(".", 1)[-1] if "." in filename else ""
+
+
+def file_size(fileobj: BinaryIO) -> int:
+    position = fileobj.tell()
+    fileobj.seek(0, os.SEEK_END)
+    size = fileobj.tell()
+    fileobj.seek(position)
+    return size
+
+
+def clean_record(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Drop empty cells (NaN is not valid JSON) and unwrap numpy scalars."""
+    cleaned = {}
+    for key, value in row.items():
+        if value is None or (not isinstance(value, (list, dict)) and pd.isna(value)):
+            continue
+        cleaned[str(key)] = value.item() if hasattr(value, "item") else value
+    return cleaned
+
+
+def _csv_chunks(fileobj: BinaryIO, chunk_rows: int) -> Iterator[List[Dict[str, Any]]]:
+    try:
+        reader = pd.read_csv(fileobj, chunksize=chunk_rows)
+        for frame in reader:
+            yield [clean_record(row) for row in frame.to_dict(orient="records")]
+    except (pd.errors.ParserError, pd.errors.EmptyDataError, UnicodeDecodeError) as e:
+        raise IngestError(f"Invalid CSV: {e}")
+
+
+def _jsonl_chunks(fileobj: BinaryIO, chunk_rows: int) -> Iterator[List[Dict[str, Any]]]:
+    chunk = []
+    text = io.TextIOWrapper(fileobj, encoding="utf-8", newline="")
+    try:
+        for line_no, line in enumerate(text, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise IngestError(f"Invalid JSON on line {line_no}: {e.msg}")
+            if not isinstance(record, dict):
+                raise IngestError(f"Line {line_no} is not a JSON object")
+            chunk.append(record)
+            if len(chunk) >= chunk_rows:
+                yield chunk
+                chunk = []
+    except UnicodeDecodeError as e:
+        raise IngestError(f"File is not UTF-8: {e}")
+    finally:
+        text.detach()  # Leave the upload's file open for its owner
+    if chunk:
+        yield chunk
+
+
+def _json_chunks(fileobj: BinaryIO, chunk_rows: int) -> Iterator[List[Dict[str, Any]]]:
+    """
+    A JSON array of objects (or a single object), decoded one element at a
+    time with raw_decode so only the current element and one read block
+    are held in memory.
+    """
+    decoder = json.JSONDecoder()
+    text = io.TextIOWrapper(fileobj, encoding="utf-8")
+    buffer, pos, eof = "", 0, False
+
+    def fill() -> bool:
+        nonlocal buffer, pos, eof
+        block = text.read(READ_BLOCK)
+        if not block:
+            eof = True
+            return False
+        buffer, pos = buffer[pos:] + block, 0
+        return True
+
+    def skip_space():
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos].isspace():
+                pos += 1
+            if pos < len(buffer) or not fill():
+                return
+
+    def decode() -> Any:
+        nonlocal pos
+        while True:
+            try:
+                value, pos = decoder.raw_decode(buffer, pos)
+                return value
+            except json.JSONDecodeError as e:
+                # A value cut by the block boundary parses once more is read
+                if eof or not fill():
+                    raise IngestError(f"Invalid JSON: {e.msg}")
+
+    try:
+        skip_space()
+        if pos >= len(buffer):
+            return
+        if buffer[pos] != "[":
+            value = decode()
+            if not isinstance(value, dict):
+                raise IngestError("JSON must be a list or object")
+            yield [value]
+            return
+
+        pos += 1
+        chunk, index = [], 0
+        skip_space()
+        if pos < len(buffer) and buffer[pos] == "]":
+            return
+        while True:
+            skip_space()
+            value = decode()
+            if not isinstance(value, dict):
+                raise IngestError(f"Array element {index} is not a JSON object")
+            chunk.append(value)
+            index += 1
+            if len(chunk) >= chunk_rows:
+                yield chunk
+                chunk = []
+            skip_space()
+            if pos >= len(buffer):
+                raise IngestError("Invalid JSON: unterminated array")
+            separator = buffer[pos]
+            pos += 1
+            if separator == "]":
+                break
+            if separator != ",":
+                raise IngestError(f"Invalid JSON: expected ',' or ']' but found {separator!r}")
+        if chunk:
+            yield chunk
+    except UnicodeDecodeError as e:
+        raise IngestError(f"File is not UTF-8: {e}")
+    finally:
+        text.detach()
+
+
+def iter_record_chunks(
+    fileobj: BinaryIO,
+    kind: str,
+    chunk_rows: int = CHUNK_ROWS
+) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Parse an uploaded CSV, JSONL/NDJSON or JSON file (``kind`` is the
+    extension) incrementally, yielding lists of up to ``chunk_rows``
+    records. Memory stays proportional to one chunk however large the
+    file is.
+    """
+    fileobj.seek(0)
+    if kind == "csv":
+        return _csv_chunks(fileobj, chunk_rows)
+    if kind in ("jsonl", "ndjson"):
+        return _jsonl_chunks(fileobj, chunk_rows)
+    if kind == "json":
+        return _json_chunks(fileobj, chunk_rows)
+    raise IngestError(f"Unsupported file type .{kind}; use .csv, .jsonl or .json")
+
+
+def iter_records(fileobj: BinaryIO, kind: str, chunk_rows: int = CHUNK_ROWS) -> Iterator[Dict[str, Any]]:
+    for chunk in iter_record_chunks(fileobj, kind, chunk_rows):
+        yield from chunk
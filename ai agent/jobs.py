@@ -0,0 +1,270 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Dict, Any, Awaitable, Callable, List, Optional
+
+JOBS_FILE = "../data/jobs.sqlite3"
+
+MAX_ATTEMPTS = 5
+RETRY_BASE_SECONDS = 2.0
+RETRY_MAX_SECONDS = 300.0
+# How often idle workers look for delayed retries
+POLL_INTERVAL = 1.0
+# Longest pause of a worker whose queue calls keep failing (e.g. "database is locked")
+WORKER_BACKOFF_MAX = 30.0
+
+
+class RetryJob(Exception):
+    """Raised by a handler for a failure worth another attempt."""
+
+
+class JobQueue:
+    """
+    Durable FIFO of jobs in SQLite (WAL mode).
+
+    A job is ``queued`` until a worker claims it (``running``), then ends
+    ``done`` or, after ``max_attempts`` failures, ``failed``. Failed
+    attempts are re-queued with exponential backoff via ``run_after``.
+    Jobs left ``running`` by a crash are re-queued on startup.
+    """
+
+    def __init__(
+        self,
+        db_file: str = JOBS_FILE,
+        max_attempts: int = MAX_ATTEMPTS,
+        retry_base: float = RETRY_BASE_SECONDS,
+        retry_max: float = RETRY_MAX_SECONDS
+    ):
+        self.db_file = db_file
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_file, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                run_after REAL NOT NULL,
+                last_error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_jobs_ready ON jobs(status, run_after);
+        """)
+        self.recover()
+
+    def recover(self) -> int:
+        """Re-queue jobs a previous process was running when it stopped."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = 'queued', updated_at = ? WHERE status = 'running'",
+                (time.time(),)
+            )
+        if cursor.rowcount:
+            print(f"DEBUG: Re-queued {cursor.rowcount} interrupted jobs")
+        return cursor.rowcount
+
+    def enqueue(self, kind: str, payload: Dict[str, Any], job_id: Optional[str] = None) -> str:
+        job_id = job_id or uuid.uuid4().hex[:12]
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, kind, payload, status, run_after, created_at, updated_at) "
+                "VALUES (?, ?, ?, 'queued', ?, ?, ?)",
+                (job_id, kind, json.dumps(payload, default=str), now, now, now)
+            )
+        return job_id
+
+    def enqueue_many(self, kind: str, payloads: List[Dict[str, Any]]) -> List[str]:
+        """Enqueue several jobs in one transaction (one fsync for a whole upload chunk)."""
+        now = time.time()
+        rows = [
+            (uuid.uuid4().hex[:12], kind, json.dumps(payload, default=str), now, now, now)
+            for payload in payloads
+        ]
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "INSERT INTO jobs (id, kind, payload, status, run_after, created_at, updated_at) "
+                    "VALUES (?, ?, ?, 'queued', ?, ?, ?)",
+                    rows
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return [row[0] for row in rows]
+
+    def claim(self) -> Optional[Dict[str, Any]]:
+        """Atomically take the oldest ready job, or None."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT * FROM jobs WHERE status = 'queued' AND run_after <= ? "
+                    "ORDER BY run_after LIMIT 1",
+                    (now,)
+                ).fetchone()
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    return None
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'running', attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                    (now, row["id"])
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["attempts"] += 1
+        job["final_attempt"] = job["attempts"] >= self.max_attempts
+        return job
+
+    def complete(self, job_id: str):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'done', last_error = NULL, updated_at = ? WHERE id = ?",
+                (time.time(), job_id)
+            )
+
+    def fail(self, job: Dict[str, Any], error: str):
+        """Schedule a retry with exponential backoff, or mark the job failed."""
+        now = time.time()
+        if job["attempts"] >= self.max_attempts:
+            status, run_after = "failed", now
+        else:
+            delay = min(self.retry_base * 2 ** (job["attempts"] - 1), self.retry_max)
+            status, run_after = "queued", now + delay
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, run_after = ?, last_error = ?, updated_at = ? WHERE id = ?",
+                (status, run_after, error[:1000], now, job["id"])
+            )
+
+    def next_run_after(self) -> Optional[float]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MIN(run_after) FROM jobs WHERE status = 'queued'"
+            ).fetchone()
+        return row[0]
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        return job
+
+    def active_payloads(self, kind: str) -> List[Dict[str, Any]]:
+        """Payloads of ``kind`` jobs still queued or running."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT payload FROM jobs WHERE kind = ? AND status IN ('queued', 'running')",
+                (kind,)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+
+Handler = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class JobWorkers:
+    """
+    Pool of asyncio workers draining a JobQueue. ``handlers`` maps a job
+    kind to a coroutine taking the claimed job; raising marks the attempt
+    failed (and retried), returning marks the job done.
+
+    Queue calls block on SQLite (up to its busy timeout while another
+    process writes), so workers make them in a thread. A worker whose
+    queue call fails logs it and backs off rather than exiting.
+    """
+
+    def __init__(self, queue: JobQueue, handlers: Dict[str, Handler], concurrency: int):
+        self.queue = queue
+        self.handlers = handlers
+        self.concurrency = concurrency
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def notify(self):
+        """Wake idle workers after an enqueue."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def start(self):
+        if self._tasks:
+            return
+        self._wakeup = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        self._tasks = [loop.create_task(self._work()) for _ in range(self.concurrency)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        # A job interrupted here stays 'running' and is re-queued on the next start
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._wakeup = None
+
+    async def _idle(self):
+        next_run = await asyncio.to_thread(self.queue.next_run_after)
+        timeout = POLL_INTERVAL if next_run is None else min(max(next_run - time.time(), 0.0), POLL_INTERVAL)
+        self._wakeup.clear()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _work(self):
+        errors = 0
+        while True:
+            try:
+                await self._run_next()
+                errors = 0
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # A job whose complete/fail was lost stays 'running' until recover()
+                errors += 1
+                delay = min(POLL_INTERVAL * 2 ** (errors - 1), WORKER_BACKOFF_MAX)
+                print(f"WARNING: Job worker error, retrying in {delay:.1f}s: {e}")
+                await asyncio.sleep(delay)
+
+    async def _run_next(self):
+        job = await asyncio.to_thread(self.queue.claim)
+        if job is None:
+            await self._idle()
+            return
+        handler = self.handlers.get(job["kind"])
+        try:
+            if handler is None:
+                raise RuntimeError(f"No handler for job kind {job['kind']}")
+            await handler(job)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"WARNING: Job {job['id']} attempt {job['attempts']} failed: {e}")
+            await asyncio.to_thread(self.queue.fail, job, str(e))
+        else:
+            await asyncio.to_thread(self.queue.complete, job["id"])
@@ -0,0 +1,171 @@
+import json
+from collections import deque
+from typing import Any, Deque, List, Optional, Tuple
+
+# Cut points remembered for repairing a truncated object (latest first)
+MAX_CUT_POINTS = 8
+
+CLOSERS = {"{": "}", "[": "]"}
+
+
+def _apply_edits(text: str, edits: List[Tuple[int, int, str]], limit: Optional[int] = None) -> str:
+    """Apply (offset, delete, insert) edits, given in offset order, up to ``limit``."""
+    out, last = [], 0
+    for offset, delete, insert in edits:
+        if limit is not None and offset >= limit:
+            break
+        out.append(text[last:offset])
+        out.append(insert)
+        last = offset + delete
+    out.append(text[last:limit])
+    return "".join(out)
+
+
+class JSONScanner:
+    """
+    Single-pass extractor for the JSON object in model output.
+
+    Text can be fed in stream chunks. The scanner skips chatter before the
+    first ``{``, tracks nesting with a stack while respecting strings and
+    escapes, and parses a candidate once its braces balance; anything after
+    a parsed object is ignored. While scanning it notes repairs: trailing
+    commas to drop and closers missing before a mismatched one. A
+    candidate that still fails is skipped and scanning continues after it.
+
+    If the text ends inside an object (generation cut off), ``result``
+    closes the open string and containers, falling back to the last few
+    element boundaries until the prefix parses.
+
+    ``result`` returns ``(value, outcome)``. The outcome is ``clean``,
+    ``repaired``, ``truncated``, ``invalid`` (braces found but nothing
+    parsed), ``no_json`` or ``empty``.
+    """
+
+    def __init__(self):
+        self.value: Optional[Any] = None
+        self.outcome: Optional[str] = None
+        self.candidates = 0
+        self._seen_text = False
+        self._reset()
+
+    def _reset(self):
+        self._parts: List[str] = []
+        self._length = 0
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._edits: List[Tuple[int, int, str]] = []
+        self._pending_comma: Optional[int] = None
+        # (offset, open closers) where the candidate can be cut and closed
+        self._cuts: Deque[Tuple[int, Tuple[str, ...]]] = deque(maxlen=MAX_CUT_POINTS)
+
+    def feed(self, text: str) -> bool:
+        """Scan another chunk. True once an object has been parsed."""
+        if self.value is not None:
+            return True
+        if text.strip():
+            self._seen_text = True
+        i, n = 0, len(text)
+        start = 0
+        while i < n:
+            if not self._stack:
+                i = text.find("{", i)
+                if i < 0:
+                    return False
+                start = i
+                self.candidates += 1
+
+            ch = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                else:
+                    # Jump to the next character that can end or escape the string
+                    quote, backslash = text.find('"', i), text.find("\\", i)
+                    nxt = min(p for p in (quote, backslash, n) if p >= 0)
+                    i = nxt
+                    continue
+                i += 1
+                continue
+
+            offset = self._length + i - start
+            if ch == '"':
+                self._in_string = True
+                self._pending_comma = None
+            elif ch in CLOSERS:
+                self._stack.append(CLOSERS[ch])
+                self._pending_comma = None
+                self._cuts.append((offset + 1, tuple(self._stack)))
+            elif ch in "}]":
+                if self._pending_comma is not None:
+                    self._edits.append((self._pending_comma, 1, ""))
+                    self._pending_comma = None
+                if ch not in self._stack:
+                    self._edits.append((offset, 1, ""))  # Stray closer
+                else:
+                    while self._stack[-1] != ch:
+                        self._edits.append((offset, 0, self._stack.pop()))
+                    self._stack.pop()
+                    if not self._stack:
+                        self._parts.append(text[start:i + 1])
+                        if self._complete():
+                            return True
+                        self._reset()
+            elif ch == ",":
+                self._cuts.append((offset, tuple(self._stack)))
+                self._pending_comma = offset
+            elif not ch.isspace():
+                self._pending_comma = None
+            i += 1
+
+        if self._stack:
+            self._parts.append(text[start:])
+            self._length += n - start
+        return False
+
+    def _complete(self) -> bool:
+        text = "".join(self._parts)
+        try:
+            self.value = json.loads(_apply_edits(text, self._edits))
+        except json.JSONDecodeError:
+            return False
+        self.outcome = "repaired" if self._edits else "clean"
+        return True
+
+    def _close_truncated(self) -> bool:
+        text = _apply_edits("".join(self._parts), self._edits)
+        if self._in_string:
+            text = (text[:-1] if self._escape else text) + '"'
+        attempts = [(text, tuple(self._stack))]
+        for offset, stack in reversed(self._cuts):
+            attempts.append((_apply_edits("".join(self._parts), self._edits, offset), stack))
+        for prefix, stack in attempts:
+            try:
+                self.value = json.loads(prefix.rstrip().rstrip(",") + "".join(reversed(stack)))
+            except json.JSONDecodeError:
+                continue
+            self.outcome = "truncated"
+            return True
+        return False
+
+    def result(self) -> Tuple[Optional[Any], str]:
+        if self.value is None and self.outcome is None:
+            if self._stack and self._close_truncated():
+                pass
+            elif not self._seen_text:
+                self.outcome = "empty"
+            elif self.candidates:
+                self.outcome = "invalid"
+            else:
+                self.outcome = "no_json"
+        return self.value, self.outcome
+
+
+def scan_json(text: str) -> Tuple[Optional[Any], str]:
+    scanner = JSONScanner()
+    scanner.feed(text)
+    return scanner.result()
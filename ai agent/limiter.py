@@ -0,0 +1,93 @@
+from typing import Dict, Any, Optional
+
+
+class AIMDLimit:
+    """
+    Additive-increase / multiplicative-decrease concurrency limit driven by
+    latency and errors.
+
+    Each completed call reports its latency (ideally per generated token,
+    so long and short answers compare). Two moving averages are kept: a
+    fast one for current conditions and a slow baseline. Once per window
+    (``limit`` completions):
+
+    - any error, or current latency above ``tolerance`` x baseline, cuts
+      the limit multiplicatively;
+    - otherwise, if callers were actually queueing for slots, the limit
+      grows by one.
+
+    On a model server that serializes requests, extra parallelism only
+    stretches latency, so the limit settles near 1. Where parallel
+    requests run in real batches, latency stays flat and the limit climbs
+    until it stops paying off.
+    """
+
+    def __init__(
+        self,
+        initial: float,
+        min_limit: int = 1,
+        max_limit: int = 16,
+        backoff: float = 0.5,
+        tolerance: float = 1.5,
+        fast_smoothing: float = 0.3,
+        slow_smoothing: float = 0.05
+    ):
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.tolerance = tolerance
+        self.fast_smoothing = fast_smoothing
+        self.slow_smoothing = slow_smoothing
+        self.latency: Optional[float] = None
+        self.baseline: Optional[float] = None
+        self._window = 0
+        self._window_errors = 0
+        self._window_saturated = False
+        self.stats = {"samples": 0, "errors": 0, "increases": 0, "decreases": 0}
+
+    def _ewma(self, current: Optional[float], sample: float, alpha: float) -> float:
+        return sample if current is None else current + alpha * (sample - current)
+
+    def record(self, latency: Optional[float], ok: bool, saturated: bool):
+        """Feed one completed call. ``saturated`` means others were waiting for a slot."""
+        self.stats["samples"] += 1
+        if ok and latency is not None:
+            self.latency = self._ewma(self.latency, latency, self.fast_smoothing)
+            # The baseline follows improvements at once and degradations slowly
+            if self.baseline is None or latency < self.baseline:
+                self.baseline = self._ewma(self.baseline, latency, self.fast_smoothing)
+            else:
+                self.baseline = self._ewma(self.baseline, latency, self.slow_smoothing)
+        if not ok:
+            self.stats["errors"] += 1
+            self._window_errors += 1
+        self._window_saturated = self._window_saturated or saturated
+        self._window += 1
+        if self._window >= int(self.limit):
+            self._adjust()
+
+    def _adjust(self):
+        congested = (
+            self.latency is not None and self.baseline is not None
+            and self.latency > self.tolerance * self.baseline
+        )
+        if self._window_errors or congested:
+            new_limit = max(self.min_limit, self.limit * self.backoff)
+            if int(new_limit) < int(self.limit):
+                self.stats["decreases"] += 1
+            self.limit = new_limit
+        elif self._window_saturated and self.limit < self.max_limit:
+            self.limit = min(self.max_limit, int(self.limit) + 1)
+            self.stats["increases"] += 1
+        self._window = 0
+        self._window_errors = 0
+        self._window_saturated = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "limit": int(self.limit),
+            "latency": round(self.latency, 4) if self.latency is not None else None,
+            "baseline": round(self.baseline, 4) if self.baseline is not None else None,
+            **self.stats,
+        }
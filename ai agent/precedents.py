@@ -0,0 +1,192 @@
+from typing import Dict, Any, Iterable, List, Optional
+
+import numpy as np
+
+from scoring import to_number
+
+MAX_PRECEDENTS = 100_000  # Per domain; the oldest are overwritten beyond this
+MAX_FEATURES = 32  # Numeric fields tracked per domain
+INITIAL_ROWS = 1024
+SNIPPET_CHARS = 400
+
+# Numeric-looking fields that say nothing about the applicant
+IGNORED_FIELDS = {
+    "id", "applicant_id", "application_id", "customer_id", "phone", "phone_number",
+    "zip", "zip_code", "postal_code", "timestamp", "created_at", "submitted_at",
+}
+
+# Derived features: name -> (numerator, denominator)
+RATIO_FEATURES = {
+    "debt_to_income": ("existing_debt", "monthly_income"),
+    "loan_to_income": ("loan_amount", "monthly_income"),
+}
+
+
+def _fields(applicant: Dict[str, Any]) -> Dict[str, float]:
+    """Numeric fields of an applicant under normalized names, plus ratios."""
+    values = {}
+    for key, raw in applicant.items():
+        name = str(key).strip().lower().replace(" ", "_").replace("-", "_")
+        if name in IGNORED_FIELDS:
+            continue
+        value = to_number(raw)
+        if not np.isnan(value):
+            values[name] = value
+    for name, (numerator, denominator) in RATIO_FEATURES.items():
+        if values.get(numerator) is not None and values.get(denominator):
+            values[name] = values[numerator] / values[denominator]
+    return values
+
+
+class _DomainIndex:
+    """
+    Ring buffer of feature vectors for one domain.
+
+    Vectors are stored column-major (feature x slot) both raw and
+    standardized, with each slot's squared norm kept alongside, so a query
+    is one (features x slots) matrix-vector product:
+    ||z - q||^2 = ||z||^2 - 2 z.q + ||q||^2. The standardization is
+    refitted whenever the number of inserts doubles or a new field
+    appears, which keeps inserts amortized O(1).
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.columns: Dict[str, int] = {}
+        rows = min(INITIAL_ROWS, capacity)
+        self.raw = np.full((MAX_FEATURES, rows), np.nan, dtype=np.float32)
+        self.z = np.zeros((MAX_FEATURES, rows), dtype=np.float32)
+        self.norms = np.zeros(rows, dtype=np.float32)
+        self.mean = np.zeros(MAX_FEATURES, dtype=np.float32)
+        self.inv_std = np.ones(MAX_FEATURES, dtype=np.float32)
+        self.entries: List[Dict[str, Any]] = []
+        self.size = 0
+        self.next_slot = 0
+        self.inserted = 0
+        self.fitted_at = 0
+        self.new_columns = False
+
+    def vector(self, fields: Dict[str, float], add_columns: bool) -> "np.ndarray":
+        row = np.full(MAX_FEATURES, np.nan, dtype=np.float32)
+        for name, value in fields.items():
+            column = self.columns.get(name)
+            if column is None and add_columns and len(self.columns) < MAX_FEATURES:
+                column = self.columns[name] = len(self.columns)
+                self.new_columns = True
+            if column is not None:
+                row[column] = value
+        return row
+
+    def _grow(self):
+        rows = min(self.raw.shape[1] * 2, self.capacity)
+        raw = np.full((MAX_FEATURES, rows), np.nan, dtype=np.float32)
+        raw[:, :self.size] = self.raw[:, :self.size]
+        z = np.zeros((MAX_FEATURES, rows), dtype=np.float32)
+        z[:, :self.size] = self.z[:, :self.size]
+        norms = np.zeros(rows, dtype=np.float32)
+        norms[:self.size] = self.norms[:self.size]
+        self.raw, self.z, self.norms = raw, z, norms
+
+    def _standardize(self, vectors: "np.ndarray") -> "np.ndarray":
+        # Missing values sit at the column mean, i.e. 0 once standardized
+        return np.nan_to_num((vectors - self.mean[:, None]) * self.inv_std[:, None])
+
+    def _refit(self):
+        m = len(self.columns)
+        live = self.raw[:m, :self.size]
+        present = ~np.isnan(live)
+        count = np.maximum(present.sum(axis=1), 1)
+        mean = np.where(present, live, 0.0).sum(axis=1) / count
+        var = np.where(present, (live - mean[:, None]) ** 2, 0.0).sum(axis=1) / count
+        std = np.sqrt(var)
+        self.mean[:m] = mean
+        # A constant or single-sample column keeps unit scale
+        self.inv_std[:m] = np.where(std > 0, 1.0 / np.where(std > 0, std, 1.0), 1.0)
+        self.z[:, :self.size] = self._standardize(self.raw[:, :self.size])
+        self.norms[:self.size] = (self.z[:, :self.size] ** 2).sum(axis=0)
+        self.fitted_at = self.inserted
+        self.new_columns = False
+
+    def insert(self, row: "np.ndarray", entry: Dict[str, Any]):
+        slot = self.next_slot
+        if self.size < self.capacity:
+            if slot >= self.raw.shape[1]:
+                self._grow()
+            self.entries.append(entry)
+            self.size += 1
+        else:
+            self.entries[slot] = entry  # overwrite the oldest
+        self.raw[:, slot] = row
+        self.inserted += 1
+        self.next_slot = (slot + 1) % self.capacity
+        if self.new_columns or self.inserted >= 2 * self.fitted_at:
+            self._refit()
+        else:
+            z = self._standardize(row[:, None])[:, 0]
+            self.z[:, slot] = z
+            self.norms[slot] = z @ z
+
+    def nearest(self, query: "np.ndarray", k: int) -> List[int]:
+        if self.size == 0 or np.isnan(query).all():
+            return []
+        m = len(self.columns)
+        zq = self._standardize(query[:, None])[:m, 0]
+        # ||zq||^2 is the same for every slot, so it does not change the ranking
+        distance = self.norms[:self.size] - 2 * (zq @ self.z[:m, :self.size])
+        k = min(k, self.size)
+        top = np.argpartition(distance, k - 1)[:k]
+        return top[np.argsort(distance[top])].tolist()
+
+
+class PrecedentIndex:
+    """
+    Per-domain nearest-neighbour index over past decisions.
+
+    Each decision's numeric applicant fields (plus a few derived ratios)
+    become one standardized float32 vector. ``nearest`` returns the
+    closest precedents by Euclidean distance with a single vectorized
+    product and ``argpartition``. Past ``max_precedents`` the oldest
+    precedent is overwritten.
+    """
+
+    def __init__(self, max_precedents: int = MAX_PRECEDENTS):
+        self.max_precedents = max_precedents
+        self._domains: Dict[str, _DomainIndex] = {}
+
+    def add(self, domain: str, applicant: Dict[str, Any], decision: str, reasoning: str, timestamp: str = ""):
+        fields = _fields(applicant)
+        if not fields:
+            return
+        index = self._domains.get(domain)
+        if index is None:
+            index = self._domains[domain] = _DomainIndex(self.max_precedents)
+        index.insert(index.vector(fields, add_columns=True), {
+            "decision": decision,
+            "reasoning": (reasoning or "")[:SNIPPET_CHARS],
+            "timestamp": timestamp,
+        })
+
+    def seed(self, entries: Iterable[Dict[str, Any]]):
+        """Bulk-load stored explanations, oldest first."""
+        for entry in entries:
+            decision = entry.get("decision") or {}
+            self.add(
+                entry.get("type", ""),
+                entry.get("applicant") or {},
+                decision.get("status", ""),
+                decision.get("reasoning", ""),
+                entry.get("timestamp", ""),
+            )
+
+    def nearest(self, domain: str, applicant: Dict[str, Any], k: int = 5) -> List[Dict[str, Any]]:
+        index = self._domains.get(domain)
+        if index is None:
+            return []
+        query = index.vector(_fields(applicant), add_columns=False)
+        return [index.entries[slot] for slot in index.nearest(query, k)]
+
+    def size(self, domain: Optional[str] = None) -> int:
+        if domain is not None:
+            index = self._domains.get(domain)
+            return index.size if index else 0
+        return sum(index.size for index in self._domains.values())
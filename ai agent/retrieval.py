@@ -0,0 +1,113 @@
+import heapq
+import math
+import re
+from collections import Counter
+from typing import Dict, Any, Iterable, List, Tuple
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "have", "if",
+    "in", "is", "it", "its", "must", "of", "on", "or", "should", "than", "that", "the",
+    "their", "this", "to", "with", "will", "all", "any", "not", "no", "per",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    tokens = []
+    for token in TOKEN_PATTERN.findall(str(text).lower()):
+        if token in STOPWORDS:
+            continue
+        # Light plural folding so "claims" matches "claim_amount"
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+def applicant_terms(applicant: Dict[str, Any]) -> List[str]:
+    """Query terms from an applicant's field names and text values."""
+    terms = []
+    for key, value in applicant.items():
+        terms.extend(tokenize(str(key).replace("_", " ")))
+        if isinstance(value, str):
+            terms.extend(tokenize(value))
+    return terms
+
+
+class BM25Index:
+    """
+    Inverted index with Okapi BM25 scoring over documents grouped into
+    scopes (policy domains). ``search`` ranks the documents of several
+    scopes together, using statistics of just those scopes.
+    Documents are added and removed one at a time.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        # term -> {(scope, doc_id): term frequency}
+        self._postings: Dict[str, Dict[Tuple[str, str], int]] = {}
+        # scope -> term -> document frequency
+        self._df: Dict[str, Counter] = {}
+        self._lengths: Dict[Tuple[str, str], int] = {}
+        self._terms: Dict[Tuple[str, str], List[str]] = {}
+        self._scope_docs: Dict[str, int] = {}
+        self._scope_tokens: Dict[str, int] = {}
+
+    def add(self, scope: str, doc_id: str, text: str):
+        key = (scope, doc_id)
+        if key in self._lengths:
+            self.remove(scope, doc_id)
+        counts = Counter(tokenize(text))
+        for term, tf in counts.items():
+            self._postings.setdefault(term, {})[key] = tf
+        self._df.setdefault(scope, Counter()).update(counts.keys())
+        length = sum(counts.values())
+        self._lengths[key] = length
+        self._terms[key] = list(counts)
+        self._scope_docs[scope] = self._scope_docs.get(scope, 0) + 1
+        self._scope_tokens[scope] = self._scope_tokens.get(scope, 0) + length
+
+    def remove(self, scope: str, doc_id: str):
+        key = (scope, doc_id)
+        if key not in self._lengths:
+            return
+        df = self._df[scope]
+        for term in self._terms.pop(key):
+            postings = self._postings[term]
+            del postings[key]
+            if not postings:
+                del self._postings[term]
+            df[term] -= 1
+            if not df[term]:
+                del df[term]
+        self._scope_docs[scope] -= 1
+        self._scope_tokens[scope] -= self._lengths.pop(key)
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def search(self, scopes: Iterable[str], terms: List[str], k: int) -> List[Tuple[str, str]]:
+        """Up to ``k`` (scope, doc_id) keys with a positive score, best first."""
+        scopes = set(scopes)
+        n_docs = sum(self._scope_docs.get(s, 0) for s in scopes)
+        if not n_docs or k <= 0:
+            return []
+        avg_length = sum(self._scope_tokens.get(s, 0) for s in scopes) / n_docs or 1.0
+
+        scores: Dict[Tuple[str, str], float] = {}
+        for term, query_tf in Counter(terms).items():
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            df = sum(self._df.get(s, {}).get(term, 0) for s in scopes)
+            if not df:
+                continue
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            for key, tf in postings.items():
+                if key[0] not in scopes:
+                    continue
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[key] / avg_length)
+                scores[key] = scores.get(key, 0.0) + query_tf * idf * tf * (self.k1 + 1) / (tf + norm)
+
+        return heapq.nlargest(k, scores, key=scores.get)
@@ -0,0 +1,219 @@
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from typing import Dict, Any, Deque, Iterable, List, Optional
+
+EJECT_AFTER_FAILURES = 3  # Consecutive failures before a backend is taken out
+EJECT_BASE_SECONDS = 10.0  # Doubles with each repeated ejection
+EJECT_MAX_SECONDS = 300.0
+OUTLIER_FACTOR = 3.0  # Per-token latency vs. the median of the other backends
+OUTLIER_MIN_SAMPLES = 10
+LATENCY_SAMPLES = 50  # Recent per-token latencies; their median is the backend's latency
+LATENCY_WINDOW = 200  # Call durations kept per backend for p95
+HEDGE_MIN_SAMPLES = 20
+
+
+def _generate_url(url: str) -> str:
+    url = url.rstrip("/")
+    return url if "/api/" in url else f"{url}/api/generate"
+
+
+class Backend:
+    def __init__(self, url: str, weight: float = 1.0, max_concurrency: int = 4):
+        self.url = _generate_url(url)
+        self.weight = max(float(weight), 0.01)
+        self.max_concurrency = max(int(max_concurrency), 1)
+        self.outstanding = 0
+        self.token_latencies: Deque[float] = deque(maxlen=LATENCY_SAMPLES)  # Seconds per generated token
+        self.durations: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self.consecutive_failures = 0
+        self.ejections = 0
+        self.ejected_until = 0.0
+        self.stats = {"calls": 0, "errors": 0, "ejections": 0}
+
+    def admitted(self, now: float) -> bool:
+        return now >= self.ejected_until
+
+    @property
+    def latency(self) -> Optional[float]:
+        if not self.token_latencies:
+            return None
+        ordered = sorted(self.token_latencies)
+        return ordered[len(ordered) // 2]
+
+    def p95(self) -> Optional[float]:
+        if len(self.durations) < HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self.durations)
+        return ordered[int(0.95 * (len(ordered) - 1))]
+
+    def snapshot(self, now: float) -> Dict[str, Any]:
+        p95, latency = self.p95(), self.latency
+        return {
+            "url": self.url,
+            "weight": self.weight,
+            "max_concurrency": self.max_concurrency,
+            "outstanding": self.outstanding,
+            "ejected_for": round(self.ejected_until - now, 1) if not self.admitted(now) else 0,
+            "latency_per_token": round(latency, 4) if latency is not None else None,
+            "p95_seconds": round(p95, 3) if p95 is not None else None,
+            **self.stats,
+        }
+
+
+def load_backends(spec: str, default_url: str, default_concurrency: int) -> List[Backend]:
+    """
+    Backends from ``spec``: a JSON list (inline, or the path of a file
+    holding one) of ``{"url", "weight", "max_concurrency"}`` objects or
+    bare URL strings. Empty means ``default_url`` alone.
+    """
+    spec = spec.strip()
+    if not spec:
+        return [Backend(default_url, max_concurrency=default_concurrency)]
+    if not spec.startswith("[") and os.path.exists(spec):
+        with open(spec, "r") as f:
+            spec = f.read()
+    backends = []
+    for entry in json.loads(spec):
+        if isinstance(entry, str):
+            entry = {"url": entry}
+        backends.append(Backend(
+            entry["url"],
+            weight=entry.get("weight", 1.0),
+            max_concurrency=entry.get("max_concurrency", default_concurrency)
+        ))
+    if not backends:
+        raise ValueError("OLLAMA_BACKENDS lists no backends")
+    return backends
+
+
+class BackendRouter:
+    """
+    Spreads Ollama calls over a pool of backends.
+
+    ``acquire`` picks, among admitted backends with a free slot, the one
+    with the fewest outstanding requests relative to its weight (ties go
+    to the lower latency), and waits when every backend is full. Ejection
+    is passive: ``release`` reports each call's outcome, and a backend is
+    taken out for a while after ``EJECT_AFTER_FAILURES`` straight errors
+    or when its median per-token latency exceeds ``OUTLIER_FACTOR`` x the
+    median of the others. It is re-admitted when the period ends; repeat
+    ejections last longer. The last admitted backend is never ejected.
+    """
+
+    def __init__(self, backends: List[Backend]):
+        self.backends = backends
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def capacity(self) -> int:
+        return sum(b.max_concurrency for b in self.backends)
+
+    def _candidates(self, exclude: Iterable[Backend] = ()) -> List[Backend]:
+        now = time.monotonic()
+        allowed = [b for b in self.backends if b not in exclude]
+        free = [b for b in allowed if b.outstanding < b.max_concurrency]
+        admitted = [b for b in free if b.admitted(now)]
+        if admitted:
+            return admitted
+        if any(b.admitted(now) for b in allowed):
+            return []  # Healthy backends are just busy; wait for them
+        # Everything is ejected: try the one due back first rather than fail
+        return sorted(free, key=lambda b: b.ejected_until)[:1]
+
+    def try_acquire(self, exclude: Iterable[Backend] = ()) -> Optional[Backend]:
+        candidates = self._candidates(exclude)
+        if not candidates:
+            return None
+        backend = min(candidates, key=lambda b: (
+            (b.outstanding + 1) / b.weight,
+            b.latency if b.latency is not None else 0.0
+        ))
+        backend.outstanding += 1
+        backend.stats["calls"] += 1
+        return backend
+
+    async def acquire(self, exclude: Iterable[Backend] = ()) -> Backend:
+        while True:
+            backend = self.try_acquire(exclude)
+            if backend is not None:
+                return backend
+            future = asyncio.get_running_loop().create_future()
+            self._waiters.append(future)
+            try:
+                # Re-check now and then: an ejection may expire with nothing released
+                await asyncio.wait_for(asyncio.shield(future), EJECT_BASE_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                if future in self._waiters:
+                    self._waiters.remove(future)
+
+    def release(
+        self,
+        backend: Backend,
+        seconds: Optional[float] = None,
+        ok: Optional[bool] = None,
+        tokens: Optional[int] = None
+    ):
+        """Return a slot. ``ok`` None means the call was abandoned (cancelled) and says nothing."""
+        backend.outstanding -= 1
+        if ok is True:
+            backend.consecutive_failures = 0
+            if backend.ejections and len(backend.durations) >= 5 * OUTLIER_MIN_SAMPLES:
+                backend.ejections = 0  # Healthy again since its last return
+            if seconds is not None:
+                backend.durations.append(seconds)
+                backend.token_latencies.append(seconds / tokens if tokens else seconds)
+                if self._is_outlier(backend):
+                    self._eject(backend, "latency")
+        elif ok is False:
+            backend.stats["errors"] += 1
+            # Calls already in flight when it was ejected do not count again
+            if backend.admitted(time.monotonic()):
+                backend.consecutive_failures += 1
+            if backend.consecutive_failures >= EJECT_AFTER_FAILURES:
+                self._eject(backend, "errors")
+        while self._waiters:
+            future = self._waiters.popleft()
+            if not future.done():
+                future.set_result(None)
+                break
+
+    def _is_outlier(self, backend: Backend) -> bool:
+        if len(backend.durations) < OUTLIER_MIN_SAMPLES:
+            return False
+        now = time.monotonic()
+        others = sorted(
+            b.latency for b in self.backends
+            if b is not backend and b.admitted(now) and b.latency is not None
+            and len(b.durations) >= OUTLIER_MIN_SAMPLES
+        )
+        if not others:
+            return False
+        return backend.latency > OUTLIER_FACTOR * others[len(others) // 2]
+
+    def _eject(self, backend: Backend, reason: str):
+        now = time.monotonic()
+        if not any(b.admitted(now) for b in self.backends if b is not backend):
+            return
+        backend.ejections += 1
+        backend.stats["ejections"] += 1
+        backend.ejected_until = now + min(EJECT_BASE_SECONDS * 2 ** (backend.ejections - 1), EJECT_MAX_SECONDS)
+        # Start fresh when it comes back
+        backend.consecutive_failures = 0
+        backend.token_latencies.clear()
+        backend.durations.clear()
+        print(f"WARNING: Ejected Ollama backend {backend.url} ({reason}) until re-admission")
+
+    def hedge_delay(self, backend: Backend) -> Optional[float]:
+        """Seconds after which a call to ``backend`` is worth duplicating elsewhere (its p95)."""
+        if len(self.backends) < 2:
+            return None
+        return backend.p95()
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        now = time.monotonic()
+        return [b.snapshot(now) for b in self.backends]
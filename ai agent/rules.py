@@ -0,0 +1,243 @@
+import json
+import os
+from typing import Dict, Any, List, Optional, Tuple
+
+# =====================================================
+# DEFAULT PRE-SCREEN RULES
+# =====================================================
+# Thresholds sit well outside the cut-offs used in main.py
+# (credit_score > 650, debt < 3x income, skill_score > 65,
+# claim_amount < 10000) so only clear-cut applicants skip the LLM.
+#
+# "approve": every condition must hold -> APPROVED
+# "reject":  any condition holds       -> REJECTED
+# Anything else (or a missing field) is borderline and goes to the LLM.
+#
+# A condition compares either a single "field" or a "ratio" of two
+# fields against "value" using "op".
+DEFAULT_RULES: Dict[str, Dict[str, List[Dict[str, Any]]]] = {
+    "loan": {
+        "approve": [
+            {"field": "credit_score", "op": ">=", "value": 720, "label": "credit score"},
+            {"ratio": ["existing_debt", "monthly_income"], "op": "<=", "value": 1.5,
+             "label": "debt to monthly income ratio"},
+            {"ratio": ["loan_amount", "monthly_income"], "op": "<=", "value": 24,
+             "label": "loan amount to monthly income ratio"},
+        ],
+        "reject": [
+            {"field": "credit_score", "op": "<", "value": 550, "label": "credit score"},
+            {"ratio": ["existing_debt", "monthly_income"], "op": ">", "value": 6,
+             "label": "debt to monthly income ratio"},
+        ],
+    },
+    "credit": {
+        "approve": [
+            {"field": "credit_score", "op": ">=", "value": 720, "label": "credit score"},
+            {"field": "credit_utilization", "op": "<=", "value": 0.4, "label": "credit utilization"},
+            {"field": "defaults", "op": "==", "value": 0, "label": "number of defaults"},
+            {"field": "late_payments", "op": "<=", "value": 1, "label": "number of late payments"},
+        ],
+        "reject": [
+            {"field": "credit_score", "op": "<", "value": 550, "label": "credit score"},
+            {"field": "credit_utilization", "op": ">=", "value": 0.95, "label": "credit utilization"},
+            {"field": "defaults", "op": ">=", "value": 2, "label": "number of defaults"},
+        ],
+    },
+    "insurance": {
+        "approve": [
+            {"field": "claim_amount", "op": "<=", "value": 5000, "label": "claim amount"},
+            {"field": "previous_claims", "op": "<=", "value": 1, "label": "number of previous claims"},
+        ],
+        "reject": [
+            {"field": "claim_amount", "op": ">=", "value": 30000, "label": "claim amount"},
+        ],
+    },
+    "job": {
+        "approve": [
+            {"field": "skill_score", "op": ">=", "value": 85, "label": "skill score"},
+        ],
+        "reject": [
+            {"field": "skill_score", "op": "<", "value": 40, "label": "skill score"},
+        ],
+    },
+}
+
+OPS = {
+    "<": lambda a, b: a < b,
+    "<=": lambda a, b: a <= b,
+    ">": lambda a, b: a > b,
+    ">=": lambda a, b: a >= b,
+    "==": lambda a, b: a == b,
+}
+
+# The threshold an applicant must reach to flip a failed condition
+PASSING_OP = {"<": ">=", "<=": ">", ">": "<=", ">=": "<", "==": "=="}
+
+KEEP_PHRASE = {"<": "below", "<=": "at or below", ">": "above", ">=": "at or above", "==": "at"}
+
+
+def _number(value: Any) -> Optional[float]:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value) if value == value else None  # NaN check
+    if isinstance(value, str):
+        try:
+            return float(value.replace(",", "").strip())
+        except ValueError:
+            return None
+    return None
+
+
+def _fmt(value: float) -> str:
+    return f"{value:,.0f}" if abs(value) >= 100 else f"{value:g}"
+
+
+class RulesEngine:
+    """
+    Deterministic per-domain pre-screen that answers clear-cut applications
+    without an LLM call. Rules come from ``file_path`` when it exists,
+    otherwise DEFAULT_RULES.
+    """
+
+    def __init__(self, file_path: Optional[str] = None, rules: Optional[Dict[str, Any]] = None):
+        self.file_path = file_path
+        self.rules = rules if rules is not None else self._load_rules()
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    def _load_rules(self) -> Dict[str, Any]:
+        if self.file_path and os.path.exists(self.file_path):
+            try:
+                with open(self.file_path, "r") as f:
+                    return json.load(f)
+            except json.JSONDecodeError as e:
+                print(f"WARNING: Invalid rules file {self.file_path}, using defaults: {e}")
+        return DEFAULT_RULES
+
+    def _count(self, domain: str, outcome: str):
+        domain_stats = self.stats.setdefault(domain, {"approved": 0, "rejected": 0, "borderline": 0})
+        domain_stats[outcome] += 1
+
+    # -------------------------------------------------
+    # Evaluation
+    # -------------------------------------------------
+    def _measure(self, condition: Dict[str, Any], fields: Dict[str, Any]) -> Optional[float]:
+        if "ratio" in condition:
+            numerator, denominator = (_number(fields.get(name)) for name in condition["ratio"])
+            if numerator is None or not denominator:
+                return None
+            return numerator / denominator
+        return _number(fields.get(condition["field"]))
+
+    def _check(self, condition: Dict[str, Any], fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Result of one condition, or None if its inputs are missing."""
+        measured = self._measure(condition, fields)
+        if measured is None:
+            return None
+        return {
+            "label": condition.get("label", condition.get("field", "value")),
+            "measured": measured,
+            "op": condition["op"],
+            "value": condition["value"],
+            "holds": OPS[condition["op"]](measured, condition["value"]),
+        }
+
+    def _outcome(self, domain: str, applicant: Dict[str, Any]) -> Tuple[Optional[str], List[Dict[str, Any]]]:
+        """("approved" | "rejected" | "borderline", deciding results), or (None, []) without rules."""
+        domain_rules = self.rules.get(domain)
+        if not domain_rules:
+            return None, []
+
+        # Match CSV / form variants such as "Credit Score" or "credit-score"
+        fields = {str(k).strip().lower().replace(" ", "_").replace("-", "_"): v for k, v in applicant.items()}
+
+        rejections = []
+        for condition in domain_rules.get("reject", []):
+            result = self._check(condition, fields)
+            if result and result["holds"]:
+                rejections.append(result)
+        if rejections:
+            return "rejected", rejections
+
+        approvals = [self._check(c, fields) for c in domain_rules.get("approve", [])]
+        if approvals and all(r and r["holds"] for r in approvals):
+            return "approved", approvals
+        return "borderline", []
+
+    def decides(self, domain: str, applicant: Dict[str, Any]) -> bool:
+        """Whether ``evaluate`` would decide this applicant; counts and renders nothing."""
+        return self._outcome(domain, applicant)[0] in ("approved", "rejected")
+
+    def evaluate(self, domain: str, applicant: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Return a full decision payload (same shape as the LLM output) for a
+        clear-cut applicant, or None when the case is borderline.
+        """
+        outcome, results = self._outcome(domain, applicant)
+        if outcome is None:
+            return None
+        self._count(domain, outcome)
+        if outcome == "rejected":
+            return self._rejected(domain, results)
+        if outcome == "approved":
+            return self._approved(domain, results)
+        return None
+
+    # -------------------------------------------------
+    # Templated explanations
+    # -------------------------------------------------
+    def _approved(self, domain: str, results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        strengths = [f"your {r['label']} of {_fmt(r['measured'])}" for r in results]
+        reasoning = (
+            f"Your {domain} application has been approved. "
+            f"We looked at {', '.join(strengths)}. "
+            f"All of these are comfortably within the ranges we approve automatically, "
+            f"so no further review was needed. "
+            f"Keeping these numbers at their current level will help with future applications."
+        )
+        return {
+            "decision": {"status": "APPROVED", "confidence": 0.95, "reasoning": reasoning},
+            "counterfactuals": [
+                f"Step {i}: Keep your {r['label']} {KEEP_PHRASE[r['op']]} {_fmt(r['value'])}."
+                for i, r in enumerate(results, 1)
+            ],
+            "fairness": {
+                "assessment": "Fair",
+                "concerns": "Decided by fixed published thresholds on financial and performance fields only."
+            },
+            "key_metrics": {
+                "risk_score": 10,
+                "approval_probability": 0.95,
+                "critical_factors": [r["label"] for r in results]
+            }
+        }
+
+    def _rejected(self, domain: str, results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        problems = [f"your {r['label']} is {_fmt(r['measured'])}" for r in results]
+        reasoning = (
+            f"Your {domain} application has been declined. "
+            f"The main reason is that {' and '.join(problems)}. "
+            f"This is well outside the range we can accept, so the application "
+            f"could not be approved at this time. "
+            f"The steps below show what would need to change before you apply again."
+        )
+        steps = []
+        for i, r in enumerate(results, 1):
+            target = PASSING_OP[r["op"]]
+            direction = "at least" if target in (">", ">=") else "at most"
+            steps.append(
+                f"Step {i}: Bring your {r['label']} from {_fmt(r['measured'])} to {direction} {_fmt(r['value'])}."
+            )
+        return {
+            "decision": {"status": "REJECTED", "confidence": 0.95, "reasoning": reasoning},
+            "counterfactuals": steps[:5],
+            "fairness": {
+                "assessment": "Fair",
+                "concerns": "Decided by fixed published thresholds on financial and performance fields only."
+            },
+            "key_metrics": {
+                "risk_score": 90,
+                "approval_probability": 0.05,
+                "critical_factors": [r["label"] for r in results]
+            }
+        }
@@ -0,0 +1,199 @@
+from typing import Dict, Any, Iterable, List
+
+# JSON Schemas for model outputs. They are sent to Ollama as the
+# structured-output "format" and used again to validate what comes back.
+
+_STRINGS = {"type": "array", "items": {"type": "string"}}
+
+DECISION_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "decision": {
+            "type": "object",
+            "properties": {
+                "status": {"type": "string", "enum": ["APPROVED", "REJECTED"]},
+                "confidence": {"type": "number", "minimum": 0, "maximum": 1},
+                "reasoning": {"type": "string", "minLength": 1},
+            },
+            "required": ["status", "confidence", "reasoning"],
+        },
+        "counterfactuals": _STRINGS,
+        "fairness": {
+            "type": "object",
+            "properties": {
+                "assessment": {"type": "string", "minLength": 1},
+                "concerns": {"type": "string"},
+            },
+            "required": ["assessment", "concerns"],
+        },
+        "key_metrics": {
+            "type": "object",
+            "properties": {
+                "risk_score": {"type": "number", "minimum": 0, "maximum": 100},
+                "approval_probability": {"type": "number", "minimum": 0, "maximum": 1},
+                "critical_factors": _STRINGS,
+            },
+            "required": ["risk_score", "approval_probability", "critical_factors"],
+        },
+    },
+    "required": ["decision", "counterfactuals", "fairness", "key_metrics"],
+}
+
+NARRATIVE_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "reasoning": {"type": "string", "minLength": 1},
+        "counterfactuals": _STRINGS,
+        "fairness": DECISION_SCHEMA["properties"]["fairness"],
+    },
+    "required": ["reasoning", "counterfactuals", "fairness"],
+}
+
+PACKED_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "decisions": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {"applicant": {"type": "integer", "minimum": 1}, **DECISION_SCHEMA["properties"]},
+                "required": ["applicant", *DECISION_SCHEMA["required"]],
+            },
+        },
+    },
+    "required": ["decisions"],
+}
+
+OVERRIDE_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "summary": {"type": "string", "minLength": 1},
+        "detailed_reasoning": {"type": "string", "minLength": 1},
+        "next_steps": _STRINGS,
+        "conditions": _STRINGS,
+        "override_context": {"type": "string"},
+    },
+    "required": ["summary", "detailed_reasoning", "next_steps", "conditions", "override_context"],
+}
+
+_TYPES = {
+    "object": dict,
+    "array": list,
+    "string": str,
+    "number": (int, float),
+    "integer": int,
+    "boolean": bool,
+}
+
+
+def validate(value: Any, schema: Dict[str, Any], path: str = "$") -> List[str]:
+    """
+    Errors for ``value`` against the subset of JSON Schema used here (type,
+    properties, required, items, enum, minimum/maximum, minLength), as
+    "path: problem" strings. Empty means valid.
+    """
+    expected = schema.get("type")
+    if expected is not None:
+        python_type = _TYPES[expected]
+        # bool is an int subclass but never a valid number here
+        if not isinstance(value, python_type) or (isinstance(value, bool) and expected != "boolean"):
+            return [f"{path}: expected {expected}"]
+    if "enum" in schema and value not in schema["enum"]:
+        return [f"{path}: must be one of {schema['enum']}"]
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        if "minimum" in schema and value < schema["minimum"]:
+            return [f"{path}: below {schema['minimum']}"]
+        if "maximum" in schema and value > schema["maximum"]:
+            return [f"{path}: above {schema['maximum']}"]
+    if isinstance(value, str) and len(value.strip()) < schema.get("minLength", 0):
+        return [f"{path}: too short"]
+
+    errors = []
+    if isinstance(value, dict):
+        for name in schema.get("required", []):
+            if name not in value:
+                errors.append(f"{path}.{name}: missing")
+        for name, child in schema.get("properties", {}).items():
+            if name in value:
+                errors.extend(validate(value[name], child, f"{path}.{name}"))
+    elif isinstance(value, list) and "items" in schema:
+        for i, item in enumerate(value):
+            errors.extend(validate(item, schema["items"], f"{path}[{i}]"))
+    return errors
+
+
+def invalid_sections(value: Dict[str, Any], schema: Dict[str, Any]) -> Dict[str, List[str]]:
+    """Top-level properties of an object output that are missing or invalid, with their errors."""
+    sections = {}
+    for name, child in schema.get("properties", {}).items():
+        if name not in value:
+            if name in schema.get("required", []):
+                sections[name] = [f"$.{name}: missing"]
+            continue
+        errors = validate(value[name], child, f"$.{name}")
+        if errors:
+            sections[name] = errors
+    return sections
+
+
+def section_schema(schema: Dict[str, Any], sections: Iterable[str]) -> Dict[str, Any]:
+    """Schema for an object holding only ``sections`` of ``schema``, all required."""
+    sections = list(sections)
+    return {
+        "type": "object",
+        "properties": {name: schema["properties"][name] for name in sections},
+        "required": sections,
+    }
+
+
+class ValidationStats:
+    """
+    Per-domain counts of schema-invalid outputs and section retries.
+
+    Retries are budgeted: a domain may spend at most ``retry_ratio`` retries
+    per checked output, plus ``retry_burst``, so a model that keeps
+    failing the schema cannot double the load.
+    """
+
+    def __init__(self, retry_ratio: float, retry_burst: int):
+        self.retry_ratio = retry_ratio
+        self.retry_burst = retry_burst
+        self._domains: Dict[str, Dict[str, int]] = {}
+
+    def _counts(self, domain: str) -> Dict[str, int]:
+        if domain not in self._domains:
+            self._domains[domain] = {
+                "checked": 0, "invalid": 0, "retries": 0, "fixed_by_retry": 0,
+                "still_invalid": 0, "budget_exhausted": 0,
+            }
+        return self._domains[domain]
+
+    def record_output(self, domain: str, invalid: bool):
+        counts = self._counts(domain)
+        counts["checked"] += 1
+        if invalid:
+            counts["invalid"] += 1
+
+    def take_retry(self, domain: str) -> bool:
+        counts = self._counts(domain)
+        if counts["retries"] >= self.retry_ratio * counts["checked"] + self.retry_burst:
+            counts["budget_exhausted"] += 1
+            return False
+        counts["retries"] += 1
+        return True
+
+    def record_result(self, domain: str, valid: bool, retried: bool):
+        counts = self._counts(domain)
+        if not valid:
+            counts["still_invalid"] += 1
+        elif retried:
+            counts["fixed_by_retry"] += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            domain: {
+                **counts,
+                "invalid_rate": round(counts["invalid"] / counts["checked"], 3) if counts["checked"] else 0.0,
+            }
+            for domain, counts in self._domains.items()
+        }
@@ -0,0 +1,330 @@
+import json
+import os
+import sys
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+import pandas as pd
+
+SCORECARDS_FILE = "../data/scorecards.json"
+
+# Domains whose holdout AUC is below this are saved but left disabled,
+# so the LLM keeps deciding where the data has no real signal.
+MIN_AUC = 0.6
+APPROVAL_THRESHOLD = 0.5
+# Share of a scorecard's features an applicant must provide to be scored
+MIN_COVERAGE = 0.5
+
+TRUE_STRINGS = {"y", "yes", "true", "t"}
+FALSE_STRINGS = {"n", "no", "false", "f"}
+
+
+def to_number(value: Any) -> float:
+    """Numeric value of a payload field, NaN when missing or non-numeric."""
+    if value is None or isinstance(value, bool):
+        return float(value) if isinstance(value, bool) else np.nan
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        text = value.strip().lower()
+        if text in TRUE_STRINGS:
+            return 1.0
+        if text in FALSE_STRINGS:
+            return 0.0
+        try:
+            return float(text.replace(",", "").replace("$", ""))
+        except ValueError:
+            return np.nan
+    return np.nan
+
+
+def _days_to_years(days: "np.ndarray") -> "np.ndarray":
+    # The credit dataset counts days backwards from today (negative);
+    # 365243 marks "not employed"
+    years = -days / 365.25
+    return np.where(days > 0, 0.0, years)
+
+
+# =====================================================
+# TRAINING SPECS (offline)
+# =====================================================
+# Each feature names the training column (plus an optional transform into
+# the units applicants use) and the payload keys it is read from at
+# decision time. "scale" converts payload units into training units, and
+# "alias_scale" overrides it for aliases given in other units. "derive"
+# maps a payload field onto a binary training feature when the live form
+# collects a different measure.
+#
+# Protected attributes (age, children, family size, dependents, gender,
+# marital status) are never features, even where the data has them.
+#
+# "guards" cover payload fields the training data lacks: the card only
+# decides when each guard holds, and leaves everything else to the LLM.
+TRAINING_SPECS: Dict[str, Dict[str, Any]] = {
+    "credit": {
+        "path": "../data/credit_histories/Extra/train.csv",
+        "label": lambda df: (df["Is high risk"] == 0).astype(float),
+        "features": [
+            {"name": "income", "label": "annual income", "column": "Income",
+             "aliases": ["income", "annual_income"]},
+            {"name": "employment_years", "label": "years employed", "column": "Employment length",
+             "transform": _days_to_years, "aliases": ["employment_years", "employment_length"]},
+            {"name": "account_age", "label": "account age", "column": "Account age",
+             # Months in the data
+             "transform": lambda v: -v, "aliases": ["account_age_months", "account_age", "credit_history_years"],
+             "alias_scale": {"credit_history_years": 12}},
+            {"name": "has_property", "label": "property ownership", "column": "Has a property",
+             "aliases": ["has_a_property", "has_property"]},
+            {"name": "has_car", "label": "car ownership", "column": "Has a car",
+             "aliases": ["has_a_car", "has_car"]},
+        ],
+    },
+    "loan": {
+        "path": "../data/loan_application/Extra/df1_loan.csv",
+        "label": lambda df: (df["Loan_Status"] == "Y").astype(float),
+        "features": [
+            {"name": "monthly_income", "label": "monthly income", "column": "ApplicantIncome",
+             "aliases": ["monthly_income", "applicant_income", "income"]},
+            {"name": "coapplicant_income", "label": "co-applicant income", "column": "CoapplicantIncome",
+             "aliases": ["coapplicant_income"]},
+            {"name": "loan_amount_k", "label": "loan amount", "column": "LoanAmount",
+             "aliases": ["loan_amount"], "scale": 0.001},
+            {"name": "loan_term", "label": "loan term", "column": "Loan_Amount_Term",
+             "aliases": ["loan_amount_term", "loan_term"]},
+            {"name": "credit_history", "label": "credit history", "column": "Credit_History",
+             "aliases": ["credit_history"],
+             # Same cut-off main.py uses for a good credit score
+             "derive": {"field": "credit_score", "threshold": 650}},
+        ],
+        # No debt column to learn from: only decide while debt is as low as
+        # the rules' auto-approve limit, where it cannot change the outcome
+        "guards": [
+            {"ratio": ["existing_debt", "monthly_income"], "max": 1.5, "label": "debt to monthly income ratio"},
+        ],
+    },
+    "insurance": {
+        "path": "../data/insurance_claims/Extra/Insurance_Claims_Data.csv",
+        "label": lambda df: (df["Claim_Status"] == "Approved").astype(float),
+        "filter": lambda df: df[df["Claim_Status"] != "Under Review"],
+        "features": [
+            {"name": "claim_amount", "label": "claim amount", "column": "Claim_Amount",
+             "aliases": ["claim_amount"]},
+            {"name": "fraud_flag", "label": "fraud flag", "column": "Fraudulent_Claim",
+             "aliases": ["fraudulent_claim", "fraud_flag"]},
+        ],
+    },
+}
+
+
+def _column(df: pd.DataFrame, feature: Dict[str, Any]) -> "np.ndarray":
+    raw = df[feature["column"]]
+    if not pd.api.types.is_numeric_dtype(raw):
+        # "3+" dependents, "Y"/"N" flags
+        values = np.array([to_number(str(v).rstrip("+")) for v in raw], dtype=float)
+    else:
+        values = raw.to_numpy(dtype=float)
+    if "transform" in feature:
+        values = feature["transform"](values)
+    return values
+
+
+def _auc(y: "np.ndarray", p: "np.ndarray") -> float:
+    """Rank-based (Mann-Whitney) ROC AUC."""
+    order = np.argsort(p)
+    ranks = np.empty(len(p))
+    ranks[order] = np.arange(1, len(p) + 1)
+    positives = y == 1
+    n_pos, n_neg = positives.sum(), (~positives).sum()
+    if n_pos == 0 or n_neg == 0:
+        return 0.5
+    return float((ranks[positives].sum() - n_pos * (n_pos + 1) / 2) / (n_pos * n_neg))
+
+
+def fit_logistic(X: "np.ndarray", y: "np.ndarray", l2: float = 1e-3, steps: int = 800, lr: float = 0.5):
+    """Class-balanced logistic regression by batch gradient descent on standardized X."""
+    n, k = X.shape
+    weights = np.zeros(k)
+    bias = 0.0
+    pos_rate = y.mean()
+    sample_weight = np.where(y == 1, 0.5 / pos_rate, 0.5 / (1 - pos_rate))
+    for _ in range(steps):
+        p = 1.0 / (1.0 + np.exp(-(X @ weights + bias)))
+        error = (p - y) * sample_weight
+        weights -= lr * (X.T @ error / n + l2 * weights)
+        bias -= lr * error.mean()
+    return weights, bias
+
+
+def train_domain(domain: str, spec: Dict[str, Any], seed: int = 7) -> Dict[str, Any]:
+    df = pd.read_csv(spec["path"])
+    if "filter" in spec:
+        df = spec["filter"](df)
+    y = spec["label"](df).to_numpy(dtype=float)
+    X = np.column_stack([_column(df, f) for f in spec["features"]])
+
+    mean = np.nanmean(X, axis=0)
+    std = np.nanstd(X, axis=0)
+    std[std == 0] = 1.0
+    Z = np.nan_to_num((X - mean) / std)
+
+    rng = np.random.default_rng(seed)
+    holdout = rng.random(len(y)) < 0.2
+    weights, bias = fit_logistic(Z[~holdout], y[~holdout])
+    auc = _auc(y[holdout], 1.0 / (1.0 + np.exp(-(Z[holdout] @ weights + bias))))
+
+    # Refit on everything for the shipped card
+    weights, bias = fit_logistic(Z, y)
+    features = []
+    for i, f in enumerate(spec["features"]):
+        entry = {
+            "name": f["name"],
+            "label": f["label"],
+            "aliases": f["aliases"],
+            "mean": float(mean[i]),
+            "std": float(std[i]),
+            "weight": float(weights[i]),
+            "scale": f.get("scale", 1.0),
+        }
+        for key in ("alias_scale", "derive"):
+            if key in f:
+                entry[key] = f[key]
+        features.append(entry)
+
+    return {
+        "enabled": auc >= MIN_AUC,
+        "holdout_auc": round(auc, 4),
+        "rows": int(len(y)),
+        "bias": float(bias),
+        "threshold": APPROVAL_THRESHOLD,
+        "features": features,
+        "guards": spec.get("guards", []),
+        "trained_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def train_all(output_path: str = SCORECARDS_FILE) -> Dict[str, Any]:
+    cards = {}
+    for domain, spec in TRAINING_SPECS.items():
+        cards[domain] = train_domain(domain, spec)
+        card = cards[domain]
+        print(f"{domain}: rows={card['rows']} holdout_auc={card['holdout_auc']} enabled={card['enabled']}")
+    with open(output_path, "w") as f:
+        json.dump(cards, f, indent=2)
+    print(f"Saved scorecards to {output_path}")
+    return cards
+
+
+# =====================================================
+# RUNTIME SCORER
+# =====================================================
+class Scorer:
+    """
+    Vectorized logistic scorecards loaded from SCORECARDS_FILE.
+
+    ``score_batch`` turns N applicants into one (N x k) matrix and scores
+    them with a single matrix-vector product.
+    """
+
+    def __init__(self, file_path: str = SCORECARDS_FILE):
+        self.file_path = file_path
+        self.cards: Dict[str, Dict[str, Any]] = {}
+        self._vectors: Dict[str, Dict[str, "np.ndarray"]] = {}
+        if os.path.exists(file_path):
+            with open(file_path, "r") as f:
+                self.cards = json.load(f)
+        for domain, card in self.cards.items():
+            feats = card["features"]
+            self._vectors[domain] = {
+                "mean": np.array([f["mean"] for f in feats]),
+                "std": np.array([f["std"] for f in feats]),
+                "weight": np.array([f["weight"] for f in feats]),
+            }
+
+    def available(self, domain: str) -> bool:
+        return self.cards.get(domain, {}).get("enabled", False)
+
+    def _feature_value(self, feature: Dict[str, Any], fields: Dict[str, Any]) -> float:
+        for alias in feature["aliases"]:
+            if alias in fields:
+                scale = feature.get("alias_scale", {}).get(alias, feature.get("scale", 1.0))
+                return to_number(fields[alias]) * scale
+        derive = feature.get("derive")
+        if derive and derive["field"] in fields:
+            value = to_number(fields[derive["field"]])
+            if not np.isnan(value):
+                return 1.0 if value > derive["threshold"] else 0.0
+        return np.nan
+
+    @staticmethod
+    def _fields(applicant: Dict[str, Any]) -> Dict[str, Any]:
+        return {str(k).strip().lower().replace(" ", "_"): v for k, v in applicant.items()}
+
+    def matrix(self, domain: str, applicants: List[Dict[str, Any]]) -> "np.ndarray":
+        features = self.cards[domain]["features"]
+        rows = []
+        for applicant in applicants:
+            fields = self._fields(applicant)
+            rows.append([self._feature_value(f, fields) for f in features])
+        return np.array(rows, dtype=float).reshape(len(applicants), len(features))
+
+    def within_guards(self, domain: str, applicant: Dict[str, Any]) -> bool:
+        """False when a field the card was not trained on is outside its guard (missing passes)."""
+        fields = self._fields(applicant)
+        for guard in self.cards[domain].get("guards", []):
+            numerator, denominator = (to_number(fields.get(name)) for name in guard["ratio"])
+            if np.isnan(numerator) or np.isnan(denominator) or not denominator:
+                continue
+            if numerator / denominator > guard["max"]:
+                return False
+        return True
+
+    def covers(self, domain: str, applicant: Dict[str, Any]) -> bool:
+        """Whether ``score`` would decide this applicant, without scoring it."""
+        if not self.available(domain):
+            return False
+        coverage = (~np.isnan(self.matrix(domain, [applicant]))).mean()
+        return coverage >= MIN_COVERAGE and self.within_guards(domain, applicant)
+
+    def score_batch(self, domain: str, applicants: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+        """Decision + key_metrics per applicant, or None where too few features are present."""
+        if not self.available(domain) or not applicants:
+            return [None] * len(applicants)
+
+        card = self.cards[domain]
+        vec = self._vectors[domain]
+        X = self.matrix(domain, applicants)
+        coverage = (~np.isnan(X)).mean(axis=1)
+        Z = np.nan_to_num((X - vec["mean"]) / vec["std"])  # missing -> population mean
+        contributions = Z * vec["weight"]
+        probability = 1.0 / (1.0 + np.exp(-(contributions.sum(axis=1) + card["bias"])))
+
+        results: List[Optional[Dict[str, Any]]] = []
+        for i in range(len(applicants)):
+            if coverage[i] < MIN_COVERAGE or not self.within_guards(domain, applicants[i]):
+                results.append(None)
+                continue
+            p = float(probability[i])
+            top = np.argsort(-np.abs(contributions[i]))[:3]
+            results.append({
+                "status": "APPROVED" if p >= card["threshold"] else "REJECTED",
+                "confidence": round(max(p, 1 - p), 3),
+                "key_metrics": {
+                    "risk_score": int(round((1 - p) * 100)),
+                    "approval_probability": round(p, 3),
+                    "critical_factors": [
+                        f"{card['features'][j]['label']} ({'+' if contributions[i][j] >= 0 else '-'})"
+                        for j in top if contributions[i][j] != 0
+                    ],
+                },
+                "coverage": round(float(coverage[i]), 2),
+            })
+        return results
+
+    def score(self, domain: str, applicant: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        return self.score_batch(domain, [applicant])[0]
+
+
+if __name__ == "__main__":
+    # Offline training: python scoring.py [output_path]
+    train_all(sys.argv[1] if len(sys.argv) > 1 else SCORECARDS_FILE)
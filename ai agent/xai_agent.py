@@ -1,6 +1,9 @@
 from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Dict, Any, List, Optional
+from fastapi.responses import StreamingResponse
+from typing import Dict, Any, AsyncIterator, Callable, Iterable, List, Optional, Tuple
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone
 from enum import Enum
 import pandas as pd
@@ -10,8 +13,31 @@ import httpx
 import re
 import uuid
 import os
+import time
+import copy
+import hashlib
+import math
+import atexit
+import threading
+from itertools import islice
 from io import BytesIO
 from pypdf import PdfReader
+from rules import RulesEngine
+from scoring import Scorer
+from explanations import ExplanationStore
+from precedents import PrecedentIndex, MAX_PRECEDENTS
+from retrieval import BM25Index, applicant_terms
+from budget import TokenBudget, estimate_tokens
+from jobs import JobQueue, JobWorkers, RetryJob
+from batches import BatchStore
+from limiter import AIMDLimit
+from router import Backend, BackendRouter, load_backends
+from jsonscan import JSONScanner
+from schemas import (
+    DECISION_SCHEMA, NARRATIVE_SCHEMA, PACKED_SCHEMA, OVERRIDE_SCHEMA,
+    ValidationStats, invalid_sections, section_schema, validate
+)
+from ingest import IngestError, STREAMED_TYPES, file_kind, file_size, iter_record_chunks, iter_records
 
 # =====================================================
 # APP
@@ -31,17 +57,91 @@ app.add_middleware(
 OLLAMA_URL = "http://localhost:11434/api/generate"
 MODEL_NAME = "qwen2.5:3b"
 
-MAX_CSV_ROWS = 50
-MAX_CONCURRENCY = 5  # Increased for parallel batch processing
-REQUEST_TIMEOUT = 120.0
-MAX_FILE_SIZE_MB = 10  # Maximum file size in MB for uploads
-
-semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+MAX_INLINE_BATCH_ROWS = 1000  # JSON bodies; larger batches go through a file upload
+MAX_CONCURRENCY = 5  # Default job workers / keep-alive connections
+REQUEST_TIMEOUT = 300.0  # Read timeout per generation; generous for older hardware
+CONNECT_TIMEOUT = 10.0
+HEALTH_TIMEOUT = 10.0
+MAX_FILE_SIZE_MB = 10  # Maximum file size in MB for PDF/TXT uploads
+MAX_BATCH_FILE_MB = int(os.environ.get("XAI_MAX_BATCH_FILE_MB", 200))  # CSV/JSON/JSONL, parsed in chunks
+
+# Shared Ollama connection pool (kept open for the app's lifetime)
+HTTP_MAX_CONNECTIONS = int(os.environ.get("OLLAMA_MAX_CONNECTIONS", 10))
+HTTP_MAX_KEEPALIVE = int(os.environ.get("OLLAMA_MAX_KEEPALIVE", MAX_CONCURRENCY))
+HTTP_KEEPALIVE_EXPIRY = float(os.environ.get("OLLAMA_KEEPALIVE_EXPIRY", 60.0))
+# Ollama servers to spread calls over: a JSON list (or a file holding one) of
+# {"url", "weight", "max_concurrency"}. Unset means OLLAMA_URL alone.
+OLLAMA_BACKENDS = load_backends(os.environ.get("OLLAMA_BACKENDS", ""), OLLAMA_URL, HTTP_MAX_CONNECTIONS)
+# Duplicate a generation on a second backend once it runs past the first's p95
+OLLAMA_HEDGE = os.environ.get("OLLAMA_HEDGE", "0") == "1"
+
+# Answer clear-cut applicants with deterministic rules before calling the LLM
+PRESCREEN_ENABLED = True
+# Let the local scorecard make the decision; the LLM only writes the narrative
+SCORING_ENABLED = True
+
+# Decision cache (identical resubmissions skip the LLM)
+DECISION_CACHE_SIZE = 512
+DECISION_CACHE_TTL = 3600.0  # seconds
+
+# Keep the model and its KV cache resident between requests. num_ctx must
+# stay identical on every call or Ollama reloads the model.
+OLLAMA_KEEP_ALIVE = os.environ.get("OLLAMA_KEEP_ALIVE", "30m")
+OLLAMA_NUM_CTX = int(os.environ.get("OLLAMA_NUM_CTX", 4096))
+# Parallel Ollama calls are limited adaptively (AIMD on latency and
+# errors), starting here and never going above the backends' combined slots
+ADAPTIVE_INITIAL_LIMIT = int(os.environ.get("OLLAMA_INITIAL_PARALLEL", 2))
+ADAPTIVE_MAX_LIMIT = int(os.environ.get("OLLAMA_MAX_PARALLEL", sum(b.max_concurrency for b in OLLAMA_BACKENDS)))
+# Applicants in flight per batch; a little above the Ollama limit keeps
+# the scheduler's queue non-empty so the limit can keep growing
+BATCH_WINDOW = int(os.environ.get("XAI_BATCH_WINDOW", ADAPTIVE_MAX_LIMIT + 2))
+# How many times in a row the scheduler may favour a same-prefix request
+# over the oldest waiter
+PREFIX_MAX_SKIPS = 8
+
+# Policies injected per prompt once a domain has more than this many;
+# policies marked always_include come on top
+POLICY_TOP_K = 8
+
+# Prompt token budget: what num_ctx leaves after room for the answer,
+# split into per-section allowances. Sections are trimmed lowest
+# priority first (history, then policies, then applicant data).
+RESPONSE_TOKEN_RESERVE = 1024
+PROMPT_TOKEN_BUDGET = OLLAMA_NUM_CTX - RESPONSE_TOKEN_RESERVE
+PROMPT_SECTION_TOKENS = {"applicant": 1200, "domain_policies": 600, "policies": 300, "history": 500, "context": 300}
+PROMPT_TRIM_ORDER = ["history", "policies", "domain_policies", "context", "applicant"]
+# Batches pack up to PACK_SIZE small LLM-bound applicants into one
+# generation (1 turns packing off); each needs its own output room
+PACK_SIZE = int(os.environ.get("XAI_PACK_SIZE", 4))
+PACK_MAX_APPLICANT_TOKENS = 250
+PACK_RESPONSE_TOKENS = 500  # Per packed applicant
+PACK_SECTION_TOKENS = {"domain_policies": 400, "policies": 200, "history": 200}
+PACK_TRIM_ORDER = ["history", "policies", "domain_policies"]
+# Outputs are generated against a JSON schema and re-validated; invalid
+# sections are asked for again at most this many times per output, within
+# a per-domain budget of retries per output checked (plus a small burst)
+SCHEMA_MAX_RETRIES = 1
+SCHEMA_RETRY_RATIO = 0.2
+SCHEMA_RETRY_BURST = 5
+
+# Durable AI decision queue behind POST /applications and /inquiry
+JOBS_FILE = "../data/jobs.sqlite3"
+BATCHES_FILE = "../data/batches.sqlite3"  # Progress of POST /batches and bulk uploads
+BATCH_POLL_INTERVAL = 1.0  # How often a followed results stream checks for new items
+JOB_WORKERS = int(os.environ.get("XAI_JOB_WORKERS", MAX_CONCURRENCY))
+
+# Decision history is flushed to disk in the background after this many
+# new decisions, or at least this often
+AI_MEMORY_FLUSH_BATCH = 20
+AI_MEMORY_FLUSH_INTERVAL = 5.0  # seconds
 
 # File paths
 POLICIES_FILE = "../data/policies.json"
 AI_MEMORY_FILE = "../data/ai_memory.json"
-EXPLANATIONS_FILE = "../data/explanations.json"
+EXPLANATIONS_FILE = "../data/explanations.json"  # Legacy store, imported into EXPLANATIONS_DIR once
+EXPLANATIONS_DIR = "../data/explanations"  # Append-only JSONL segments
+RULES_FILE = "../data/prescreen_rules.json"  # Optional override of rules.DEFAULT_RULES
+SCORECARDS_FILE = "../data/scorecards.json"  # Built offline by `python scoring.py`
 
 # =====================================================
 # ENUM (Swagger-stable)
@@ -56,91 +156,255 @@ class DecisionType(str, Enum):
 # POLICY MEMORY (RAG-like)
 # =====================================================
 class PolicyMemory:
-    def __init__(self, file_path: str = POLICIES_FILE):
+    """
+    Policies held in memory and mirrored to ``file_path``.
+
+    Every change bumps ``version`` and re-renders the per-domain prompt
+    block once, so building a prompt never touches the disk. The file is
+    re-read only when its mtime changes (e.g. edited by hand).
+
+    Once a domain has more than ``top_k`` policies, prompts get only the
+    ``top_k`` most relevant to the applicant (BM25 over the policy text)
+    plus every policy marked ``always_include``.
+    """
+
+    DOMAINS = ("loan", "credit", "insurance", "job", "global")
+
+    def __init__(self, file_path: str = POLICIES_FILE, top_k: int = POLICY_TOP_K):
         self.file_path = file_path
+        self.top_k = top_k
+        self.version = 0
+        self._policies: Dict[str, List[Dict[str, Any]]] = {}
+        self._rendered: Dict[str, str] = {}
+        self._index = BM25Index()
+        self._mtime: Optional[int] = None
+        self._listeners: List[Callable[[], None]] = []
         self._ensure_file()
+        self._refresh()
+
+    def add_listener(self, callback: Callable[[], None]):
+        """Register a callback to run after any policy is added or removed."""
+        self._listeners.append(callback)
+
+    def _notify(self):
+        for callback in self._listeners:
+            try:
+                callback()
+            except Exception as e:
+                print(f"WARNING: Policy change listener failed: {e}")
     
     def _ensure_file(self):
         if not os.path.exists(self.file_path):
             os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
             with open(self.file_path, "w") as f:
-                json.dump({
-                    "loan": [],
-                    "credit": [],
-                    "insurance": [],
-                    "job": [],
-                    "global": []
-                }, f, indent=2)
+                json.dump({domain: [] for domain in self.DOMAINS}, f, indent=2)
     
     def _read_policies(self) -> Dict[str, List[Dict[str, Any]]]:
         try:
             with open(self.file_path, "r") as f:
                 return json.load(f)
         except (json.JSONDecodeError, FileNotFoundError):
-            return {"loan": [], "credit": [], "insurance": [], "job": [], "global": []}
+            return {domain: [] for domain in self.DOMAINS}
     
     def _write_policies(self, policies: Dict[str, List[Dict[str, Any]]]):
-        with open(self.file_path, "w") as f:
+        tmp_path = f"{self.file_path}.tmp"
+        with open(tmp_path, "w") as f:
             json.dump(policies, f, indent=2)
-    
-    def add_policy(self, domain: str, policy_text: str) -> Dict[str, Any]:
+        os.replace(tmp_path, self.file_path)
+        self._mtime = self._file_mtime()
+
+    def _file_mtime(self) -> Optional[int]:
+        try:
+            return os.stat(self.file_path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _refresh(self):
+        """Reload from disk if the file changed behind our back."""
+        mtime = self._file_mtime()
+        if mtime is not None and mtime == self._mtime:
+            return
+        self._mtime = mtime
         policies = self._read_policies()
-        if domain not in policies:
-            raise ValueError(f"Invalid domain: {domain}")
-        
-        policy_entry = {
+        self._index = BM25Index()
+        for domain, entries in policies.items():
+            for policy in entries:
+                self._index.add(domain, policy["id"], policy["text"])
+        self._changed(policies, notify=self.version > 0)
+
+    def _changed(self, policies: Dict[str, List[Dict[str, Any]]], notify: bool = True):
+        self._policies = policies
+        self.version += 1
+        global_policies = policies.get("global", [])
+        self._rendered = {
+            domain: self._render(global_policies + policies.get(domain, []))
+            for domain in policies
+        }
+        if notify:
+            self._notify()
+
+    @staticmethod
+    def _render(policies: List[Dict[str, Any]], heading: str = "APPLICABLE POLICIES AND RULES") -> str:
+        if not policies:
+            return ""
+        policy_text = f"\n\n{heading}:\n"
+        for i, policy in enumerate(policies, 1):
+            policy_text += f"{i}. {policy['text']}\n"
+        return policy_text
+
+    def _new_entry(self, policy_text: str, always_include: bool = False) -> Dict[str, Any]:
+        entry = {
             "id": str(uuid.uuid4())[:8],
             "text": policy_text,
             "created_at": datetime.now(timezone.utc).isoformat()
         }
-        policies[domain].append(policy_entry)
+        if always_include:
+            entry["always_include"] = True
+        return entry
+    
+    def add_policy(self, domain: str, policy_text: str, always_include: bool = False) -> Dict[str, Any]:
+        return self.add_policies(domain, [policy_text], always_include)[0]
+
+    def add_policies(self, domain: str, policy_texts: List[str], always_include: bool = False) -> List[Dict[str, Any]]:
+        """Add several policies with a single file write."""
+        self._refresh()
+        if domain not in self._policies:
+            raise ValueError(f"Invalid domain: {domain}")
+
+        entries = [self._new_entry(text, always_include) for text in policy_texts]
+        if not entries:
+            return []
+        policies = {**self._policies, domain: self._policies[domain] + entries}
         self._write_policies(policies)
-        return policy_entry
+        for entry in entries:
+            self._index.add(domain, entry["id"], entry["text"])
+        self._changed(policies)
+        return entries
     
     def get_policies(self, domain: Optional[str] = None) -> Dict[str, List[Dict[str, Any]]]:
-        policies = self._read_policies()
+        self._refresh()
         if domain:
-            return {domain: policies.get(domain, [])}
-        return policies
+            return {domain: list(self._policies.get(domain, []))}
+        return {name: list(entries) for name, entries in self._policies.items()}
     
     def remove_policy(self, domain: str, policy_id: str) -> bool:
-        policies = self._read_policies()
-        if domain not in policies:
+        self._refresh()
+        if domain not in self._policies:
             return False
         
-        original_length = len(policies[domain])
-        policies[domain] = [p for p in policies[domain] if p["id"] != policy_id]
-        
-        if len(policies[domain]) < original_length:
+        remaining = [p for p in self._policies[domain] if p["id"] != policy_id]
+        if len(remaining) < len(self._policies[domain]):
+            policies = {**self._policies, domain: remaining}
             self._write_policies(policies)
+            self._index.remove(domain, policy_id)
+            self._changed(policies)
             return True
         return False
     
-    def get_relevant_policies(self, domain: str) -> str:
-        """Get formatted policies for AI prompt injection"""
-        policies = self._read_policies()
-        domain_policies = policies.get(domain, [])
-        global_policies = policies.get("global", [])
-        
-        all_policies = global_policies + domain_policies
-        
-        if not all_policies:
-            return ""
-        
-        policy_text = "\n\nAPPLICABLE POLICIES AND RULES:\n"
-        for i, policy in enumerate(all_policies, 1):
-            policy_text += f"{i}. {policy['text']}\n"
-        
-        return policy_text
+    def get_relevant_policies(self, domain: str, applicant: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Get formatted policies for AI prompt injection. Without an
+        applicant (or with few policies) this is every global and domain
+        policy.
+        """
+        self._refresh()
+        candidates = self._candidates(domain)
+        if applicant is None or len(candidates) <= self.top_k:
+            return self._rendered.get(domain, self._rendered.get("global", ""))
+
+        pinned, chosen = self._select(domain, candidates, applicant)
+        # Keep catalogue order so the block reads the same as the full one
+        return self._render([
+            p for scope, p in candidates
+            if (scope, p["id"]) in pinned or (scope, p["id"]) in chosen
+        ])
+
+    def split_policies(self, domain: str, applicant: Optional[Dict[str, Any]] = None) -> Tuple[str, str]:
+        """
+        get_relevant_policies as two blocks: the part every prompt for
+        ``domain`` shares (all policies while there are few, else the
+        ``always_include`` ones), and the ones picked for this applicant.
+        Prompts put the first in their cacheable prefix.
+        """
+        self._refresh()
+        candidates = self._candidates(domain)
+        if applicant is None or len(candidates) <= self.top_k:
+            return self._rendered.get(domain, self._rendered.get("global", "")), ""
+
+        pinned, chosen = self._select(domain, candidates, applicant)
+        return (
+            self._render([p for scope, p in candidates if (scope, p["id"]) in pinned]),
+            self._render(
+                [p for scope, p in candidates if (scope, p["id"]) in chosen],
+                heading="POLICIES RELEVANT TO THIS APPLICATION"
+            )
+        )
+
+    def _candidates(self, domain: str) -> List[Tuple[str, Dict[str, Any]]]:
+        candidates = [("global", p) for p in self._policies.get("global", [])]
+        if domain != "global":
+            candidates += [(domain, p) for p in self._policies.get(domain, [])]
+        return candidates
+
+    def _select(
+        self,
+        domain: str,
+        candidates: List[Tuple[str, Dict[str, Any]]],
+        applicant: Dict[str, Any]
+    ) -> Tuple[set, List[Tuple[str, str]]]:
+        # Pinned keys, and the top_k best BM25 matches among the rest
+        pinned = {(scope, p["id"]) for scope, p in candidates if p.get("always_include")}
+        ranked = self._index.search(("global", domain), applicant_terms(applicant), self.top_k + len(pinned))
+        return pinned, [key for key in ranked if key not in pinned][:self.top_k]
+
+    def applicable_policies(self, domain: str, applicant: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Policies that bear on this applicant: every ``always_include`` one
+        plus any sharing a term with its field names or text values. Only
+        the LLM can apply these, so rules and scorecards defer when any match.
+        """
+        self._refresh()
+        candidates = self._candidates(domain)
+        if not candidates:
+            return []
+        matched = set(self._index.search(("global", domain), applicant_terms(applicant), len(candidates)))
+        return [p for scope, p in candidates if p.get("always_include") or (scope, p["id"]) in matched]
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"version": self.version, "count": sum(len(p) for p in self._policies.values())}
 
 # =====================================================
 # AI MEMORY (Decision History)
 # =====================================================
 class AIMemory:
-    def __init__(self, file_path: str = AI_MEMORY_FILE, max_decisions: int = 50):
+    """
+    Recent decisions kept in per-domain ring buffers (bounded deques).
+
+    ``get_context`` is served from memory. ``add_decision`` only appends
+    and marks the buffer dirty; the file is written by ``flush`` -- every
+    ``flush_batch`` decisions or every ``flush_interval`` seconds from the
+    background flusher -- via a temp file and an atomic rename, so a crash
+    never leaves a half-written file.
+    """
+
+    def __init__(
+        self,
+        file_path: str = AI_MEMORY_FILE,
+        max_decisions: int = 50,
+        flush_interval: float = AI_MEMORY_FLUSH_INTERVAL,
+        flush_batch: int = AI_MEMORY_FLUSH_BATCH
+    ):
         self.file_path = file_path
         self.max_decisions = max_decisions
+        self.flush_interval = flush_interval
+        self.flush_batch = flush_batch
+        self._buffers: Dict[str, deque] = {}
+        self._pending = 0
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flusher: Optional[asyncio.Task] = None
+        self._write_lock = threading.Lock()
         self._ensure_file()
+        self._load()
     
     def _ensure_file(self):
         if not os.path.exists(self.file_path):
@@ -156,32 +420,96 @@ class AIMemory:
             return {"decisions": []}
     
     def _write_memory(self, memory: Dict[str, List[Dict[str, Any]]]):
-        with open(self.file_path, "w") as f:
-            json.dump(memory, f, indent=2)
+        # Batch and periodic flushes may overlap in worker threads
+        with self._write_lock:
+            tmp_path = f"{self.file_path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(memory, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.file_path)
+
+    def _buffer(self, decision_type: str) -> deque:
+        if decision_type not in self._buffers:
+            self._buffers[decision_type] = deque(maxlen=self.max_decisions)
+        return self._buffers[decision_type]
+
+    def _load(self):
+        # The file is newest first; appending keeps that order in each deque
+        for entry in self._read_memory().get("decisions", []):
+            buffer = self._buffer(entry.get("type", ""))
+            if len(buffer) < self.max_decisions:
+                buffer.append(entry)
+
+    def _snapshot(self) -> Dict[str, List[Dict[str, Any]]]:
+        decisions = [entry for buffer in self._buffers.values() for entry in buffer]
+        decisions.sort(key=lambda d: d.get("timestamp", ""), reverse=True)
+        return {"decisions": decisions}
     
     def add_decision(self, decision_type: str, decision: str, reasoning: str):
-        memory = self._read_memory()
-        
-        decision_entry = {
+        self._buffer(decision_type).appendleft({
             "type": decision_type,
             "decision": decision,
             # Store full reasoning; we'll truncate only when building context
             "reasoning": reasoning,
             "timestamp": datetime.now(timezone.utc).isoformat()
-        }
-        
-        memory["decisions"].insert(0, decision_entry)
-        
-        # Keep only recent decisions
-        if len(memory["decisions"]) > self.max_decisions:
-            memory["decisions"] = memory["decisions"][:self.max_decisions]
-        
-        self._write_memory(memory)
+        })
+        self._pending += 1
+        if self._pending >= self.flush_batch:
+            self._schedule_flush()
+
+    def _schedule_flush(self):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop (scripts, tests): write inline
+            self.flush_sync()
+            return
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = loop.create_task(self.flush())
+
+    def flush_sync(self):
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, 0
+        try:
+            self._write_memory(self._snapshot())
+        except OSError as e:
+            self._pending += pending
+            print(f"WARNING: Could not flush AI memory: {e}")
+
+    async def flush(self):
+        """Write the buffers to disk off the event loop."""
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, 0
+        try:
+            await asyncio.to_thread(self._write_memory, self._snapshot())
+        except OSError as e:
+            self._pending += pending
+            print(f"WARNING: Could not flush AI memory: {e}")
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self):
+        """Start the background flusher on the running event loop."""
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.get_running_loop().create_task(self._flush_periodically())
+
+    async def stop(self):
+        if self._flusher is not None:
+            self._flusher.cancel()
+            self._flusher = None
+        if self._flush_task is not None and not self._flush_task.done():
+            await self._flush_task
+        await self.flush()
     
     def get_context(self, decision_type: str, limit: int = 5) -> str:
         """Get recent decision context for AI prompt"""
-        memory = self._read_memory()
-        decisions = [d for d in memory["decisions"] if d["type"] == decision_type][:limit]
+        decisions = list(islice(self._buffers.get(decision_type, ()), limit))
         
         if not decisions:
             return ""
@@ -196,57 +524,13 @@ class AIMemory:
 # Initialize memory systems
 policy_memory = PolicyMemory()
 ai_memory = AIMemory()
+# Last-resort flush for decisions made since the last background write
+atexit.register(ai_memory.flush_sync)
 
 # =====================================================
-# EXPLANATION STORE (Full AI Outputs)
+# EXPLANATION STORE (Full AI Outputs, append-only)
 # =====================================================
-class ExplanationStore:
-    def __init__(self, file_path: str = EXPLANATIONS_FILE, max_entries: int = 200):
-        self.file_path = file_path
-        self.max_entries = max_entries
-        self._ensure_file()
-
-    def _ensure_file(self):
-        if not os.path.exists(self.file_path):
-            os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
-            with open(self.file_path, "w") as f:
-                json.dump({"explanations": []}, f, indent=2)
-
-    def _read_store(self) -> Dict[str, List[Dict[str, Any]]]:
-        try:
-            with open(self.file_path, "r") as f:
-                return json.load(f)
-        except (json.JSONDecodeError, FileNotFoundError):
-            return {"explanations": []}
-
-    def _write_store(self, data: Dict[str, List[Dict[str, Any]]]):
-        with open(self.file_path, "w") as f:
-            json.dump(data, f, indent=2)
-
-    def add_explanation(self, decision_type: str, applicant: Dict[str, Any], ai_output: Dict[str, Any]) -> Dict[str, Any]:
-        data = self._read_store()
-
-        entry = {
-            "id": str(uuid.uuid4())[:8],
-            "type": decision_type,
-            "applicant": applicant,
-            "decision": ai_output.get("decision", {}),
-            "counterfactuals": ai_output.get("counterfactuals", []),
-            "fairness": ai_output.get("fairness", {}),
-            "key_metrics": ai_output.get("key_metrics", {}),
-            "timestamp": datetime.now(timezone.utc).isoformat()
-        }
-
-        data["explanations"].insert(0, entry)
-
-        if len(data["explanations"]) > self.max_entries:
-            data["explanations"] = data["explanations"][: self.max_entries]
-
-        self._write_store(data)
-        return entry
-
-
-explanation_store = ExplanationStore()
+explanation_store = ExplanationStore(EXPLANATIONS_DIR, legacy_file=EXPLANATIONS_FILE)
 
 # =====================================================
 # PROMPT
@@ -278,79 +562,212 @@ def format_as_text(data: Dict[str, Any]) -> str:
     return "\n".join(lines)
 
 
-def build_prompt(decision_type: DecisionType, applicant: Dict[str, Any]) -> str:
-    # Get relevant policies and decision history
-    policies = policy_memory.get_relevant_policies(decision_type.value)
-    history = ai_memory.get_context(decision_type.value)
-    applicant_text = format_as_text(applicant)
-    
-    return f"""
+prompt_budget = TokenBudget(PROMPT_TOKEN_BUDGET, PROMPT_SECTION_TOKENS, PROMPT_TRIM_ORDER)
+
+# Prompts are laid out stable-first so Ollama can reuse the KV cache of a
+# shared prefix: fixed instructions and schema, then the domain and the
+# policies every applicant in it gets. Whatever is picked per applicant
+# (matched policies, similar past decisions) follows, and the applicant
+# data comes strictly last.
+DECISION_OUTPUT_SCHEMA = """{
+  "decision": {
+    "status": "APPROVED or REJECTED",
+    "confidence": 0.0,
+    "reasoning": "Audit-grade explanation"
+  },
+  "counterfactuals": ["Step 1: ...", "Step 2: ...", "Step 3: ..."],
+  "fairness": {
+    "assessment": "Fair or Potentially Unfair",
+    "concerns": "One sentence summary"
+  },
+  "key_metrics": {
+    "risk_score": 0-100,
+    "approval_probability": 0.0-1.0,
+    "critical_factors": ["factor1", "factor2"]
+  }
+}"""
+
+DECISION_RULES = """If REJECTED, you MUST output between 3 and 5 clear, simple, actionable steps in the "counterfactuals" list.
+Each counterfactual item must:
+- Be a single, specific sentence.
+- Start with "Step N: " where N is 1, 2, 3, ...
+- Focus only on things the applicant can realistically change (income, savings, debt, documents, credit behaviour, etc.).
+- Avoid vague advice like "try your best" or "be responsible" and avoid technical jargon.
+If APPROVED, you may leave "counterfactuals" empty or use it for maintenance tips."""
+
+DECISION_PROMPT_PREFIX = f"""
 SYSTEM:
 You are a deterministic decision engine.
 You MUST output JSON only and strictly follow the schema.
 Never refuse. Never explain internal policies directly.
 If data is insufficient, reject conservatively.
 
+OUTPUT (STRICT JSON ONLY):
+{DECISION_OUTPUT_SCHEMA}
+
 TASK:
-Evaluate a {decision_type.value} application.
 Write a detailed, customer-friendly, multi-paragraph explanation in very simple English.
-If REJECTED, you MUST output between 3 and 5 clear, simple, actionable steps in the "counterfactuals" list.
-Each counterfactual item must:
-- Be a single, specific sentence.
-- Start with "Step N: " where N is 1, 2, 3, ...
-- Focus only on things the applicant can realistically change (income, savings, debt, documents, credit behaviour, etc.).
-- Avoid vague advice like "try your best" or "be responsible" and avoid technical jargon.
-If APPROVED, you may leave "counterfactuals" empty or use it for maintenance tips.
+{DECISION_RULES}
 Your reasoning text should be rich and specific (at least 4-6 sentences), but stay concise and focused on the applicant.
+"""
+
+
+def build_prompt(decision_type: DecisionType, applicant: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+    """Decision prompt plus its per-section token usage."""
+    # Get relevant policies and decision history
+    domain_policies, policies = policy_memory.split_policies(decision_type.value, applicant)
+    sections, usage = prompt_budget.fit({
+        "instructions": f"{DECISION_PROMPT_PREFIX}\nDOMAIN:\nEvaluate a {decision_type.value} application.",
+        "domain_policies": domain_policies,
+        "policies": policies,
+        "history": history_context(decision_type, applicant),
+        "applicant": format_as_text(applicant),
+    })
+
+    return f"""{sections["instructions"]}
+{sections["domain_policies"]}
+{sections["policies"]}
+{sections["history"]}
 
 INPUT (TEXT FORMAT):
-{applicant_text}
-{policies}
-{history}
+{sections["applicant"]}
+""", usage
+
+
+PACKED_PROMPT_PREFIX = f"""
+SYSTEM:
+You are a deterministic decision engine deciding several independent applications at once.
+You MUST output JSON only and strictly follow the schema.
+Never refuse. Never explain internal policies directly.
+If data is insufficient, reject conservatively.
+Judge every applicant on their own data only; never compare applicants.
 
 OUTPUT (STRICT JSON ONLY):
-{{
-  "decision": {{
-    "status": "APPROVED or REJECTED",
-    "confidence": 0.0,
-    "reasoning": "Audit-grade explanation"
-  }},
+{{"decisions": [one object per applicant, in order]}}
+Each object has "applicant": <the applicant's number> plus exactly these fields:
+{DECISION_OUTPUT_SCHEMA}
+
+TASK:
+For each applicant write a customer-friendly explanation in very simple English (3-5 sentences).
+{DECISION_RULES}
+"""
+
+
+def packed_history_context(decision_type: DecisionType, applicants: List[Dict[str, Any]], per_applicant: int = 2) -> str:
+    """A few nearest precedents for each packed applicant, without repeats."""
+    lines, seen = [], set()
+    for applicant in applicants:
+        for dec in precedent_index.nearest(decision_type.value, applicant, per_applicant):
+            if dec["reasoning"] not in seen:
+                seen.add(dec["reasoning"])
+                lines.append(f"{len(lines) + 1}. {dec['decision']}: {dec['reasoning']}")
+    if not lines:
+        return ai_memory.get_context(decision_type.value)
+    return "\n\nSIMILAR PAST DECISIONS:\n" + "\n".join(lines) + "\n"
+
+
+def _merged_terms(applicants: List[Dict[str, Any]]) -> Dict[str, Any]:
+    # One pseudo-applicant whose fields and text cover the whole pack, for policy retrieval
+    merged: Dict[str, Any] = {}
+    for applicant in applicants:
+        for key, value in applicant.items():
+            if isinstance(value, str) and isinstance(merged.get(key), str):
+                merged[key] = f"{merged[key]} {value}"
+            else:
+                merged.setdefault(key, value)
+    return merged
+
+
+def build_packed_prompt(decision_type: DecisionType, applicants: List[Dict[str, Any]]) -> Tuple[str, Dict[str, Any]]:
+    """One prompt deciding several applicants, plus its token usage."""
+    budget = TokenBudget(
+        OLLAMA_NUM_CTX - PACK_RESPONSE_TOKENS * len(applicants), PACK_SECTION_TOKENS, PACK_TRIM_ORDER
+    )
+    domain_policies, policies = policy_memory.split_policies(decision_type.value, _merged_terms(applicants))
+    sections, usage = budget.fit({
+        "instructions": f"{PACKED_PROMPT_PREFIX}\nDOMAIN:\nEvaluate {len(applicants)} {decision_type.value} applications.",
+        "domain_policies": domain_policies,
+        "policies": policies,
+        "history": packed_history_context(decision_type, applicants),
+        "applicants": "\n\n".join(
+            f"APPLICANT {i}:\n{format_as_text(applicant)}" for i, applicant in enumerate(applicants, 1)
+        ),
+    })
+    usage["pack_size"] = len(applicants)
+
+    return f"""{sections["instructions"]}
+{sections["domain_policies"]}
+{sections["policies"]}
+{sections["history"]}
+
+INPUT (TEXT FORMAT):
+{sections["applicants"]}
+""", usage
+
+
+NARRATIVE_PROMPT_PREFIX = """
+SYSTEM:
+You are an explainable AI assistant writing the customer explanation for a decision that has ALREADY been made.
+You MUST output JSON only and strictly follow the schema.
+Do not change or question the decision.
+
+OUTPUT (STRICT JSON ONLY):
+{
+  "reasoning": "Customer-friendly explanation of the decision",
   "counterfactuals": ["Step 1: ...", "Step 2: ...", "Step 3: ..."],
-  "fairness": {{
+  "fairness": {
     "assessment": "Fair or Potentially Unfair",
     "concerns": "One sentence summary"
-  }},
-  "key_metrics": {{
-    "risk_score": 0-100,
-    "approval_probability": 0.0-1.0,
-    "critical_factors": ["factor1", "factor2"]
-  }}
-}}
+  }
+}
+
+TASK:
+Write a detailed, customer-friendly, multi-paragraph explanation in very simple English (at least 4-6 sentences).
+In the factor list, + means the factor helped the application, - means it counted against it.
+If REJECTED, output between 3 and 5 actionable steps in "counterfactuals", each starting with "Step N: ".
+If APPROVED, you may leave "counterfactuals" empty or use it for maintenance tips.
 """
 
+
+def build_narrative_prompt(
+    decision_type: DecisionType,
+    applicant: Dict[str, Any],
+    scored: Dict[str, Any]
+) -> Tuple[str, Dict[str, Any]]:
+    """Prompt for explaining a decision the scorecard has already made, plus its token usage."""
+    factors = ", ".join(scored["key_metrics"]["critical_factors"]) or "overall profile"
+    sections, usage = prompt_budget.fit({
+        "instructions": f"{NARRATIVE_PROMPT_PREFIX}\nDOMAIN:\nExplain a {decision_type.value} decision.",
+        "history": history_context(decision_type, applicant),
+        "context": f"DECISION: {scored['status']}\nMOST IMPORTANT FACTORS: {factors}",
+        "applicant": format_as_text(applicant),
+    })
+
+    return f"""{sections["instructions"]}
+{sections["history"]}
+
+{sections["context"]}
+
+INPUT (TEXT FORMAT):
+{sections["applicant"]}
+""", usage
+
 # =====================================================
 # OVERRIDE PROMPT
 # =====================================================
-def build_override_prompt(
-    decision_type: DecisionType,
-    applicant: Dict[str, Any],
-    ai_recommendation: str,
-    agent_decision: str,
-    agent_comment: Optional[str] = None
-) -> str:
-    return f"""
+OVERRIDE_PROMPT_PREFIX = """
 SYSTEM:
 You are an explainable AI system helping to explain why a human agent overrode your recommendation.
 You MUST output JSON only.
 
-CONTEXT:
-- Application Type: {decision_type.value}
-- Your AI Recommendation: {ai_recommendation}
-- Agent's Final Decision: {agent_decision}
-- Agent's Comment: {agent_comment or "None provided"}
-
-APPLICANT DATA:
-{json.dumps(applicant, indent=2)}
+OUTPUT (STRICT JSON ONLY):
+{
+  "summary": "Brief explanation of the override decision",
+  "detailed_reasoning": "Comprehensive explanation",
+  "next_steps": ["step1", "step2"],
+  "conditions": ["condition1", "condition2"],
+  "override_context": "Why the human decision differed from AI"
+}
 
 TASK:
 Generate a customer-friendly explanation for why the agent overrode your recommendation.
@@ -359,44 +776,51 @@ Include:
 2. Reasoning for the agent's decision
 3. Next steps for the customer
 4. Conditions or requirements if applicable
+"""
 
-OUTPUT (STRICT JSON ONLY):
-{{
-  "summary": "Brief explanation of the override decision",
-  "detailed_reasoning": "Comprehensive explanation",
-  "next_steps": ["step1", "step2"],
-  "conditions": ["condition1", "condition2"],
-  "override_context": "Why the human decision differed from AI"
-}}
+
+def build_override_prompt(
+    decision_type: DecisionType,
+    applicant: Dict[str, Any],
+    ai_recommendation: str,
+    agent_decision: str,
+    agent_comment: Optional[str] = None
+) -> str:
+    sections, _ = prompt_budget.fit({
+        "instructions": OVERRIDE_PROMPT_PREFIX,
+        "context": f"""CONTEXT:
+- Application Type: {decision_type.value}
+- Your AI Recommendation: {ai_recommendation}
+- Agent's Final Decision: {agent_decision}
+- Agent's Comment: {agent_comment or "None provided"}""",
+        "applicant": format_as_text(applicant),
+    })
+
+    return f"""{sections["instructions"]}
+{sections["context"]}
+
+APPLICANT DATA:
+{sections["applicant"]}
 """
 
 # =====================================================
 # JSON EXTRACTION (CRASH-PROOF)
 # =====================================================
-def extract_json(text: str) -> Dict[str, Any]:
-    # Try multiple regex patterns for robustness
-    patterns = [
-        r"\{.*\}",  # Standard pattern
-        r"```json\s*(\{.*?\})\s*```",  # Markdown code block
-        r"```\s*(\{.*?\})\s*```",  # Generic code block
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, text, re.DOTALL)
-        if match:
-            try:
-                json_str = match.group(1) if len(match.groups()) > 0 else match.group()
-                return json.loads(json_str)
-            except json.JSONDecodeError:
-                continue
-    
-    # Fallback response
-    print(f"DEBUG: Parsing failed for text: {text[:200]}")
+FALLBACK_REASONING = "Model output invalid or incomplete - System Error"
+
+
+# How model outputs parsed: clean, repaired, truncated, invalid, no_json, empty;
+# call_failed counts calls that never returned output to parse
+json_parse_stats: Dict[str, int] = {}
+
+
+def fallback_output() -> Dict[str, Any]:
+    """Canned REJECTED output used when the model's answer is unusable."""
     return {
         "decision": {
             "status": "REJECTED",
             "confidence": 0.5,
-            "reasoning": "Model output invalid or incomplete - System Error"
+            "reasoning": FALLBACK_REASONING
         },
         "counterfactuals": [
             "Ensure all application fields are filled correctly.",
@@ -415,6 +839,31 @@ def extract_json(text: str) -> Dict[str, Any]:
     }
 
 
+def call_failed_output() -> Dict[str, Any]:
+    """fallback_output() for an Ollama call that failed outright (no model output)."""
+    json_parse_stats["call_failed"] = json_parse_stats.get("call_failed", 0) + 1
+    return fallback_output()
+
+
+def extract_json(text: str, scanner: Optional[JSONScanner] = None) -> Dict[str, Any]:
+    """
+    The JSON object in model output, repaired if needed (see JSONScanner),
+    or fallback_output(). Pass the ``scanner`` a stream was already fed
+    through to avoid scanning ``text`` again.
+    """
+    if scanner is None:
+        scanner = JSONScanner()
+        scanner.feed(text)
+    value, outcome = scanner.result()
+    json_parse_stats[outcome] = json_parse_stats.get(outcome, 0) + 1
+    if isinstance(value, dict):
+        return value
+
+    if outcome != "empty":
+        print(f"DEBUG: Parsing failed ({outcome}) for text: {text[:200]}")
+    return fallback_output()
+
+
 def normalize_counterfactuals(raw_cf: Any) -> List[str]:
     """Clean and standardize counterfactual list coming back from the model."""
     cleaned: List[str] = []
@@ -448,37 +897,888 @@ def normalize_counterfactuals(raw_cf: Any) -> List[str]:
     return cleaned
 
 # =====================================================
-# OLLAMA CALL (NEVER CRASHES)
+# PRECEDENT INDEX (Nearest past decisions)
+# =====================================================
+precedent_index = PrecedentIndex(MAX_PRECEDENTS)
+
+
+def seed_precedents():
+    """Rebuild the index from the explanation store, oldest first."""
+    for domain in DecisionType:
+        stored = list(explanation_store.query(domain.value, limit=MAX_PRECEDENTS))
+        precedent_index.seed(
+            entry for entry in reversed(stored)
+            if (entry.get("decision") or {}).get("reasoning") != FALLBACK_REASONING
+        )
+
+
+seed_precedents()
+
+
+def history_context(decision_type: DecisionType, applicant: Dict[str, Any], limit: int = 5) -> str:
+    """Most similar past decisions for the prompt; most recent ones until there are any."""
+    precedents = precedent_index.nearest(decision_type.value, applicant, limit)
+    if not precedents:
+        return ai_memory.get_context(decision_type.value, limit)
+
+    context = "\n\nSIMILAR PAST DECISIONS:\n"
+    for i, dec in enumerate(precedents, 1):
+        context += f"{i}. {dec['decision']}: {dec['reasoning']}\n"
+    return context
+
+# =====================================================
+# HTTP CLIENT (POOLED, APP-LIFETIME)
+# =====================================================
+class OllamaClient:
+    """
+    One httpx.AsyncClient shared by every Ollama call, so requests reuse
+    keep-alive connections instead of paying TCP setup each time.
+
+    Opened on app startup and closed on shutdown; scripts that call
+    ai_decision directly get a client lazily on first use.
+
+    Each call goes to the backend the router picks. With ``hedge`` on, a
+    generation still running after its backend's p95 is sent to a second
+    backend too; the first answer wins and the other call is cancelled.
+    """
+
+    def __init__(
+        self,
+        backends: Optional[List[Backend]] = None,
+        hedge: bool = OLLAMA_HEDGE,
+        max_connections: int = HTTP_MAX_CONNECTIONS,
+        max_keepalive: int = HTTP_MAX_KEEPALIVE,
+        keepalive_expiry: float = HTTP_KEEPALIVE_EXPIRY,
+        connect_timeout: float = CONNECT_TIMEOUT,
+        read_timeout: float = REQUEST_TIMEOUT
+    ):
+        self.router = BackendRouter(backends if backends is not None else OLLAMA_BACKENDS)
+        self.hedge = hedge
+        self.limits = httpx.Limits(
+            # Every backend slot needs its own connection
+            max_connections=max(max_connections, self.router.capacity),
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._closer: Optional[asyncio.Task] = None
+        self.stats = {
+            "calls": 0,
+            "errors": 0,
+            "hedges": 0,
+            "hedge_wins": 0,
+            "total_seconds": 0.0,
+            "prompt_eval_tokens": 0,
+            "prompt_eval_seconds": 0.0
+        }
+
+    def open(self) -> httpx.AsyncClient:
+        # A client is bound to the loop it was created on; scripts that call
+        # asyncio.run() more than once need a fresh one per loop
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if self._client is None or self._client.is_closed or self._loop is not loop:
+            self._retire()
+            self._client = httpx.AsyncClient(limits=self.limits, timeout=self.timeout)
+            self._loop = loop
+            if loop is not None:
+                # asyncio.run() cancels leftover tasks before closing its loop,
+                # which lets this one close the client while the loop still works
+                self._closer = loop.create_task(self._close_when_cancelled(self._client))
+        return self._client
+
+    def _retire(self):
+        """Close a client left behind by another event loop instead of leaking its connections."""
+        client, loop, closer = self._client, self._loop, self._closer
+        self._closer = None
+        if client is None or client.is_closed:
+            return
+        if loop is not None and loop.is_running():
+            # Still serving another thread: close it over there
+            if closer is not None:
+                loop.call_soon_threadsafe(closer.cancel)
+            else:
+                asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+        elif closer is not None:
+            closer.cancel()  # Runs the close whenever that loop next runs
+
+    @staticmethod
+    async def _close_when_cancelled(client: httpx.AsyncClient):
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await client.aclose()
+
+    async def close(self):
+        if self._closer is not None:
+            self._closer.cancel()
+            self._closer = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def generate(self, payload: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+        """POST to /api/generate and return the decoded body. Raises on failure."""
+        client = self.open()
+        self.stats["calls"] += 1
+        started = time.perf_counter()
+        try:
+            backend = await self.router.acquire()
+            tried = []
+            while True:
+                delay = self.router.hedge_delay(backend) if self.hedge else None
+                try:
+                    if delay is None:
+                        body = await self._post(client, backend, payload, timeout)
+                    else:
+                        body = await self._hedged(client, backend, delay, payload, timeout)
+                    break
+                except httpx.ConnectError:
+                    # The request never reached the server, so another backend can take it
+                    tried.append(backend)
+                    if len(tried) == len(self.router.backends):
+                        raise
+                    backend = await self.router.acquire(exclude=tried)
+            self._record_eval(body)
+            return body
+        except Exception:
+            self.stats["errors"] += 1
+            raise
+        finally:
+            self.stats["total_seconds"] += time.perf_counter() - started
+
+    async def _post(
+        self,
+        client: httpx.AsyncClient,
+        backend: Backend,
+        payload: Dict[str, Any],
+        timeout: Optional[float]
+    ) -> Dict[str, Any]:
+        started = time.perf_counter()
+        ok, body = None, {}
+        try:
+            response = await client.post(
+                backend.url,
+                json=payload,
+                timeout=timeout if timeout is not None else httpx.USE_CLIENT_DEFAULT
+            )
+            response.raise_for_status()
+            body = response.json()
+            ok = True
+            return body
+        except Exception:
+            ok = False
+            raise
+        finally:
+            # Cancelled (lost a hedge, client went away) leaves ok None
+            self.router.release(backend, time.perf_counter() - started, ok, body.get("eval_count"))
+
+    async def _hedged(
+        self,
+        client: httpx.AsyncClient,
+        backend: Backend,
+        delay: float,
+        payload: Dict[str, Any],
+        timeout: Optional[float]
+    ) -> Dict[str, Any]:
+        primary = asyncio.ensure_future(self._post(client, backend, payload, timeout))
+        tasks = [primary]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done:
+                return primary.result()
+            second = self.router.try_acquire(exclude=(backend,))
+            if second is None:
+                return await primary  # Nowhere free to hedge to
+            self.stats["hedges"] += 1
+            hedge = asyncio.ensure_future(self._post(client, second, payload, timeout))
+            tasks.append(hedge)
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.stats["hedge_wins"] += 1
+                        return task.result()
+            return primary.result()  # Both failed: raise the original error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def stream_generate(self, payload: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        """POST with ``stream: true`` and yield each NDJSON chunk Ollama sends."""
+        client = self.open()
+        self.stats["calls"] += 1
+        started = time.perf_counter()
+        backend, posted, ok, tokens = None, started, None, None
+        try:
+            backend = await self.router.acquire()
+            posted = time.perf_counter()
+            async with client.stream("POST", backend.url, json={**payload, "stream": True}) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if line.strip():
+                        chunk = json.loads(line)
+                        if chunk.get("done"):
+                            self._record_eval(chunk)
+                            tokens = chunk.get("eval_count")
+                        yield chunk
+            ok = True
+        except Exception:
+            ok = False
+            self.stats["errors"] += 1
+            raise
+        finally:
+            if backend is not None:
+                self.router.release(backend, time.perf_counter() - posted, ok, tokens)
+            self.stats["total_seconds"] += time.perf_counter() - started
+
+    def _record_eval(self, body: Dict[str, Any]):
+        # Ollama reports durations in nanoseconds
+        self.stats["prompt_eval_tokens"] += body.get("prompt_eval_count", 0) or 0
+        self.stats["prompt_eval_seconds"] += (body.get("prompt_eval_duration", 0) or 0) / 1e9
+
+    def snapshot(self) -> Dict[str, Any]:
+        calls = self.stats["calls"]
+        return {
+            **self.stats,
+            "avg_seconds": round(self.stats["total_seconds"] / calls, 3) if calls else 0.0,
+            "avg_prompt_eval_seconds": round(self.stats["prompt_eval_seconds"] / calls, 3) if calls else 0.0
+        }
+
+
+ollama_client = OllamaClient()
+
+
+@app.on_event("startup")
+async def open_ollama_client():
+    ollama_client.open()
+    ai_memory.start()
+
+
+@app.on_event("shutdown")
+async def close_ollama_client():
+    await ollama_client.close()
+    await ai_memory.stop()
+
+# =====================================================
+# SCHEDULER (PREFIX-AWARE CONCURRENCY GATE)
+# =====================================================
+class PrefixScheduler:
+    """
+    Adaptive concurrency gate for Ollama calls. When a slot frees up it
+    prefers a queued request with the same prefix key (domain) as the last
+    one dispatched, so consecutive calls share a warm prompt prefix.
+    After PREFIX_MAX_SKIPS such jumps the oldest waiter goes next.
+
+    The number of slots comes from an AIMDLimit fed with each call's
+    latency and outcome, so it tracks what the model server can actually
+    run in parallel.
+    """
+
+    def __init__(self, controller: AIMDLimit, max_skips: int = PREFIX_MAX_SKIPS):
+        self.controller = controller
+        self.max_skips = max_skips
+        self.in_flight = 0
+        self._waiters: List[Tuple[Optional[str], asyncio.Future]] = []
+        self._last_key: Optional[str] = None
+        self._skips = 0
+
+    @property
+    def limit(self) -> int:
+        return max(1, int(self.controller.limit))
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(1 for _, future in self._waiters if not future.done())
+
+    async def acquire(self, key: Optional[str] = None):
+        if self.in_flight < self.limit and not self._waiters:
+            self.in_flight += 1
+            self._last_key = key
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append((key, future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted a slot just as we were cancelled; hand it back
+                self.release()
+            raise
+
+    def release(self, latency: Optional[float] = None, ok: bool = True):
+        self.in_flight -= 1
+        if latency is not None or not ok:
+            self.controller.record(latency, ok, saturated=self.queue_depth > 0)
+        self._wake()
+
+    def _pick(self) -> int:
+        if self._skips < self.max_skips:
+            for i, (key, _) in enumerate(self._waiters):
+                if key is not None and key == self._last_key:
+                    self._skips = self._skips + 1 if i > 0 else 0
+                    return i
+        self._skips = 0
+        return 0
+
+    def _wake(self):
+        while self.in_flight < self.limit and self._waiters:
+            key, future = self._waiters.pop(self._pick())
+            if future.done():
+                continue  # Waiter was cancelled
+            self.in_flight += 1
+            self._last_key = key
+            future.set_result(None)
+
+    @asynccontextmanager
+    async def slot(self, key: Optional[str] = None):
+        """
+        Hold one slot. The caller may set ``call["ok"] = False`` on failure
+        and ``call["tokens"]`` to the generated token count, so latency is
+        judged per token.
+        """
+        await self.acquire(key)
+        call: Dict[str, Any] = {"ok": True, "tokens": None}
+        started = time.monotonic()
+        completed = False
+        try:
+            yield call
+            completed = True
+        except Exception:
+            call["ok"] = False
+            raise
+        finally:
+            if not call["ok"]:
+                self.release(ok=False)
+            elif completed:
+                elapsed = time.monotonic() - started
+                self.release(elapsed / call["tokens"] if call["tokens"] else elapsed)
+            else:
+                self.release()  # Cancelled or abandoned stream: no sample
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"in_flight": self.in_flight, "queue_depth": self.queue_depth, **self.controller.snapshot()}
+
+
+ai_scheduler = PrefixScheduler(AIMDLimit(
+    initial=ADAPTIVE_INITIAL_LIMIT,
+    min_limit=1,
+    max_limit=ADAPTIVE_MAX_LIMIT
+))
+
+
+def ollama_payload(prompt: str, **extra) -> Dict[str, Any]:
+    """Generate request with the settings that keep the model and prefix cache warm."""
+    return {
+        "model": MODEL_NAME,
+        "prompt": prompt,
+        "keep_alive": OLLAMA_KEEP_ALIVE,
+        "options": {"num_ctx": OLLAMA_NUM_CTX},
+        **extra
+    }
+
+# =====================================================
+# OLLAMA CALL (NEVER CRASHES)
+# =====================================================
+async def call_ai(
+    prompt: str,
+    prefix_key: Optional[str] = None,
+    schema: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    async with ai_scheduler.slot(prefix_key) as call:
+        try:
+            print(f"DEBUG: Call AI with model {MODEL_NAME}...")
+            body = await ollama_client.generate(ollama_payload(
+                prompt,
+                stream=False,
+                # Structured output constrained to the schema, else plain JSON mode
+                format=schema or "json"
+            ))
+            call["tokens"] = body.get("eval_count")
+        except Exception as e:
+            print(f"ERROR: AI Call Failed: {e}")
+            call["ok"] = False
+            return call_failed_output()
+
+    raw = body.get("response", "")
+    print(f"DEBUG: AI Output: {raw[:100]}...") # Print first 100 chars
+    return extract_json(raw)
+
+
+validation_stats = ValidationStats(SCHEMA_RETRY_RATIO, SCHEMA_RETRY_BURST)
+
+
+def is_fallback(output: Dict[str, Any]) -> bool:
+    decision = output.get("decision")
+    return isinstance(decision, dict) and decision.get("reasoning") == FALLBACK_REASONING
+
+
+def build_section_retry_prompt(prompt: str, invalid: Dict[str, List[str]]) -> str:
+    # Appended to the original prompt so the cached prefix still applies
+    problems = "\n".join(f"- {error}" for errors in invalid.values() for error in errors[:3])
+    return f"""{prompt}
+YOUR PREVIOUS ANSWER HAD INVALID OR MISSING FIELDS:
+{problems}
+
+Output JSON containing ONLY these fields, corrected: {", ".join(invalid)}
+"""
+
+
+async def check_sections(
+    prompt: str,
+    output: Dict[str, Any],
+    schema: Dict[str, Any],
+    prefix_key: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Validate ``output`` against ``schema`` and ask again for just the
+    invalid top-level sections, within the retry budget. Sections still
+    invalid afterwards are dropped so the callers' defaults apply.
+    """
+    if is_fallback(output):
+        return output  # The call itself failed; job-level retries handle that
+    domain = prefix_key or "default"
+    invalid = invalid_sections(output, schema)
+    validation_stats.record_output(domain, bool(invalid))
+    retried = False
+    for _ in range(SCHEMA_MAX_RETRIES):
+        if not invalid or not validation_stats.take_retry(domain):
+            break
+        retried = True
+        print(f"DEBUG: Re-asking for invalid sections {list(invalid)} ({domain})")
+        patch = await call_ai(build_section_retry_prompt(prompt, invalid), prefix_key, section_schema(schema, invalid))
+        if is_fallback(patch):
+            break
+        for name in invalid:
+            if name in patch:
+                output[name] = patch[name]
+        invalid = invalid_sections(output, schema)
+    validation_stats.record_result(domain, not invalid, retried)
+    for name in invalid:
+        output.pop(name, None)
+    return output
+
+
+async def call_ai_checked(prompt: str, schema: Dict[str, Any], prefix_key: Optional[str] = None) -> Dict[str, Any]:
+    """call_ai constrained to ``schema``, with invalid sections retried (check_sections)."""
+    output = await call_ai(prompt, prefix_key, schema)
+    return await check_sections(prompt, output, schema, prefix_key)
+
+
+REASONING_PATTERN = re.compile(r'"reasoning"\s*:\s*"((?:[^"\\]|\\.)*)')
+
+
+def partial_reasoning(buffer: str) -> str:
+    """Best-effort decode of the (possibly unfinished) reasoning string in a partial JSON buffer."""
+    match = REASONING_PATTERN.search(buffer)
+    if not match:
+        return ""
+    text = match.group(1)
+    try:
+        return json.loads(f'"{text}"')
+    except json.JSONDecodeError:
+        # Cut inside a \uXXXX escape; the next chunk will complete it
+        return text
+
+
+async def call_ai_stream(
+    prompt: str,
+    prefix_key: Optional[str] = None,
+    schema: Optional[Dict[str, Any]] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Streaming variant of call_ai. Yields ``{"type": "token", "text": ...}`` per
+    chunk, ``{"type": "reasoning", "text": ...}`` whenever the partial reasoning
+    grows, and finally ``{"type": "result", "output": ...}`` with the parsed JSON.
+    """
+    buffer = ""
+    reasoning = ""
+    scanner = JSONScanner()
+    async with ai_scheduler.slot(prefix_key) as call:
+        try:
+            print(f"DEBUG: Stream AI with model {MODEL_NAME}...")
+            async for chunk in ollama_client.stream_generate(ollama_payload(prompt, format=schema or "json")):
+                token = chunk.get("response", "")
+                if token:
+                    buffer += token
+                    scanner.feed(token)
+                    yield {"type": "token", "text": token}
+                    current = partial_reasoning(buffer)
+                    if len(current) > len(reasoning):
+                        reasoning = current
+                        yield {"type": "reasoning", "text": reasoning}
+                if chunk.get("done"):
+                    call["tokens"] = chunk.get("eval_count")
+                    break
+        except Exception as e:
+            print(f"ERROR: AI Stream Failed: {e}")
+            call["ok"] = False
+            yield {"type": "result", "output": call_failed_output()}
+            return
+
+    print(f"DEBUG: AI Output: {buffer[:100]}...")
+    yield {"type": "result", "output": extract_json(buffer, scanner)}
+
+# =====================================================
+# DECISION CACHE (LRU + TTL, COALESCED)
+# =====================================================
+# Per-submission fields that do not change the decision
+CACHE_IGNORED_FIELDS = {"created_at", "timestamp", "submitted_at"}
+
+
+def _canonical_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {
+            str(k).strip().lower(): _canonical_value(v)
+            for k, v in value.items()
+            if v is not None and not (isinstance(v, float) and math.isnan(v))
+        }
+    if isinstance(value, list):
+        return [_canonical_value(v) for v in value]
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str):
+        return value.strip()
+    return value
+
+
+class DecisionCache:
+    """
+    Bounded LRU cache of finished decisions with a TTL.
+
+    Keys hash the canonical applicant payload together with the decision
+    type, MODEL_NAME and the policy text the prompt would contain, so a
+    policy or model change never serves a stale decision. Concurrent
+    requests for the same key share one in-flight LLM call.
+    """
+
+    def __init__(self, max_entries: int = DECISION_CACHE_SIZE, ttl_seconds: float = DECISION_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "evictions": 0, "invalidations": 0}
+
+    def key(self, decision_type: DecisionType, applicant: Dict[str, Any]) -> str:
+        payload = {k: v for k, v in applicant.items() if k not in CACHE_IGNORED_FIELDS}
+        material = json.dumps({
+            "type": decision_type.value,
+            "model": MODEL_NAME,
+            "policies": policy_memory.get_relevant_policies(decision_type.value),
+            "applicant": _canonical_value(payload)
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, result = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return result
+
+    def put(self, key: str, result: Dict[str, Any]):
+        # Never cache the canned fallback produced by a failed generation
+        if result.get("decision", {}).get("reasoning") == FALLBACK_REASONING:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, copy.deepcopy(result))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Any]) -> Dict[str, Any]:
+        cached = self.get(key)
+        if cached is not None:
+            self.stats["hits"] += 1
+            return self._as_hit(cached)
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.stats["coalesced"] += 1
+            return self._as_hit(await asyncio.shield(inflight))
+
+        self.stats["misses"] += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await compute()
+            self.put(key, result)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark retrieved so a failure nobody else awaited is not logged as unhandled
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+
+    def reserve(self, key: str) -> asyncio.Future:
+        """
+        Mark ``key`` as being computed outside get_or_compute (a packed
+        generation), so get_or_compute callers wait for ``resolve``.
+        """
+        self.stats["misses"] += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        return future
+
+    def resolve(self, key: str, result: Optional[Dict[str, Any]] = None, error: Optional[BaseException] = None):
+        """Finish a reserved key with its result (cached) or an error."""
+        future = self._inflight.pop(key, None)
+        if error is None:
+            self.put(key, result)
+        if future is None or future.done():
+            return
+        if error is None:
+            future.set_result(result)
+        else:
+            future.set_exception(error)
+            future.exception()
+
+    def abandon(self, key: str, future: asyncio.Future, error: BaseException):
+        """Fail a reservation still pending, e.g. after its pack was cancelled."""
+        if self._inflight.get(key) is future:
+            self.resolve(key, error=error)
+
+    def has(self, key: str) -> bool:
+        """Cached or currently being computed."""
+        return key in self._inflight or self.get(key) is not None
+
+    def _as_hit(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        hit = copy.deepcopy(result)
+        hit.setdefault("audit", {})["cache"] = "hit"
+        return hit
+
+    def invalidate(self):
+        self._entries.clear()
+        self.stats["invalidations"] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"] + self.stats["coalesced"]
+        return {
+            **self.stats,
+            "size": len(self._entries),
+            "hit_rate": round((self.stats["hits"] + self.stats["coalesced"]) / lookups, 3) if lookups else 0.0
+        }
+
+
+decision_cache = DecisionCache()
+policy_memory.add_listener(decision_cache.invalidate)
+
+# =====================================================
+# RULES PRE-SCREEN (CLEAR-CUT CASES SKIP THE LLM)
+# =====================================================
+rules_engine = RulesEngine(RULES_FILE)
+
+
+def prescreen(decision_type: DecisionType, applicant: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Finished decision for a clear-cut applicant, or None to use the LLM.
+
+    Free-text policies can only be applied by the model, so an applicant
+    that any policy bears on always goes to the LLM.
+    """
+    if not PRESCREEN_ENABLED:
+        return None
+    if policy_memory.applicable_policies(decision_type.value, applicant):
+        return None
+    ai_output = rules_engine.evaluate(decision_type.value, applicant)
+    if ai_output is None:
+        return None
+    return finalize_decision(decision_type, applicant, ai_output, engine="rules-prescreen")
+
+# =====================================================
+# LOCAL SCORING (DECISION WITHOUT THE LLM)
+# =====================================================
+scorer = Scorer(SCORECARDS_FILE)
+
+
+def score_applicant(decision_type: DecisionType, applicant: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Scorecard decision, or None when there is no usable model or a policy bears on the applicant."""
+    if not SCORING_ENABLED or policy_memory.applicable_policies(decision_type.value, applicant):
+        return None
+    return scorer.score(decision_type.value, applicant)
+
+
+def decided_locally(decision_type: DecisionType, applicant: Dict[str, Any]) -> bool:
+    """
+    Whether prescreen or score_applicant would decide this applicant.
+    Nothing is finalized, recorded or counted, so routing a row does not
+    log a decision that ai_decision then makes again.
+    """
+    if policy_memory.applicable_policies(decision_type.value, applicant):
+        return False
+    if PRESCREEN_ENABLED and rules_engine.decides(decision_type.value, applicant):
+        return True
+    return SCORING_ENABLED and scorer.covers(decision_type.value, applicant)
+
+
+def merge_narrative(scored: Dict[str, Any], narrative: Dict[str, Any]) -> Dict[str, Any]:
+    """Combine the scorecard's decision with the LLM's narrative into the usual output shape."""
+    reasoning = narrative.get("reasoning")
+    if not isinstance(reasoning, str) or not reasoning.strip():
+        # extract_json's fallback nests its text under "decision"; never use that
+        # canned REJECTED text for a model-made decision
+        factors = ", ".join(scored["key_metrics"]["critical_factors"]) or "your overall profile"
+        reasoning = f"This application was {scored['status'].lower()} based mainly on: {factors}."
+    return {
+        "decision": {
+            "status": scored["status"],
+            "confidence": scored["confidence"],
+            "reasoning": reasoning
+        },
+        "counterfactuals": narrative.get("counterfactuals", []),
+        "fairness": narrative.get("fairness") or {"assessment": "Unknown", "concerns": "No narrative generated"},
+        "key_metrics": scored["key_metrics"]
+    }
+
+# =====================================================
+# DECISION ENGINE
 # =====================================================
-async def call_ai(prompt: str) -> Dict[str, Any]:
-    async with semaphore:
-        async with httpx.AsyncClient(timeout=300.0) as client: # Increased timeout for older hardware
-            try:
-                print(f"DEBUG: Call AI with model {MODEL_NAME}...")
-                response = await client.post(
-                    OLLAMA_URL,
-                    json={
-                        "model": MODEL_NAME, 
-                        "prompt": prompt, 
-                        "stream": False,
-                        "format": "json"  # FORCE JSON MODE
-                    }
-                )
-                response.raise_for_status()
-            except Exception as e:
-                print(f"ERROR: AI Call Failed: {e}")
-                return extract_json("")
+async def ai_decision(decision_type: DecisionType, applicant: Dict[str, Any], queue_narrative: bool = True):
+    """
+    Decide one applicant. A scorecard decision comes back at once with
+    ``narrative: "pending"`` and templated reasoning; a background job has
+    the LLM write the narrative into the cache (and, via
+    _decide_application, into the stored application). Pass
+    ``queue_narrative=False`` to queue that job yourself.
+    """
+    screened = prescreen(decision_type, applicant)
+    if screened is not None:
+        return screened
 
-    raw = response.json().get("response", "")
-    print(f"DEBUG: AI Output: {raw[:100]}...") # Print first 100 chars
-    return extract_json(raw)
+    key = decision_cache.key(decision_type, applicant)
+    result = await decision_cache.get_or_compute(
+        key, lambda: _run_decision(decision_type, applicant)
+    )
+    # A hit may come from an earlier submission with different ignored fields
+    result["applicant"] = applicant
+    if queue_narrative and result.get("narrative") == "pending":
+        enqueue_narrative(decision_type, result)
+    return result
 
-# =====================================================
-# DECISION ENGINE
-# =====================================================
-async def ai_decision(decision_type: DecisionType, applicant: Dict[str, Any]):
-    ai_output = await call_ai(build_prompt(decision_type, applicant))
-    
+
+async def _run_decision(decision_type: DecisionType, applicant: Dict[str, Any]) -> Dict[str, Any]:
+    scored = score_applicant(decision_type, applicant)
+    if scored is not None:
+        # The LLM only explains this decision, so it need not wait for it
+        result = finalize_decision(decision_type, applicant, merge_narrative(scored, {}), engine="scorecard")
+        result["narrative"] = "pending"
+        return result
+
+    prompt, usage = build_prompt(decision_type, applicant)
+    ai_output = await call_ai_checked(prompt, DECISION_SCHEMA, prefix_key=decision_type.value)
+    return finalize_decision(decision_type, applicant, ai_output, prompt_tokens=usage)
+
+
+async def narrate_decision(decision_type: DecisionType, result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    ``result`` (a pending scorecard decision) with the LLM's narrative
+    merged in. Raises RetryJob when the model gave no usable narrative.
+    """
+    scored = {
+        "status": result["decision"]["status"],
+        "confidence": result["decision"]["confidence"],
+        "key_metrics": result["key_metrics"]
+    }
+    prompt, usage = build_narrative_prompt(decision_type, result["applicant"], scored)
+    narrative = await call_ai_checked(prompt, NARRATIVE_SCHEMA, prefix_key=f"narrative:{decision_type.value}")
+    if is_fallback(narrative):
+        raise RetryJob("Model output invalid or unavailable")
+
+    merged = merge_narrative(scored, narrative)
+    try:
+        merged["counterfactuals"] = normalize_counterfactuals(merged["counterfactuals"])
+    except Exception as e:
+        print(f"WARNING: Failed to normalize counterfactuals: {e}")
+    return {
+        **result,
+        "decision": merged["decision"],
+        "counterfactuals": merged["counterfactuals"],
+        "fairness": merged["fairness"],
+        "narrative": "done",
+        "audit": {**result.get("audit", {}), "prompt_tokens": usage}
+    }
+
+
+async def ai_decision_stream(decision_type: DecisionType, applicant: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Streaming variant of ai_decision. Yields progress, token and reasoning
+    events while the model generates, then one ``decision`` event carrying the
+    same normalized object ai_decision returns.
+    """
+    screened = prescreen(decision_type, applicant)
+    if screened is not None:
+        yield {"type": "decision", "result": screened}
+        return
+
+    key = decision_cache.key(decision_type, applicant)
+    cached = decision_cache.get(key)
+    if cached is not None:
+        decision_cache.stats["hits"] += 1
+        result = decision_cache._as_hit(cached)
+        result["applicant"] = applicant
+        yield {"type": "decision", "result": result}
+        return
+    decision_cache.stats["misses"] += 1
+
+    yield {"type": "progress", "stage": "prompt"}
+    scored = score_applicant(decision_type, applicant)
+    if scored is not None:
+        # The decision is known now; only the narrative still streams
+        yield {"type": "scored", "decision": {k: scored[k] for k in ("status", "confidence")},
+               "key_metrics": scored["key_metrics"]}
+        prompt, usage = build_narrative_prompt(decision_type, applicant, scored)
+        prefix_key, schema = f"narrative:{decision_type.value}", NARRATIVE_SCHEMA
+    else:
+        prompt, usage = build_prompt(decision_type, applicant)
+        prefix_key, schema = decision_type.value, DECISION_SCHEMA
+    yield {"type": "progress", "stage": "generating"}
+
+    ai_output = None
+    async for event in call_ai_stream(prompt, prefix_key, schema):
+        if event["type"] == "result":
+            ai_output = event["output"]
+        else:
+            yield event
+    ai_output = await check_sections(prompt, ai_output, schema, prefix_key)
+
+    yield {"type": "progress", "stage": "finalizing"}
+    if scored is not None:
+        result = finalize_decision(
+            decision_type, applicant, merge_narrative(scored, ai_output), engine="scorecard", prompt_tokens=usage
+        )
+    else:
+        result = finalize_decision(decision_type, applicant, ai_output, prompt_tokens=usage)
+    decision_cache.put(key, result)
+    yield {"type": "decision", "result": result}
+
+
+def finalize_decision(
+    decision_type: DecisionType,
+    applicant: Dict[str, Any],
+    ai_output: Dict[str, Any],
+    engine: str = "universal-xai-http",
+    prompt_tokens: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """Normalize raw model output, record it in memory/audit stores and build the response."""
+    # A repaired (e.g. truncated) output may lack parts the response needs
+    decision = ai_output.get("decision")
+    if not (isinstance(decision, dict) and decision.get("status") and decision.get("reasoning")):
+        ai_output = fallback_output()
+    if not isinstance(ai_output.get("fairness"), dict):
+        ai_output["fairness"] = {"assessment": "Unknown", "concerns": "Not provided by the model"}
     # Normalize counterfactuals for consistent frontend experience
     try:
         raw_cf = ai_output.get("counterfactuals", [])
@@ -490,6 +1790,8 @@ async def ai_decision(decision_type: DecisionType, applicant: Dict[str, Any]):
     decision_status = ai_output["decision"]["status"]
     decision_reasoning = ai_output["decision"]["reasoning"]
     ai_memory.add_decision(decision_type.value, decision_status, decision_reasoning)
+    if decision_reasoning != FALLBACK_REASONING:
+        precedent_index.add(decision_type.value, applicant, decision_status, decision_reasoning)
 
     # Persist full explanation payload for auditing and analytics
     try:
@@ -498,6 +1800,13 @@ async def ai_decision(decision_type: DecisionType, applicant: Dict[str, Any]):
         # Do not let storage failures break decision flow
         print(f"WARNING: Failed to store explanation: {e}")
 
+    audit = {
+        "engine": engine,
+        "timestamp": datetime.now(timezone.utc).isoformat()
+    }
+    if prompt_tokens is not None:
+        audit["prompt_tokens"] = prompt_tokens
+
     return {
         "decision_type": decision_type.value,
         "applicant": applicant,
@@ -509,27 +1818,181 @@ async def ai_decision(decision_type: DecisionType, applicant: Dict[str, Any]):
             "approval_probability": 0.5,
             "critical_factors": []
         }),
-        "audit": {
-            "engine": "universal-xai-http",
-            "timestamp": datetime.now(timezone.utc).isoformat()
-        }
+        "audit": audit
     }
 
 # =====================================================
 # BATCH (PARALLEL, OPTIMIZED)
 # =====================================================
+def batch_error(decision_type: DecisionType, applicant: Dict[str, Any], error: BaseException) -> Dict[str, Any]:
+    """Result entry for one applicant whose decision raised, so the rest of the batch survives."""
+    return {
+        "decision_type": decision_type.value,
+        "applicant": applicant,
+        "error": f"{type(error).__name__}: {error}"
+    }
+
+
+def packable(decision_type: DecisionType, applicant: Dict[str, Any]) -> Optional[str]:
+    """
+    Cache key of an applicant that would take the full LLM prompt and is
+    small enough to share a packed generation, else None.
+    """
+    if estimate_tokens(format_as_text(applicant)) > PACK_MAX_APPLICANT_TOKENS:
+        return None
+    if decided_locally(decision_type, applicant):
+        return None
+    key = decision_cache.key(decision_type, applicant)
+    return None if decision_cache.has(key) else key
+
+
+def valid_decision(output: Any) -> bool:
+    return isinstance(output, dict) and not validate(output, DECISION_SCHEMA)
+
+
+pack_stats = {"packs": 0, "packed": 0, "fallbacks": 0}
+
+
+async def decide_pack(
+    decision_type: DecisionType,
+    items: List[Tuple[int, str, Dict[str, Any]]]
+) -> List[Tuple[int, Dict[str, Any]]]:
+    """
+    Decide (index, cache key, applicant) items in one generation. The
+    caller reserves every key first (DecisionCache.reserve), so duplicate
+    rows wait for this generation instead of starting their own; each key
+    is resolved here. Entries the model left out or got wrong, and a pack
+    of one, are decided one at a time.
+    """
+    results: List[Tuple[int, Dict[str, Any]]] = []
+    retry = list(items) if len(items) == 1 else []
+    if not retry:
+        applicants = [applicant for _, _, applicant in items]
+        prompt, usage = build_packed_prompt(decision_type, applicants)
+        output = await call_ai(prompt, prefix_key=f"pack:{decision_type.value}", schema=PACKED_SCHEMA)
+        pack_stats["packs"] += 1
+
+        entries = output.get("decisions") if isinstance(output, dict) else None
+        by_number: Dict[int, Dict[str, Any]] = {}
+        if isinstance(entries, list):
+            for position, entry in enumerate(entries, 1):
+                if not isinstance(entry, dict):
+                    continue
+                number = entry.get("applicant", position)
+                if isinstance(number, (int, str)) and str(number).isdigit():
+                    by_number.setdefault(int(number), entry)
+
+        for number, (index, key, applicant) in enumerate(items, 1):
+            entry = by_number.get(number)
+            valid = valid_decision(entry)
+            validation_stats.record_output(f"pack:{decision_type.value}", not valid)
+            if not valid:
+                retry.append((index, key, applicant))
+                continue
+            result = finalize_decision(decision_type, applicant, entry, prompt_tokens=usage)
+            decision_cache.resolve(key, result)
+            results.append((index, result))
+        pack_stats["packed"] += len(results)
+        pack_stats["fallbacks"] += len(retry)
+
+    # Not ai_decision: its get_or_compute would wait on our own reservation
+    singles = await asyncio.gather(
+        *[_run_decision(decision_type, applicant) for _, _, applicant in retry], return_exceptions=True
+    )
+    for (index, key, applicant), result in zip(retry, singles):
+        if isinstance(result, BaseException):
+            decision_cache.resolve(key, error=result)
+            result = batch_error(decision_type, applicant, result)
+        else:
+            decision_cache.resolve(key, result)
+        results.append((index, result))
+    return results
+
+
+async def iter_batch(
+    decision_type: DecisionType,
+    applicants: Iterable[Dict[str, Any]],
+    window: int = BATCH_WINDOW,
+    pack_size: int = PACK_SIZE
+) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Decide applicants through a sliding window of at most ``window`` in
+    flight, starting the next one as soon as any finishes. Yields
+    ``(input_index, result)`` in completion order; an applicant that
+    raises yields a batch_error entry instead of failing the batch.
+    ``applicants`` is consumed lazily, so it may be a generator.
+
+    With ``pack_size`` > 1, applicants bound for the full LLM prompt are
+    grouped and decided ``pack_size`` to a generation (decide_pack); a
+    pack takes one window place.
+    """
+    pending: Dict[asyncio.Task, List[Tuple[int, Dict[str, Any]]]] = {}
+    pack: List[Tuple[int, str, Dict[str, Any]]] = []
+    source = enumerate(applicants)
+    exhausted = False
+
+    def launch_pack():
+        # Reserve the keys now, before the task runs, so duplicates read
+        # from the source meanwhile coalesce onto this pack
+        reservations = [(key, decision_cache.reserve(key)) for _, key, _ in pack]
+        task = asyncio.ensure_future(decide_pack(decision_type, list(pack)))
+        task.add_done_callback(lambda done: release_pack(reservations, done))
+        pending[task] = [(index, applicant) for index, _, applicant in pack]
+        pack.clear()
+
+    def release_pack(reservations: List[Tuple[str, asyncio.Future]], task: asyncio.Task):
+        # A pack that failed or was cancelled leaves keys unresolved
+        error = asyncio.CancelledError() if task.cancelled() else task.exception()
+        for key, future in reservations:
+            decision_cache.abandon(key, future, error or RuntimeError("Pack ended without a decision"))
+
+    try:
+        while True:
+            while not exhausted and len(pending) < window:
+                try:
+                    index, applicant = next(source)
+                except StopIteration:
+                    exhausted = True
+                    if pack:
+                        launch_pack()
+                    break
+                key = packable(decision_type, applicant) if pack_size > 1 else None
+                if key is not None and any(key == packed_key for _, packed_key, _ in pack):
+                    # Same applicant as one in the forming pack: send the pack
+                    # now and let this row coalesce onto it
+                    launch_pack()
+                    key = None
+                if key is not None:
+                    pack.append((index, key, applicant))
+                    if len(pack) >= pack_size:
+                        launch_pack()
+                else:
+                    task = asyncio.ensure_future(ai_decision(decision_type, applicant))
+                    pending[task] = [(index, applicant)]
+            if not pending:
+                return
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                items = pending.pop(task)
+                error = task.exception()
+                if error:
+                    for index, applicant in items:
+                        yield index, batch_error(decision_type, applicant, error)
+                elif isinstance(task.result(), list):
+                    for index, result in task.result():
+                        yield index, result
+                else:
+                    yield items[0][0], task.result()
+    finally:
+        # Consumer went away (client disconnect, cancellation): stop the rest
+        for task in pending:
+            task.cancel()
+
+
 async def process_batch(decision_type: DecisionType, applicants: List[Dict[str, Any]]):
-    # Process in parallel batches of 5
-    batch_size = 5
-    results = []
-    
-    for i in range(0, len(applicants), batch_size):
-        batch = applicants[i:i + batch_size]
-        batch_results = await asyncio.gather(
-            *[ai_decision(decision_type, applicant) for applicant in batch]
-        )
-        results.extend(batch_results)
-    
+    results: List[Optional[Dict[str, Any]]] = [None] * len(applicants)
+    async for index, result in iter_batch(decision_type, applicants):
+        results[index] = result
     return results
 
 # =====================================================
@@ -538,8 +2001,8 @@ async def process_batch(decision_type: DecisionType, applicants: List[Dict[str,
 # =====================================================
 # DATABASE
 # =====================================================
-from database import SimpleDB
-db = SimpleDB()
+from database import open_db, list_page, status_filters, WriteConflict, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+db = open_db()
 
 # =====================================================
 # ENDPOINTS (Swagger-perfect)
@@ -552,14 +2015,81 @@ async def decision_json(
     return await ai_decision(decision_type, payload)
 
 
+async def iter_decision_sse(decision_type: DecisionType, payload: Dict[str, Any]) -> AsyncIterator[str]:
+    """ai_decision_stream as SSE frames, ending in an `error` event if the decision fails."""
+    try:
+        async for event in ai_decision_stream(decision_type, payload):
+            yield f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+    except Exception as e:
+        # Headers are already sent; tell the client instead of just hanging up
+        print(f"ERROR: Streaming decision failed: {e}")
+        yield f"event: error\ndata: {json.dumps({'type': 'error', 'detail': str(e)})}\n\n"
+
+
+def decision_sse_response(decision_type: DecisionType, payload: Dict[str, Any]) -> StreamingResponse:
+    return StreamingResponse(
+        iter_decision_sse(decision_type, payload),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.post("/decision/stream")
+async def decision_stream(
+    decision_type: DecisionType = Query(...),
+    payload: Dict[str, Any] = ...
+):
+    """
+    Server-Sent Events version of /decision/json. Emits `progress`, `token`
+    and `reasoning` events during generation and a final `decision` event
+    with the normalized result, or an `error` event if it fails.
+    """
+    return decision_sse_response(decision_type, payload)
+
+
+@app.post("/decision/score/batch")
+async def decision_score_batch(
+    decision_type: DecisionType = Query(...),
+    payload: List[Dict[str, Any]] = ...
+):
+    """
+    Scorecard-only decisions and key_metrics for many applicants in one
+    vectorized pass (no LLM). Entries are null where the domain has no
+    enabled scorecard or the applicant lacks too many features.
+    """
+    results = scorer.score_batch(decision_type.value, payload)
+    return {
+        "count": len(results),
+        "holdout_auc": scorer.cards.get(decision_type.value, {}).get("holdout_auc"),
+        "results": results
+    }
+
+
+async def iter_batch_ndjson(decision_type: DecisionType, applicants: Iterable[Dict[str, Any]]) -> AsyncIterator[str]:
+    """One NDJSON line per applicant as soon as it finishes, tagged with its input ``index``."""
+    try:
+        async for index, result in iter_batch(decision_type, applicants):
+            yield json.dumps({"index": index, **result}, default=str) + "\n"
+    except IngestError as e:
+        # Headers are already sent; report the bad input in-band
+        yield json.dumps({"error": str(e)}) + "\n"
+
+
 @app.post("/decision/batch/json")
 async def decision_batch_json(
     decision_type: DecisionType = Query(...),
-    payload: List[Dict[str, Any]] = ...
+    payload: List[Dict[str, Any]] = ...,
+    stream: bool = False
 ):
-    if len(payload) > MAX_CSV_ROWS:
-        raise HTTPException(400, f"Max {MAX_CSV_ROWS} records allowed")
+    """
+    Decide a list of applicants. With `stream=true` results arrive as
+    NDJSON in completion order, each carrying its input `index`.
+    """
+    if len(payload) > MAX_INLINE_BATCH_ROWS:
+        raise HTTPException(400, f"Max {MAX_INLINE_BATCH_ROWS} records allowed; upload larger batches as a file")
 
+    if stream:
+        return StreamingResponse(iter_batch_ndjson(decision_type, payload), media_type="application/x-ndjson")
     results = await process_batch(decision_type, payload)
     return {"count": len(results), "results": results}
 
@@ -567,17 +2097,25 @@ async def decision_batch_json(
 @app.post("/decision/csv")
 async def decision_csv(
     decision_type: DecisionType = Query(...),
-    file: UploadFile = File(...)
+    file: UploadFile = File(...),
+    stream: bool = False
 ):
-    content = await file.read()
-    df = pd.read_csv(BytesIO(content))
-
-    if len(df) > MAX_CSV_ROWS:
-        raise HTTPException(400, "CSV too large")
-
-    applicants = df.to_dict(orient="records")
-    results = await process_batch(decision_type, applicants)
-    return {"count": len(results), "results": results}
+    """
+    Decide every row of a CSV. With `stream=true` results arrive as NDJSON
+    in completion order, each carrying its row `index`.
+    """
+    check_upload_size(file, MAX_BATCH_FILE_MB)
+    # Rows are parsed a chunk at a time as the batch window frees up
+    rows = iter_records(file.file, "csv")
+    if stream:
+        return StreamingResponse(iter_batch_ndjson(decision_type, rows), media_type="application/x-ndjson")
+    results: Dict[int, Dict[str, Any]] = {}
+    try:
+        async for index, result in iter_batch(decision_type, rows):
+            results[index] = result
+    except IngestError as e:
+        raise HTTPException(400, str(e))
+    return {"count": len(results), "results": [results[i] for i in range(len(results))]}
 
 
 @app.post("/decision/form/loan")
@@ -612,35 +2150,193 @@ class ApplicationStatus(str, Enum):
     REJECTED = "rejected"
     COMPLETED = "completed"
 
-@app.post("/applications")
+# =====================================================
+# JOB QUEUE (AI DECISIONS OFF THE REQUEST PATH)
+# =====================================================
+job_queue = JobQueue(JOBS_FILE)
+batch_store = BatchStore(BATCHES_FILE)
+
+
+async def run_decision_job(job: Dict[str, Any]):
+    """Worker handler: decide a pending_ai application and hand it to a human."""
+    app_id = job["payload"]["app_id"]
+    batch_id = job["payload"].get("batch_id")
+    try:
+        await _decide_application(app_id, job["final_attempt"])
+    except RetryJob:
+        raise
+    except Exception as e:
+        if job["final_attempt"]:
+            error = f"{type(e).__name__}: {e}"
+            _hand_over_failed(app_id, error)
+            if batch_id:
+                batch_store.record(batch_id, app_id, ok=False, error=error)
+        raise
+    if batch_id:
+        batch_store.record(batch_id, app_id, ok=True)
+
+
+def _hand_over_failed(app_id: str, error: str):
+    # Out of attempts: a human reviews it with the fallback result, rather
+    # than the application sitting in pending_ai for good
+    try:
+        db.update_application(
+            app_id,
+            {"status": ApplicationStatus.PENDING_HUMAN.value, "ai_result": {**fallback_output(), "error": error}},
+            expected={"status": ApplicationStatus.PENDING_AI.value}
+        )
+    except WriteConflict:
+        pass  # Already decided or reviewed
+    except Exception as e:
+        print(f"WARNING: Could not hand failed application {app_id} to review: {e}")
+
+
+async def _decide_application(app_id: str, final_attempt: bool):
+    application = db.get_application(app_id)
+    if not application or application.get("status") != ApplicationStatus.PENDING_AI.value:
+        return  # Deleted or already handled
+
+    decision_type = DecisionType(application["domain"])
+    ai_result = await ai_decision(decision_type, application["data"], queue_narrative=False)
+    if ai_result["decision"].get("reasoning") == FALLBACK_REASONING and not final_attempt:
+        raise RetryJob("Model output invalid or unavailable")
+
+    try:
+        db.update_application(
+            app_id,
+            {"status": ApplicationStatus.PENDING_HUMAN.value, "ai_result": ai_result},
+            expected={"status": ApplicationStatus.PENDING_AI.value}
+        )
+    except WriteConflict:
+        print(f"DEBUG: Application {app_id} changed while its decision ran; result discarded")
+        return
+    # The reviewer sees the scorecard decision now; the narrative follows
+    if ai_result.get("narrative") == "pending":
+        enqueue_narrative(decision_type, ai_result, app_id)
+
+
+async def run_narrative_job(job: Dict[str, Any]):
+    """
+    Worker handler: have the LLM write the narrative for a scorecard
+    decision, then put it in the decision cache and, if the job names one,
+    the stored application.
+    """
+    payload = job["payload"]
+    decision_type = DecisionType(payload["decision_type"])
+    pending = payload["result"]
+    try:
+        # Duplicate jobs for one applicant share the generation
+        narrated = await decision_cache.get_or_compute(
+            f"narrative:{payload['key']}", lambda: narrate_decision(decision_type, pending)
+        )
+    except RetryJob:
+        if not job["final_attempt"]:
+            raise
+        narrated = {**pending, "narrative": "unavailable"}
+    narrated.get("audit", {}).pop("cache", None)
+    narrated["applicant"] = pending["applicant"]
+    if narrated["narrative"] == "done":
+        decision_cache.put(payload["key"], narrated)
+
+    app_id = payload.get("app_id")
+    if app_id:
+        with db.transaction(app_id) as application:
+            # Skip if re-decided meanwhile; a human review keeps the narrative
+            if application and (application.get("ai_result") or {}).get("narrative") == "pending":
+                application["ai_result"] = narrated
+
+
+job_workers = JobWorkers(
+    job_queue,
+    {"decision": run_decision_job, "narrative": run_narrative_job},
+    JOB_WORKERS
+)
+
+
+def enqueue_decision(app_id: str) -> str:
+    job_id = job_queue.enqueue("decision", {"app_id": app_id})
+    job_workers.notify()
+    return job_id
+
+
+def requeue_orphaned_applications() -> int:
+    """
+    Queue decisions for pending_ai applications that have no live job,
+    e.g. saved by queue_applications just before the process died.
+    """
+    active = {payload.get("app_id") for payload in job_queue.active_payloads("decision")}
+    orphans = [
+        app["id"] for app in db.query_applications(statuses=[ApplicationStatus.PENDING_AI.value], fields=["id"])
+        if app["id"] not in active
+    ]
+    if orphans:
+        job_queue.enqueue_many("decision", [{"app_id": app_id} for app_id in orphans])
+        print(f"DEBUG: Re-queued decisions for {len(orphans)} orphaned applications")
+    return len(orphans)
+
+
+def enqueue_narrative(decision_type: DecisionType, result: Dict[str, Any], app_id: Optional[str] = None) -> str:
+    """Queue the LLM narrative for a scorecard decision returned with ``narrative: "pending"``."""
+    job_id = job_queue.enqueue("narrative", {
+        "decision_type": decision_type.value,
+        "key": decision_cache.key(decision_type, result["applicant"]),
+        "result": result,
+        "app_id": app_id
+    })
+    job_workers.notify()
+    return job_id
+
+
+@app.on_event("startup")
+async def start_job_workers():
+    requeue_orphaned_applications()
+    job_workers.start()
+
+
+@app.on_event("shutdown")
+async def stop_job_workers():
+    await job_workers.stop()
+
+
+@app.post("/applications", status_code=202)
 async def submit_application(
     decision_type: DecisionType = Query(...),
     payload: Dict[str, Any] = ...
 ):
-    # 1. Save Initial Application
+    """
+    Queue an application for AI review. Returns the pending_ai record at
+    once; poll GET /applications/{id} until it reaches pending_human.
+    """
     app_entry = {
         "domain": decision_type.value,
         "data": payload,
         "status": ApplicationStatus.PENDING_AI.value
     }
     saved_app = db.save_application(app_entry)
-    
-    # 2. Run AI Analysis
-    ai_result = await ai_decision(decision_type, payload)
-    
-    # 3. Update Application with AI Result
-    updates = {
-        "status": ApplicationStatus.PENDING_HUMAN.value,
-        "ai_result": ai_result
-    }
-    updated_app = db.update_application(saved_app["id"], updates)
-    
-    return updated_app
+    enqueue_decision(saved_app["id"])
+    return saved_app
 
 
 @app.get("/applications")
-async def get_applications(status: Optional[str] = None):
-    return db.get_all_applications(status)
+async def get_applications(
+    status: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None
+):
+    """
+    One page of applications, newest first: `{"items": [...], "next_cursor": ...}`.
+    `status` also takes "pending" (AI or human review outstanding) and
+    "history". Pages are keyset-paginated on (timestamp, id); pass
+    `next_cursor` back as `cursor`. `fields` is a comma-separated
+    projection such as `domain,status,ai_result.decision.status`.
+    """
+    field_list = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+    filters = status_filters(status)
+    try:
+        return list_page(db, limit, cursor=cursor, fields=field_list, **filters)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
 
 @app.get("/applications/{app_id}")
 async def get_application(app_id: str):
@@ -682,7 +2378,7 @@ async def review_application(
                 agent_decision,
                 comment
             )
-            override_result = await call_ai(override_prompt)
+            override_result = await call_ai_checked(override_prompt, OVERRIDE_SCHEMA, prefix_key="override")
             override_explanation = override_result
         except Exception as e:
             # Fallback if AI fails
@@ -703,17 +2399,26 @@ async def review_application(
         "override_explanation": override_explanation
     }
     
-    updated_app = db.update_application(app_id, updates)
+    # Compare-and-set against the status read above so two concurrent reviews
+    # cannot silently overwrite each other while the override call runs
+    try:
+        updated_app = db.update_application(app_id, updates, expected={"status": app.get("status")})
+    except WriteConflict:
+        raise HTTPException(409, "Application was reviewed concurrently")
     return updated_app
 
 # =====================================================
 # POLICY MANAGEMENT ENDPOINTS
 # =====================================================
 @app.post("/policies")
-async def add_policy(domain: str = Query(...), policy_text: str = Query(...)):
-    """Add a new policy to the specified domain"""
+async def add_policy(
+    domain: str = Query(...),
+    policy_text: str = Query(...),
+    always_include: bool = Query(False)
+):
+    """Add a new policy to the specified domain. `always_include` puts it in every prompt."""
     try:
-        policy = policy_memory.add_policy(domain, policy_text)
+        policy = policy_memory.add_policy(domain, policy_text, always_include)
         return {"success": True, "policy": policy}
     except ValueError as e:
         raise HTTPException(400, str(e))
@@ -746,12 +2451,15 @@ async def upload_policy_file(
             data = json.loads(text_content)
             # If it's a list of policies
             if isinstance(data, list):
-                policies = []
+                texts, pinned = [], []
                 for policy_text in data:
                     if isinstance(policy_text, str):
-                        policies.append(policy_memory.add_policy(domain, policy_text))
+                        texts.append(policy_text)
                     elif isinstance(policy_text, dict) and 'text' in policy_text:
-                        policies.append(policy_memory.add_policy(domain, policy_text['text']))
+                        target = pinned if policy_text.get('always_include') else texts
+                        target.append(policy_text['text'])
+                policies = policy_memory.add_policies(domain, texts)
+                policies += policy_memory.add_policies(domain, pinned, always_include=True)
                 return {"success": True, "count": len(policies), "policies": policies}
             else:
                 raise HTTPException(400, "JSON must be a list of policy strings or objects")
@@ -761,18 +2469,13 @@ async def upload_policy_file(
             df = pd.read_csv(BytesIO(content))
             if 'policy' not in df.columns:
                 raise HTTPException(400, "CSV must have a 'policy' column")
-            policies = []
-            for policy_text in df['policy']:
-                policies.append(policy_memory.add_policy(domain, str(policy_text)))
+            policies = policy_memory.add_policies(domain, [str(policy_text) for policy_text in df['policy']])
             return {"success": True, "count": len(policies), "policies": policies}
         
         elif file.filename.endswith('.txt'):
             # Each line is a policy
-            policies = []
-            for line in text_content.split('\n'):
-                line = line.strip()
-                if line:
-                    policies.append(policy_memory.add_policy(domain, line))
+            lines = [line.strip() for line in text_content.split('\n')]
+            policies = policy_memory.add_policies(domain, [line for line in lines if line])
             return {"success": True, "count": len(policies), "policies": policies}
         
         else:
@@ -803,6 +2506,37 @@ async def update_explanation(
     updated_app = db.update_application(app_id, updates)
     return updated_app
 
+# =====================================================
+# EXPLANATION AUDIT LOG
+# =====================================================
+@app.get("/explanations")
+async def get_explanations(
+    decision_type: Optional[DecisionType] = None,
+    status: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    limit: int = Query(100, ge=1, le=100000)
+):
+    """
+    Stream stored explanations as NDJSON, newest first. Filter by
+    `decision_type`, decision `status` (APPROVED / REJECTED) and an ISO
+    `since` / `until` window.
+    """
+    since, until = (
+        t.replace(tzinfo=timezone.utc) if t and t.tzinfo is None else t
+        for t in (since, until)
+    )
+    matches = explanation_store.query(
+        decision_type.value if decision_type else None, status, since, until, limit
+    )
+
+    # Plain generator: Starlette runs it in a worker thread, off the event loop
+    def lines():
+        for entry in matches:
+            yield json.dumps(entry, default=str) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
 # =====================================================
 # FILE PARSING HELPERS
 # =====================================================
@@ -847,52 +2581,98 @@ def parse_key_value_text(text: str) -> Dict[str, Any]:
 # =====================================================
 # BULK UPLOAD ENDPOINT (OPTIMIZED, MULTI-FORMAT)
 # =====================================================
-@app.post("/bulk/upload")
+def check_upload_size(file: UploadFile, max_mb: int):
+    # Starlette has already spooled the upload to a temporary file
+    size_mb = file_size(file.file) / (1024 * 1024)
+    if size_mb > max_mb:
+        raise HTTPException(400, f"File size ({size_mb:.1f}MB) exceeds maximum allowed ({max_mb}MB)")
+
+
+def queue_applications(
+    decision_type: DecisionType,
+    records: List[Dict[str, Any]],
+    batch_id: Optional[str] = None
+) -> List[str]:
+    """Save records as pending_ai applications and queue their decisions in one job transaction."""
+    app_ids = []
+    for record in records:
+        saved_app = db.save_application({
+            # Long enough that a 100k-row upload cannot collide
+            "id": uuid.uuid4().hex[:12],
+            "domain": decision_type.value,
+            "data": record,
+            "status": ApplicationStatus.PENDING_AI.value
+        })
+        app_ids.append(saved_app["id"])
+    payloads = [{"app_id": app_id} for app_id in app_ids]
+    if batch_id:
+        batch_store.add_items(batch_id, len(app_ids))
+        for payload in payloads:
+            payload["batch_id"] = batch_id
+    job_queue.enqueue_many("decision", payloads)
+    job_workers.notify()
+    return app_ids
+
+
+async def queue_upload(
+    decision_type: DecisionType,
+    file: UploadFile,
+    prepare: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None,
+    batch_id: Optional[str] = None
+) -> int:
+    """
+    Parse a CSV/JSON/JSONL upload chunk by chunk (off the event loop) and
+    queue each chunk's records as applications, counted under ``batch_id``
+    if given. Returns the number queued.
+    """
+    chunks = iter_record_chunks(file.file, file_kind(file.filename or ""))
+    count = 0
+    while True:
+        try:
+            chunk = await asyncio.to_thread(next, chunks, None)
+        except IngestError as e:
+            detail = f"{e} ({count} rows before it were queued)" if count else str(e)
+            raise HTTPException(400, detail)
+        if chunk is None:
+            return count
+        if prepare is not None:
+            chunk = [prepare(record) for record in chunk]
+        count += len(queue_applications(decision_type, chunk, batch_id))
+
+
+@app.post("/bulk/upload", status_code=202)
 async def bulk_upload(
     decision_type: DecisionType = Query(...),
     file: UploadFile = File(...)
 ):
     """
-    Optimized bulk upload with parallel processing.
-    Supports: .csv, .json, .pdf, .txt files
+    Bulk upload. Every applicant found is saved as pending_ai and queued
+    for the job workers.
+    Supports: .csv, .json, .jsonl (streamed, up to MAX_BATCH_FILE_MB), .pdf, .txt files
     """
     try:
-        content = await file.read()
         filename = file.filename.lower() if file.filename else ""
-        
+        file_type = file_kind(filename) or "unknown"
+
+        if file_type in STREAMED_TYPES:
+            check_upload_size(file, MAX_BATCH_FILE_MB)
+            batch_id = await submit_batch(decision_type, file)
+            return {
+                "success": True,
+                "count": batch_store.get(batch_id)["total"],
+                "file_type": file_type,
+                "status": ApplicationStatus.PENDING_AI.value,
+                "batch_id": batch_id
+            }
+
         # Security: Check file size
-        file_size_mb = len(content) / (1024 * 1024)
-        if file_size_mb > MAX_FILE_SIZE_MB:
-            raise HTTPException(400, f"File size ({file_size_mb:.1f}MB) exceeds maximum allowed ({MAX_FILE_SIZE_MB}MB)")
-        
+        check_upload_size(file, MAX_FILE_SIZE_MB)
+        content = await file.read()
+
         applicants = []
-        
-        # Handle CSV files
-        if filename.endswith('.csv'):
-            df = pd.read_csv(BytesIO(content))
-            if len(df) > MAX_CSV_ROWS:
-                raise HTTPException(400, f"Max {MAX_CSV_ROWS} records allowed")
-            applicants = df.to_dict(orient="records")
-        
-        # Handle JSON files
-        elif filename.endswith('.json'):
-            text_content = content.decode('utf-8')
-            data = json.loads(text_content)
-            
-            # If it's a list, treat each item as an applicant
-            if isinstance(data, list):
-                applicants = data
-            # If it's a single dict, treat it as one applicant
-            elif isinstance(data, dict):
-                applicants = [data]
-            else:
-                raise HTTPException(400, "JSON must be a list or object")
-            
-            if len(applicants) > MAX_CSV_ROWS:
-                raise HTTPException(400, f"Max {MAX_CSV_ROWS} records allowed")
-        
+
         # Handle PDF files
-        elif filename.endswith('.pdf'):
+        if filename.endswith('.pdf'):
             try:
                 # Extract text from PDF
                 pdf_reader = PdfReader(BytesIO(content))
@@ -938,73 +2718,154 @@ async def bulk_upload(
                 applicants = [{"raw_content": truncated_content}]
         
         else:
-            raise HTTPException(400, "Unsupported file type. Use .json, .csv, .pdf, or .txt")
+            raise HTTPException(400, "Unsupported file type. Use .json, .jsonl, .csv, .pdf, or .txt")
         
         if not applicants:
             raise HTTPException(400, "No valid applicant data found in file")
         
-        # Process in parallel batches
-        results = await process_batch(decision_type, applicants)
-        
-        # Save to database
-        saved_apps = []
-        for i, result in enumerate(results):
-            app_entry = {
-                "domain": decision_type.value,
-                "data": applicants[i],
-                "status": ApplicationStatus.PENDING_HUMAN.value,
-                "ai_result": result
-            }
-            saved_apps.append(db.save_application(app_entry))
-        
+        batch_id = batch_store.create(decision_type.value, source=file.filename)
+        app_ids = queue_applications(decision_type, applicants, batch_id)
+        batch_store.seal(batch_id)
         return {
             "success": True,
-            "count": len(saved_apps),
-            "file_type": filename.split('.')[-1] if '.' in filename else "unknown",
-            "applications": saved_apps
+            "count": len(app_ids),
+            "file_type": file_type,
+            "status": ApplicationStatus.PENDING_AI.value,
+            "batch_id": batch_id,
+            "applications": [db.get_application(app_id) for app_id in app_ids]
         }
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(400, f"Error processing bulk upload: {str(e)}")
 
+# =====================================================
+# BATCHES (PROGRESS + NDJSON RESULTS)
+# =====================================================
+async def submit_batch(
+    decision_type: DecisionType,
+    file: UploadFile,
+    prepare: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None
+) -> str:
+    """Queue a CSV/JSON/JSONL upload as one batch and return its id."""
+    batch_id = batch_store.create(decision_type.value, source=file.filename)
+    try:
+        count = await queue_upload(decision_type, file, prepare, batch_id)
+    finally:
+        # Rows queued before a parse error still run and are tracked
+        batch_store.seal(batch_id)
+    if not count:
+        raise HTTPException(400, "No valid applicant data found in file")
+    return batch_id
+
+
+def get_batch_or_404(batch_id: str) -> Dict[str, Any]:
+    batch = batch_store.get(batch_id)
+    if batch is None:
+        raise HTTPException(404, "Batch not found")
+    return batch
+
+
+async def iter_batch_results(batch_id: str, after: int = 0, follow: bool = True) -> AsyncIterator[str]:
+    """
+    NDJSON lines for a batch's finished items in completion order, read a
+    page at a time. With ``follow`` the stream stays open until the batch
+    is done.
+    """
+    while True:
+        # Read the status first so items recorded meanwhile are not missed
+        done = batch_store.get(batch_id)["status"] == "done"
+        items = batch_store.items(batch_id, after)
+        for item in items:
+            application = db.get_application(item["app_id"]) or {}
+            item["status"] = application.get("status")
+            item["result"] = application.get("ai_result")
+            after = item["seq"]
+            yield json.dumps(item, default=str) + "\n"
+        if items:
+            continue
+        if done or not follow:
+            return
+        await asyncio.sleep(BATCH_POLL_INTERVAL)
+
+
+@app.post("/batches", status_code=202)
+async def create_batch(
+    decision_type: DecisionType = Query(...),
+    file: UploadFile = File(...)
+):
+    """
+    Queue every record of a CSV, JSON or JSONL file for AI review as one
+    batch. Poll GET /batches/{id} for progress; GET /batches/{id}/results
+    streams finished items as NDJSON.
+    """
+    if file_kind(file.filename or "") not in STREAMED_TYPES:
+        raise HTTPException(400, "Unsupported file type. Use .csv, .json or .jsonl")
+    check_upload_size(file, MAX_BATCH_FILE_MB)
+    batch_id = await submit_batch(decision_type, file)
+    return get_batch_or_404(batch_id)
+
+
+@app.get("/batches/{batch_id}")
+async def get_batch(batch_id: str):
+    """Counts (total, completed, failed, pending), throughput and ETA."""
+    return get_batch_or_404(batch_id)
+
+
+@app.get("/batches/{batch_id}/results")
+async def get_batch_results(
+    batch_id: str,
+    after: int = Query(0, ge=0),
+    follow: bool = True
+):
+    """
+    Finished items as NDJSON, in completion order. Each line carries its
+    `seq`; reconnect with `after=<last seq>` to resume. With `follow`
+    (default) the stream stays open until the batch is done.
+    """
+    get_batch_or_404(batch_id)
+    return StreamingResponse(
+        iter_batch_results(batch_id, after, follow),
+        media_type="application/x-ndjson"
+    )
+
 # =====================================================
 # HEALTH CHECK ENDPOINT
 # =====================================================
 @app.get("/health")
 async def health_check():
     """Check AI model availability"""
+    health: Dict[str, Any] = {"status": "healthy", "model": MODEL_NAME, "available": True}
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.post(
-                OLLAMA_URL,
-                json={"model": MODEL_NAME, "prompt": "test", "stream": False}
-            )
-            if response.status_code == 200:
-                return {
-                    "status": "healthy",
-                    "model": MODEL_NAME,
-                    "available": True
-                }
-            else:
-                return {
-                    "status": "degraded",
-                    "model": MODEL_NAME,
-                    "available": False,
-                    "error": "Model not responding correctly"
-                }
+        await ollama_client.generate(
+            ollama_payload("test", stream=False),
+            timeout=HEALTH_TIMEOUT
+        )
+    except httpx.HTTPStatusError:
+        health.update(status="degraded", available=False, error="Model not responding correctly")
     except Exception as e:
-        return {
-            "status": "unhealthy",
-            "model": MODEL_NAME,
-            "available": False,
-            "error": str(e)
-        }
+        health.update(status="unhealthy", available=False, error=str(e))
+    # Snapshot after the probe so it is counted
+    health.update({
+        "ollama_calls": ollama_client.snapshot(),
+        "decision_cache": decision_cache.snapshot(),
+        "prescreen": rules_engine.stats,
+        "policies": policy_memory.snapshot(),
+        "explanations": explanation_store.snapshot(),
+        "precedents": precedent_index.size(),
+        "jobs": job_queue.counts(),
+        "scheduler": ai_scheduler.snapshot(),
+        "packing": pack_stats,
+        "json_parse": json_parse_stats,
+        "validation": validation_stats.snapshot(),
+        "backends": ollama_client.router.snapshot()
+    })
+    return health
 
 # =====================================================
 # LEGACY/INQUIRY SUPPORT (Bridging api.py)
 # =====================================================
-@app.post("/inquiry")
+@app.post("/inquiry", status_code=202)
 async def submit_inquiry(payload: Dict[str, Any]):
     # Extract domain and data from legacy payload
     domain = payload.get("domain")
@@ -1032,18 +2893,11 @@ async def submit_inquiry(payload: Dict[str, Any]):
     }
     saved_app = db.save_application(app_entry) # Ensure db.save_application handles ID generation if not provided, or accepts ID
     
-    # 2. Run AI
-    ai_result = await ai_decision(decision_type, data)
-    
-    # 3. Update
-    updates = {
-        "status": ApplicationStatus.PENDING_HUMAN.value,
-        "ai_result": ai_result
-    }
-    updated_app = db.update_application(app_id, updates)
+    # 2. Queue the AI decision; a worker moves it to pending_human
+    enqueue_decision(app_id)
     
     return {
         "message": "Inquiry received",
         "inquiry_id": app_id,
-        "result": updated_app
+        "result": saved_app
     }
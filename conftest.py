@@ -0,0 +1,8 @@
+import os
+import sys
+
+# The service modules live in "ai agent/" and import each other by bare name
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "ai agent"))
+
+# Scripts against a running server or Ollama; run them directly (python test_workflow.py)
+collect_ignore = ["test_workflow.py", "test_ollama.py", "customer_test.py"]
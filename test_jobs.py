@@ -0,0 +1,121 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+import jobs
+from jobs import JobQueue, JobWorkers, RetryJob
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(str(tmp_path / "jobs.sqlite3"), max_attempts=3, retry_base=1.0, retry_max=3.0)
+
+
+def delay_after_failure(queue, job):
+    queue.fail(job, "boom")
+    stored = queue.get(job["id"])
+    return round(stored["run_after"] - stored["updated_at"], 3)
+
+
+def test_claim_counts_attempts_and_flags_the_last(queue):
+    queue.enqueue("decision", {"app_id": "A"})
+    job = queue.claim()
+    assert job["payload"] == {"app_id": "A"}
+    assert (job["attempts"], job["final_attempt"]) == (1, False)
+    assert queue.claim() is None
+
+
+def test_failed_attempts_back_off_exponentially_up_to_the_cap(queue, monkeypatch):
+    job_id = queue.enqueue("decision", {})
+    delays = []
+    for _ in range(2):
+        job = queue.claim()
+        delays.append(delay_after_failure(queue, job))
+        assert queue.claim() is None  # Not ready until run_after
+        # Jump past the backoff
+        monkeypatch.setattr(jobs.time, "time", lambda t=queue.get(job_id)["run_after"]: t + 0.001)
+    assert delays == [1.0, 2.0]
+
+    capped = JobQueue(queue.db_file, max_attempts=5, retry_base=1.0, retry_max=3.0)
+    job = capped.claim()
+    assert job["attempts"] == 3
+    assert delay_after_failure(capped, job) == 3.0
+
+
+def test_job_fails_for_good_after_max_attempts(queue):
+    queue.retry_base = 0.0
+    job_id = queue.enqueue("decision", {})
+    for attempt in range(1, 4):
+        job = queue.claim()
+        assert job["final_attempt"] == (attempt == 3)
+        queue.fail(job, f"attempt {attempt}")
+    stored = queue.get(job_id)
+    assert (stored["status"], stored["last_error"]) == ("failed", "attempt 3")
+    assert queue.claim() is None
+
+
+def test_recover_requeues_jobs_left_running(queue):
+    job_id = queue.enqueue("decision", {})
+    queue.claim()
+    restarted = JobQueue(queue.db_file)
+    assert restarted.get(job_id)["status"] == "queued"
+    assert restarted.claim()["attempts"] == 2
+
+
+def test_workers_retry_until_the_handler_succeeds(queue, monkeypatch):
+    monkeypatch.setattr(jobs, "POLL_INTERVAL", 0.01)
+    queue.retry_base = 0.0
+    attempts = []
+
+    async def handler(job):
+        attempts.append(job["attempts"])
+        if len(attempts) < 3:
+            raise RetryJob("model unavailable")
+
+    async def run():
+        workers = JobWorkers(queue, {"decision": handler}, concurrency=2)
+        workers.start()
+        job_id = queue.enqueue("decision", {})
+        workers.notify()
+        for _ in range(200):
+            if queue.get(job_id)["status"] == "done":
+                break
+            await asyncio.sleep(0.01)
+        await workers.stop()
+        return queue.get(job_id)
+
+    job = asyncio.run(run())
+    assert job["status"] == "done"
+    assert attempts == [1, 2, 3]
+
+
+def test_workers_survive_queue_errors(queue, monkeypatch):
+    monkeypatch.setattr(jobs, "POLL_INTERVAL", 0.01)
+    claim, errors = queue.claim, [sqlite3.OperationalError("database is locked")] * 2
+
+    def flaky_claim():
+        if errors:
+            raise errors.pop()
+        return claim()
+
+    monkeypatch.setattr(queue, "claim", flaky_claim)
+    done = []
+
+    async def handler(job):
+        done.append(job["id"])
+
+    async def run():
+        workers = JobWorkers(queue, {"decision": handler}, concurrency=1)
+        workers.start()
+        queue.enqueue("decision", {})
+        for _ in range(200):
+            if done:
+                break
+            await asyncio.sleep(0.01)
+        alive = all(not task.done() for task in workers._tasks)
+        await workers.stop()
+        return alive
+
+    assert asyncio.run(run())
+    assert len(done) == 1
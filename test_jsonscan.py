@@ -0,0 +1,53 @@
+import pytest
+
+from jsonscan import JSONScanner, scan_json
+
+
+@pytest.mark.parametrize("text, value", [
+    ('{"a": 1}', {"a": 1}),
+    ('Sure! Here it is: {"a": 1} hope that helps {"b": 2}', {"a": 1}),
+    ('{"s": "brace } inside \\" quote"}', {"s": 'brace } inside " quote'}),
+    ('{bad} {"ok": true}', {"ok": True}),
+])
+def test_clean_objects(text, value):
+    assert scan_json(text) == (value, "clean")
+
+
+@pytest.mark.parametrize("text, value", [
+    ('{"a": [1, 2,], }', {"a": [1, 2]}),
+    ('{"a": {"b": [1, 2}, "c": 3}', {"a": {"b": [1, 2]}, "c": 3}),
+])
+def test_repairs_trailing_commas_and_missing_closers(text, value):
+    assert scan_json(text) == (value, "repaired")
+
+
+@pytest.mark.parametrize("text, value", [
+    # Cut off inside a string: the string and containers are closed
+    (
+        '{"decision": {"status": "APPROVED", "reasoning": "The applicant has',
+        {"decision": {"status": "APPROVED", "reasoning": "The applicant has"}}
+    ),
+    ('{"a": 1, "b": [1, 2', {"a": 1, "b": [1, 2]}),
+    # Cut off inside a literal: fall back to the last element boundary
+    ('{"a": 1, "b": tru', {"a": 1}),
+])
+def test_closes_truncated_output(text, value):
+    assert scan_json(text) == (value, "truncated")
+
+
+@pytest.mark.parametrize("text, outcome", [
+    ("", "empty"),
+    ("   \n", "empty"),
+    ("no json here", "no_json"),
+    ("{not json}", "invalid"),
+])
+def test_unusable_output(text, outcome):
+    assert scan_json(text) == (None, outcome)
+
+
+def test_streamed_chunks_match_one_pass():
+    text = 'Result: {"a": [1, 2], "b": "x}", "c": {"d": null}} trailing'
+    scanner = JSONScanner()
+    for start in range(0, len(text), 3):
+        scanner.feed(text[start:start + 3])
+    assert scanner.result() == scan_json(text) == ({"a": [1, 2], "b": "x}", "c": {"d": None}}, "clean")
@@ -0,0 +1,77 @@
+import pytest
+
+from database import SimpleDB, SQLiteDB, decode_cursor, encode_cursor, list_page, status_filters
+
+
+@pytest.fixture(params=["log", "sqlite"])
+def db(request, tmp_path):
+    if request.param == "sqlite":
+        return SQLiteDB(str(tmp_path / "db.sqlite3"), legacy_file=None)
+    return SimpleDB(str(tmp_path / "db.json"))
+
+
+def seed(db):
+    # APP-2 and APP-3 share a timestamp, so ordering falls back to the id
+    stamps = ["2026-01-01", "2026-01-02", "2026-01-03", "2026-01-03", "2026-01-04", "2026-01-05", "2026-01-06"]
+    for i, stamp in enumerate(stamps):
+        db.save_application({
+            "id": f"APP-{i}",
+            "timestamp": f"{stamp}T00:00:00+00:00",
+            "domain": "loan",
+            "status": "pending_human" if i % 2 else "completed",
+            "data": {"full_name": f"Applicant {i}"}
+        })
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor({"id": "APP-1", "timestamp": "2026-01-01T00:00:00+00:00"})
+    assert decode_cursor(cursor) == ("2026-01-01T00:00:00+00:00", "APP-1")
+
+
+def test_cursor_without_timestamp():
+    assert decode_cursor(encode_cursor({"id": "APP-1", "timestamp": None})) == ("", "APP-1")
+
+
+@pytest.mark.parametrize("cursor", ["not a cursor", "bm90IGpzb24=", "WzFd"])
+def test_decode_rejects_garbage(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_pages_cover_every_application_once(db):
+    seed(db)
+    expected = [app["id"] for app in db.query_applications()]
+    seen, cursor = [], None
+    while True:
+        page = list_page(db, 3, cursor=cursor)
+        assert len(page["items"]) <= 3
+        seen += [app["id"] for app in page["items"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == expected
+    assert seen[:4] == ["APP-6", "APP-5", "APP-4", "APP-3"]
+
+
+def test_last_full_page_has_no_cursor(db):
+    seed(db)
+    assert list_page(db, 7)["next_cursor"] is None
+    assert list_page(db, 6)["next_cursor"] is not None
+
+
+def test_pending_filter_and_projection(db):
+    seed(db)
+    page = list_page(db, 10, fields=["status", "data.full_name"], **status_filters("pending"))
+    assert [app["id"] for app in page["items"]] == ["APP-5", "APP-3", "APP-1"]
+    assert page["items"][0] == {
+        "id": "APP-5",
+        "timestamp": "2026-01-05T00:00:00+00:00",
+        "status": "pending_human",
+        "data": {"full_name": "Applicant 5"}
+    }
+
+
+def test_history_excludes_pending(db):
+    seed(db)
+    page = list_page(db, 10, **status_filters("history"))
+    assert {app["status"] for app in page["items"]} == {"completed"}
@@ -0,0 +1,18 @@
+import pytest
+
+from rules import RulesEngine
+
+APPLICANTS = [
+    {"credit_score": 780, "existing_debt": 100, "monthly_income": 5000, "loan_amount": 20000},
+    {"credit_score": 500, "monthly_income": 5000},
+    {"credit_score": 650, "existing_debt": 100, "monthly_income": 5000, "loan_amount": 20000},
+]
+
+
+@pytest.mark.parametrize("applicant", APPLICANTS)
+def test_decides_agrees_with_evaluate_without_counting(applicant):
+    engine = RulesEngine()
+    decides = engine.decides("loan", applicant)
+    assert engine.stats == {}
+    assert decides == (engine.evaluate("loan", applicant) is not None)
+    assert sum(engine.stats["loan"].values()) == 1
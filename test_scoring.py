@@ -0,0 +1,83 @@
+import json
+
+import pytest
+
+from scoring import MIN_COVERAGE, Scorer
+
+CARD = {
+    "enabled": True,
+    "bias": 0.0,
+    "threshold": 0.5,
+    "guards": [{"ratio": ["existing_debt", "monthly_income"], "max": 1.5, "label": "debt to monthly income ratio"}],
+    "features": [
+        {"name": "monthly_income", "label": "monthly income", "aliases": ["monthly_income", "income"],
+         "mean": 5000.0, "std": 1000.0, "weight": 1.0, "scale": 1.0},
+        {"name": "account_age", "label": "account age", "aliases": ["account_age_months", "credit_history_years"],
+         "alias_scale": {"credit_history_years": 12}, "mean": 60.0, "std": 12.0, "weight": 1.0, "scale": 1.0},
+        {"name": "has_property", "label": "has property", "aliases": ["has_property"],
+         "mean": 0.5, "std": 0.5, "weight": 0.5, "scale": 1.0},
+        {"name": "loan_term", "label": "loan term", "aliases": ["loan_term"],
+         "mean": 360.0, "std": 60.0, "weight": -0.5, "scale": 1.0},
+    ],
+}
+
+
+@pytest.fixture
+def scorer(tmp_path):
+    path = tmp_path / "scorecards.json"
+    path.write_text(json.dumps({"loan": CARD, "insurance": {**CARD, "enabled": False}}))
+    return Scorer(str(path))
+
+
+def test_scores_a_covered_applicant(scorer):
+    applicant = {"monthly_income": 7000, "account_age_months": 84, "has_property": 1, "loan_term": 360}
+    result = scorer.score("loan", applicant)
+    assert result["status"] == "APPROVED"
+    assert result["coverage"] == 1.0
+    assert result["key_metrics"]["critical_factors"][0] == "monthly income (+)"
+
+
+def test_too_few_known_features_is_left_to_the_llm(scorer):
+    applicant = {"monthly_income": 7000}
+    assert 1 / len(CARD["features"]) < MIN_COVERAGE
+    assert scorer.score("loan", applicant) is None
+
+
+def test_unmodelled_debt_over_the_guard_is_left_to_the_llm(scorer):
+    applicant = {"monthly_income": 4000, "account_age_months": 84, "has_property": 1, "existing_debt": 7000}
+    assert scorer.score("loan", applicant) is None
+    # Within the guard, or with the debt unknown, the card still decides
+    assert scorer.score("loan", {**applicant, "existing_debt": 5000}) is not None
+    assert scorer.score("loan", {k: v for k, v in applicant.items() if k != "existing_debt"}) is not None
+
+
+def test_years_alias_is_converted_to_months(scorer):
+    months = scorer.score("loan", {"monthly_income": 5000, "account_age_months": 96, "loan_term": 360})
+    years = scorer.score("loan", {"monthly_income": 5000, "credit_history_years": 8, "loan_term": 360})
+    assert months["key_metrics"] == years["key_metrics"]
+
+
+def test_disabled_or_unknown_domain_never_scores(scorer):
+    applicant = {"monthly_income": 7000, "account_age_months": 84, "has_property": 1, "loan_term": 360}
+    for domain in ("insurance", "job"):
+        assert scorer.score(domain, applicant) is None
+
+
+def test_batch_matches_one_at_a_time(scorer):
+    applicants = [
+        {"monthly_income": 7000, "account_age_months": 84, "has_property": 1},
+        {"monthly_income": 2000},
+        {"income": 3000, "credit_history_years": 2, "has_property": 0, "loan_term": 480},
+    ]
+    assert scorer.score_batch("loan", applicants) == [scorer.score("loan", a) for a in applicants]
+
+
+def test_covers_agrees_with_score(scorer):
+    applicants = [
+        {"monthly_income": 7000, "account_age_months": 84, "has_property": 1, "loan_term": 360},
+        {"monthly_income": 7000},
+        {"monthly_income": 4000, "account_age_months": 84, "has_property": 1, "existing_debt": 7000},
+    ]
+    for domain in ("loan", "insurance", "job"):
+        for applicant in applicants:
+            assert scorer.covers(domain, applicant) == (scorer.score(domain, applicant) is not None)
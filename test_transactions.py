@@ -0,0 +1,61 @@
+import pytest
+
+from database import DuplicateId, SimpleDB, SQLiteDB, WriteConflict
+
+
+@pytest.fixture(params=["log", "sqlite"])
+def db(request, tmp_path):
+    if request.param == "sqlite":
+        return SQLiteDB(str(tmp_path / "db.sqlite3"), legacy_file=None)
+    return SimpleDB(str(tmp_path / "db.json"))
+
+
+@pytest.fixture
+def app_id(db):
+    return db.save_application({"domain": "loan", "status": "pending_ai", "data": {"full_name": "A"}})["id"]
+
+
+def test_compare_and_set_applies_when_expected_matches(db, app_id):
+    db.update_application(app_id, {"status": "pending_human"}, expected={"status": "pending_ai"})
+    assert db.get_application(app_id)["status"] == "pending_human"
+
+
+def test_compare_and_set_conflict_leaves_record_unchanged(db, app_id):
+    db.update_application(app_id, {"status": "completed"})
+    with pytest.raises(WriteConflict):
+        db.update_application(app_id, {"status": "pending_human", "ai_result": {}}, expected={"status": "pending_ai"})
+    app = db.get_application(app_id)
+    assert app["status"] == "completed"
+    assert "ai_result" not in app
+
+
+def test_only_one_of_two_racing_writers_wins(db, app_id):
+    db.update_application(app_id, {"status": "approved"}, expected={"status": "pending_ai"})
+    with pytest.raises(WriteConflict):
+        db.update_application(app_id, {"status": "rejected"}, expected={"status": "pending_ai"})
+    assert db.get_application(app_id)["status"] == "approved"
+
+
+def test_transaction_discards_changes_when_block_raises(db, app_id):
+    with pytest.raises(RuntimeError):
+        with db.transaction(app_id) as app:
+            app["status"] = "completed"
+            raise RuntimeError("review failed")
+    assert db.get_application(app_id)["status"] == "pending_ai"
+
+
+def test_transaction_writes_on_clean_exit(db, app_id):
+    with db.transaction(app_id) as app:
+        app["status"] = "completed"
+        app["final_decision"] = "approved"
+    assert db.get_application(app_id)["final_decision"] == "approved"
+
+
+def test_update_missing_application_returns_none(db):
+    assert db.update_application("missing", {"status": "completed"}) is None
+
+
+def test_save_refuses_existing_id(db, app_id):
+    with pytest.raises(DuplicateId):
+        db.save_application({"id": app_id, "domain": "loan", "status": "pending_ai"})
+    assert db.get_application(app_id)["data"] == {"full_name": "A"}
@@ -3,6 +3,7 @@ import json
 import time
 
 BASE_URL = "http://127.0.0.1:8000"
+AI_DECISION_TIMEOUT = 120  # seconds
 
 def test_full_workflow():
     print("--- 1. Submitting Application ---")
@@ -15,7 +16,7 @@ def test_full_workflow():
     # Submit as a "loan" application
     params = {"decision_type": "loan"}
     response = requests.post(f"{BASE_URL}/applications", params=params, json=payload)
-    if response.status_code != 200:
+    if response.status_code != 202:
         print(f"FAILED to submit: {response.text}")
         return
     
@@ -23,12 +24,21 @@ def test_full_workflow():
     app_id = app_data["id"]
     print(f"Application Created! ID: {app_id}")
     print(f"Initial Status: {app_data['status']}")
+
+    # The AI decision runs in a background worker
+    deadline = time.monotonic() + AI_DECISION_TIMEOUT
+    while app_data["status"] == "pending_ai":
+        if time.monotonic() > deadline:
+            print(f"FAILED: No AI decision after {AI_DECISION_TIMEOUT}s")
+            return
+        time.sleep(1)
+        app_data = requests.get(f"{BASE_URL}/applications/{app_id}").json()
     print(f"AI Decision: {app_data['ai_result']['decision']['status']}")
     
     # Verify it is in the pending list
     print("\n--- 2. Checking Pending List ---")
-    response = requests.get(f"{BASE_URL}/applications")
-    apps = response.json()
+    response = requests.get(f"{BASE_URL}/applications", params={"status": "pending"})
+    apps = response.json()["items"]  # Newest first, so the first page has it
     found = False
     for app in apps:
         if app["id"] == app_id:
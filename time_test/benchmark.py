@@ -9,7 +9,7 @@ import random
 sys.path.append(os.path.join(os.path.dirname(__file__), "..", "ai agent"))
 
 try:
-    from xai_agent import ai_decision, DecisionType
+    from xai_agent import ai_decision, DecisionType, ollama_client
 except ImportError as e:
     print(f"Error importing xai_agent: {e}")
     sys.exit(1)
@@ -59,6 +59,11 @@ async def benchmark():
         print(f"❌ Batch Failed: {e}")
         results.append(f"Batch Test: FAILED ({e})")
 
+    # Prompt-eval share (how much of the prompt Ollama had to re-process)
+    stats = ollama_client.snapshot()
+    print(f"\nPrompt eval: {stats['prompt_eval_tokens']} tokens, avg {stats['avg_prompt_eval_seconds']:.2f}s per call")
+    results.append(f"Prompt eval: {stats['prompt_eval_tokens']} tokens (Avg {stats['avg_prompt_eval_seconds']:.2f}s/call)")
+
     # Write results
     with open("time_test/timing.txt", "w") as f:
         f.write("\n".join(results))
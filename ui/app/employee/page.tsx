@@ -6,9 +6,24 @@ import {
     AlertTriangle, Clock, Filter, Upload, FileText, Zap, ChevronRight, User
 } from 'lucide-react';
 import Link from 'next/link';
-import { getApplications, reviewApplication, Application } from '../../lib/api';
+import { reviewApplication, Application } from '../../lib/api';
 
 const DOMAINS = ['loan', 'credit', 'insurance', 'job'];
+const API_BASE = 'http://localhost:8000';
+// The list only needs these; the full record is fetched when one is opened
+const LIST_FIELDS = 'domain,status,data.full_name,ai_result.decision.status,ai_result.decision.confidence';
+const LIST_LIMIT = 200;
+const BATCH_POLL_MS = 2000;
+
+interface BatchProgress {
+    id: string;
+    status: 'loading' | 'running' | 'done';
+    total: number;
+    completed: number;
+    failed: number;
+    pending: number;
+    eta_seconds: number | null;
+}
 
 export default function EmployeeDashboard() {
     const [activeTab, setActiveTab] = useState<'pending' | 'history'>('pending');
@@ -20,6 +35,7 @@ export default function EmployeeDashboard() {
     
     // Batch Upload State
     const [isUploading, setIsUploading] = useState(false);
+    const [batch, setBatch] = useState<BatchProgress | null>(null);
     const fileInputRef = useRef<HTMLInputElement>(null);
 
     useEffect(() => {
@@ -28,12 +44,35 @@ export default function EmployeeDashboard() {
         return () => clearInterval(interval);
     }, [activeTab]);
 
+    // Follow the uploaded batch until every row has a decision
+    useEffect(() => {
+        if (!batch || batch.status === 'done') return;
+        const timer = setTimeout(async () => {
+            try {
+                const res = await fetch(`${API_BASE}/batches/${batch.id}`);
+                if (!res.ok) throw new Error(`Failed to load batch (${res.status})`);
+                const next: BatchProgress = await res.json();
+                setBatch(next);
+                if (next.status === 'done') fetchApplications();
+            } catch (err) {
+                console.error(err);
+                setBatch({ ...batch }); // Try again on the next tick
+            }
+        }, BATCH_POLL_MS);
+        return () => clearTimeout(timer);
+    }, [batch]);
+
     const fetchApplications = async () => {
         if (applications.length === 0) setLoading(true);
         try {
-            const status = activeTab === 'pending' ? 'pending_human' : 'completed';
-            const data = await getApplications(status);
-            setApplications(data);
+            // 'pending' also covers applications still waiting on the AI
+            const status = activeTab === 'pending' ? 'pending' : 'history';
+            const res = await fetch(
+                `${API_BASE}/applications?status=${status}&limit=${LIST_LIMIT}&fields=${encodeURIComponent(LIST_FIELDS)}`
+            );
+            if (!res.ok) throw new Error(`Failed to load applications (${res.status})`);
+            const page = await res.json();
+            setApplications(page.items);
         } catch (err) {
             console.error(err);
         } finally {
@@ -41,6 +80,16 @@ export default function EmployeeDashboard() {
         }
     };
 
+    const openApplication = async (appId: string) => {
+        try {
+            const res = await fetch(`${API_BASE}/applications/${appId}`);
+            if (!res.ok) throw new Error(`Failed to load application (${res.status})`);
+            setSelectedApp(await res.json());
+        } catch (err) {
+            console.error(err);
+        }
+    };
+
     const handleDecision = async (decision: 'approved' | 'rejected') => {
         if (!selectedApp) return;
         
@@ -72,16 +121,20 @@ export default function EmployeeDashboard() {
         const type = prompt("Enter domain type (loan, credit, insurance, job):", "loan") || "loan";
         
         try {
-            // We need a direct fetch here because it's a new endpoint not in api.ts yet
-            await fetch(`http://localhost:8000/applications/batch_upload?decision_type=${type}`, {
+            // Rows are decided in the background; the batch reports progress
+            const res = await fetch(`${API_BASE}/batches?decision_type=${type}`, {
                 method: 'POST',
                 body: formData
             });
-            alert("Batch processed successfully!");
+            if (!res.ok) {
+                const body = await res.json().catch(() => null);
+                throw new Error(body?.detail || `Upload failed (${res.status})`);
+            }
+            setBatch(await res.json());
             fetchApplications();
         } catch (err) {
             console.error(err);
-            alert("Upload failed");
+            alert(err instanceof Error ? err.message : "Upload failed");
         } finally {
             setIsUploading(false);
             if (fileInputRef.current) fileInputRef.current.value = '';
@@ -150,6 +203,28 @@ export default function EmployeeDashboard() {
                             </button>
                             <input type="file" ref={fileInputRef} hidden accept=".csv" onChange={handleFileUpload} />
                         </div>
+
+                        {batch && (
+                            <div className="mt-3 text-xs text-slate-400 space-y-1">
+                                <div className="flex justify-between">
+                                    <span>
+                                        {batch.status === 'done' ? 'Batch done' : 'Batch running'}: {batch.completed + batch.failed}/{batch.total}
+                                        {batch.failed > 0 && <span className="text-red-400"> ({batch.failed} failed)</span>}
+                                    </span>
+                                    {batch.status === 'done' ? (
+                                        <button onClick={() => setBatch(null)} className="text-slate-500 hover:text-white">Dismiss</button>
+                                    ) : (
+                                        batch.eta_seconds != null && <span>~{Math.ceil(batch.eta_seconds / 60)} min left</span>
+                                    )}
+                                </div>
+                                <div className="h-1 bg-slate-800 rounded-full overflow-hidden">
+                                    <div
+                                        className="h-full bg-cyan-500 transition-all"
+                                        style={{ width: `${batch.total ? Math.round(100 * (batch.completed + batch.failed) / batch.total) : 0}%` }}
+                                    />
+                                </div>
+                            </div>
+                        )}
                     </div>
 
                     <div className="flex-1 overflow-y-auto px-4 py-4 space-y-3 scrollbar-thin scrollbar-thumb-slate-800">
@@ -162,7 +237,7 @@ export default function EmployeeDashboard() {
                         {filteredApps.map(app => (
                             <div
                                 key={app.id}
-                                onClick={() => setSelectedApp(app)}
+                                onClick={() => openApplication(app.id)}
                                 className={`group p-4 rounded-xl border cursor-pointer transition-all duration-200 relative overflow-hidden ${
                                     selectedApp?.id === app.id
                                     ? 'bg-cyan-900/10 border-cyan-500/50 shadow-[0_0_20px_rgba(6,182,212,0.1)]'
@@ -180,7 +255,7 @@ export default function EmployeeDashboard() {
                                     <span className="text-[10px] font-mono text-slate-600">{app.id}</span>
                                 </div>
                                 <h3 className="font-semibold text-slate-200 group-hover:text-white transition-colors truncate">
-                                    {app.data.full_name || 'Anonymous Applicant'}
+                                    {app.data?.full_name || 'Anonymous Applicant'}
                                 </h3>
                                 <div className="mt-3 flex items-center justify-between">
                                     <div className="flex items-center space-x-2 text-xs text-slate-500">
@@ -194,6 +269,9 @@ export default function EmployeeDashboard() {
                                             {app.ai_result.decision.confidence ? Math.round(app.ai_result.decision.confidence * 100) : 0}% Conf.
                                         </div>
                                     )}
+                                    {app.status === 'pending_ai' && (
+                                        <div className="text-xs font-bold text-slate-500">AI pending</div>
+                                    )}
                                 </div>
                             </div>
                         ))}